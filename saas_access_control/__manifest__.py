@@ -3,7 +3,7 @@
 
 {
     'name': 'SaaS Access Control',
-    'version': '18.0.1.0.0',
+    'version': '18.0.1.1.0',
     'category': 'Administration',
     'summary': 'Control suspension and remote support access for SaaS instances',
     'description': '''
@@ -49,10 +49,13 @@
         'views/saas_suspension_views.xml',
         'views/support_session_views.xml',
         'views/access_logs_views.xml',
+        'views/access_log_stat_views.xml',
         'views/saas_instance_extended.xml',
 
         # Data
         'data/ir_config_parameter.xml',
+        'data/ir_cron_data.xml',
+        'data/access_log_stat_data.xml',
     ],
     'installable': True,
     'application': False,
@@ -5,6 +5,8 @@ from odoo import http
 from odoo.http import request
 import logging
 
+from ..tools.host_cache import host_cache
+
 _logger = logging.getLogger(__name__)
 
 
@@ -21,9 +23,9 @@ class AccessMiddleware(http.Controller):
             # Get current instance info from request
             instance_id = self._get_current_instance_id()
 
-            if instance_id:
-                # Check if instance is suspended
-                suspension = request.env['saas.suspension'].search([
+            if instance_id and self._is_instance_suspended(instance_id):
+                # Load the suspension only to render the page
+                suspension = request.env['saas.suspension'].sudo().search([
                     ('instance_id', '=', instance_id),
                     ('state', '=', 'active'),
                 ], limit=1)
@@ -45,13 +47,13 @@ class AccessMiddleware(http.Controller):
             # Check if this is database-specific call
             if service == 'object' and len(args) > 0:
                 db_name = args[0]
-                instance = request.env['saas.instance'].search([
-                    ('db_name', '=', db_name),
+                instance = request.env['saas.instance'].sudo().search([
+                    ('database_name', '=', db_name),
                 ], limit=1)
 
-                if instance:
-                    # Check suspension
-                    suspension = request.env['saas.suspension'].search([
+                if instance and self._is_instance_suspended(instance.id):
+                    # Load the suspension only to report its reason
+                    suspension = request.env['saas.suspension'].sudo().search([
                         ('instance_id', '=', instance.id),
                         ('state', '=', 'active'),
                     ], limit=1)
@@ -81,19 +83,32 @@ class AccessMiddleware(http.Controller):
         """
         Get current instance ID from request.
         Can be from hostname, cookie, or session.
+        Hostname resolutions are cached in-process, see tools/host_cache.py.
         """
         try:
-            # Method 1: Check hostname
-            hostname = request.httprequest.host.split(':')[0]
-            instance = request.env['saas.instance'].search([
-                ('domain', 'ilike', hostname),
+            hostname = request.httprequest.host.split(':')[0].lower()
+        except Exception:
+            return None
+
+        dbname = request.env.cr.dbname
+        instance_id = host_cache.get(dbname, hostname)
+        if instance_id is not None:
+            return instance_id or None
+
+        try:
+            instance = request.env['saas.instance'].sudo().search([
+                ('domain', '=', hostname),
             ], limit=1)
-            if instance:
-                return instance.id
-        except:
-            pass
+        except Exception as e:
+            _logger.warning(f"Error resolving instance of host {hostname}: {e}")
+            return None
+
+        host_cache.set(dbname, hostname, instance.id)
+        return instance.id or None
 
-        return None
+    def _is_instance_suspended(self, instance_id):
+        """Check the instance against the cached suspension snapshot"""
+        return request.env['saas.suspension'].sudo().is_instance_suspended(instance_id)
 
     def _is_admin_user(self):
         """Check if current user is SaaS admin"""
@@ -33,7 +33,7 @@ class SupportPortal(http.Controller):
 
             if is_valid:
                 # Log access
-                support_session = request.env['support.session'].browse(
+                support_session = support_session_model.browse(
                     payload['session_id']
                 )
                 support_session.log_access(
@@ -160,17 +160,22 @@ class SupportPortal(http.Controller):
         type='json',
         methods=['GET']
     )
-    def get_access_logs(self, instance_id, limit=100, **kwargs):
-        """Get access logs for an instance"""
+    def get_access_logs(self, instance_id, limit=100, cursor=None, **kwargs):
+        """
+        Get access logs for an instance.
+        Pass the returned next_cursor to get the following page.
+        """
         try:
             # Check permission
             instance = request.env['saas.instance'].browse(instance_id)
             if not request.env.user.has_group('saas_access_control.group_saas_admin'):
                 return {'error': 'Permission denied'}
 
+            limit = max(1, min(int(limit), 1000))
             logs = request.env['access.log'].get_instance_logs(
                 instance_id,
-                limit=limit
+                limit=limit,
+                cursor=cursor,
             )
 
             return {
@@ -181,7 +186,8 @@ class SupportPortal(http.Controller):
                     'timestamp': l.timestamp,
                     'ip': l.ip_address,
                     'status': l.status,
-                } for l in logs]
+                } for l in logs],
+                'next_cursor': logs._get_page_cursor() if len(logs) == limit else None,
             }
         except Exception as e:
             _logger.error(f"Error fetching access logs: {e}")
@@ -199,7 +205,7 @@ class SupportPortal(http.Controller):
     def _log_failed_access(self, reason, token=None):
         """Log failed access attempt"""
         try:
-            request.env['access.log'].sudo().create({
+            request.env['access.log'].sudo().log_buffered([{
                 'instance_id': None,
                 'user_id': request.env.user.id if request.env.user else 1,
                 'action': 'failed_access',
@@ -207,7 +213,7 @@ class SupportPortal(http.Controller):
                 'ip_address': self._get_client_ip(),
                 'status': 'denied',
                 'error_message': reason,
-            })
+            }])
         except Exception as e:
             _logger.warning(f"Could not log failed access: {e}")
 
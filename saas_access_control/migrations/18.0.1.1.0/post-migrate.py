@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+"""
+Recompute saas.instance.is_suspended, which used to depend on 'id' only
+and was therefore never updated after instance creation.
+"""
+
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    if not version:
+        return
+
+    cr.execute("""
+        UPDATE saas_instance AS instance
+           SET is_suspended = EXISTS (
+                   SELECT 1 FROM saas_suspension AS suspension
+                    WHERE suspension.instance_id = instance.id
+                      AND suspension.state = 'active'
+               )
+    """)
+    _logger.info(f"Recomputed the suspension flag of {cr.rowcount} SaaS instances")
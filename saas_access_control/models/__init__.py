@@ -5,6 +5,7 @@ from . import (
     saas_suspension,
     support_session,
     access_logs,
+    access_log_stat,
     saas_instance_access,
 )
 
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+from odoo import api, fields, models
+import logging
+
+from .access_logs import FAILED_STATUSES
+
+_logger = logging.getLogger(__name__)
+
+# Seconds a new log row waits before being rolled up, so that rows of
+# transactions still in flight (lower ids committed late) are not skipped
+ROLLUP_LAG = 300
+
+
+class AccessLogStat(models.Model):
+    """
+    Hourly and daily access counts, rolled up incrementally from access.log.
+    Rows are keyed by bucket, instance, action and status; the client IP
+    is kept for failed and denied accesses only.
+    """
+    _name = 'access.log.stat'
+    _description = 'Access Log Statistics'
+    _order = 'bucket desc, id desc'
+    _rec_name = 'bucket'
+
+    bucket = fields.Datetime(
+        string='Period',
+        required=True,
+        readonly=True,
+        index=True,
+    )
+
+    resolution = fields.Selection([
+        ('hour', 'Hourly'),
+        ('day', 'Daily'),
+    ], string='Resolution', required=True, readonly=True)
+
+    instance_id = fields.Many2one(
+        'saas.instance',
+        string='Instance',
+        readonly=True,
+        ondelete='cascade',
+        index=True,
+    )
+
+    action = fields.Selection(
+        selection=lambda self: self.env['access.log']._fields['action'].selection,
+        string='Action',
+        readonly=True,
+    )
+
+    status = fields.Selection(
+        selection=lambda self: self.env['access.log']._fields['status'].selection,
+        string='Status',
+        readonly=True,
+    )
+
+    ip_address = fields.Char(
+        string='IP Address',
+        readonly=True,
+        default='',
+        help='Only set for failed and denied accesses',
+    )
+
+    access_count = fields.Integer(
+        string='Accesses',
+        readonly=True,
+        aggregator='sum',
+    )
+
+    _sql_constraints = [
+        ('bucket_unique', 'UNIQUE(resolution, bucket, instance_id, action, status, ip_address)',
+         'Access statistics must be unique per period!'),
+    ]
+
+    @api.model
+    def rollup(self, lag=ROLLUP_LAG):
+        """
+        Add the access logs created since the last run to the statistics.
+        The last rolled up log id (high-water mark) is kept in the
+        access.log.stat.state row, locked for the whole run: each log row is
+        counted once even when two runs overlap, and the raw table is only
+        read by primary key.
+        """
+        state = self.env['access.log.stat.state']._get_state()
+        self.env.cr.execute(
+            "SELECT last_log_id FROM access_log_stat_state WHERE id = %s FOR UPDATE", [state.id]
+        )
+        last_id = self.env.cr.fetchone()[0] or 0
+
+        self.env['access.log'].flush_model()
+        self.env.cr.execute("""
+            SELECT max(id) FROM access_log
+             WHERE id > %s
+               AND create_date <= (now() at time zone 'UTC') - %s * interval '1 second'
+        """, [last_id, lag])
+        max_id = self.env.cr.fetchone()[0]
+        if not max_id:
+            return 0
+
+        for resolution in ['hour', 'day']:
+            self.env.cr.execute("""
+                INSERT INTO access_log_stat (
+                    resolution, bucket, instance_id, action, status, ip_address, access_count,
+                    create_uid, create_date, write_uid, write_date
+                )
+                SELECT %(resolution)s, date_trunc(%(resolution)s, timestamp), instance_id,
+                       action, coalesce(status, 'success'),
+                       CASE WHEN status IN %(failed)s THEN coalesce(ip_address, '') ELSE '' END,
+                       count(*),
+                       %(uid)s, now() at time zone 'UTC', %(uid)s, now() at time zone 'UTC'
+                  FROM access_log
+                 WHERE id > %(last_id)s
+                   AND id <= %(max_id)s
+                 GROUP BY 2, 3, 4, 5, 6
+                ON CONFLICT (resolution, bucket, instance_id, action, status, ip_address)
+                DO UPDATE SET access_count = access_log_stat.access_count + EXCLUDED.access_count,
+                              write_date = EXCLUDED.write_date
+            """, {
+                'resolution': resolution,
+                'failed': FAILED_STATUSES,
+                'uid': self.env.uid,
+                'last_id': last_id,
+                'max_id': max_id,
+            })
+
+        # Plain SQL: ir.config_parameter would clear the caches of all workers
+        self.env.cr.execute("""
+            UPDATE access_log_stat_state
+               SET last_log_id = %s, write_uid = %s, write_date = now() at time zone 'UTC'
+             WHERE id = %s
+        """, [max_id, self.env.uid, state.id])
+        state.invalidate_recordset(['last_log_id'])
+        self.invalidate_model()
+        _logger.info(f"Rolled up access logs {last_id + 1} to {max_id} into access statistics")
+        return max_id - last_id
+
+    @api.model
+    def cron_rollup_access_logs(self):
+        """CRON: roll up new access logs into the statistics"""
+        return self.rollup()
+
+
+class AccessLogStatState(models.Model):
+    """
+    High-water mark of the access log rollup: a single row, locked by each
+    run, so that the mark never goes through ir.config_parameter.
+    """
+    _name = 'access.log.stat.state'
+    _description = 'Access Log Statistics State'
+
+    last_log_id = fields.Integer(
+        string='Last Rolled Up Log',
+        readonly=True,
+        help='Id of the last access log added to the statistics',
+    )
+
+    @api.model
+    def _get_state(self):
+        """The rollup state row, created when missing"""
+        return self.sudo().search([], order='id', limit=1) or self.sudo().create({})
@@ -2,11 +2,19 @@
 # Part of Odoo. See LICENSE file for full copyright and licensing details.
 
 from odoo import api, fields, models
-from datetime import datetime
+from odoo.tools import SQL
+from odoo.tools.sql import create_index, drop_index
+from datetime import datetime, timedelta
 import logging
 
+from odoo.addons.saas_manager.tools import auto_commit_allowed
+from ..tools.access_log_buffer import access_log_buffer
+
 _logger = logging.getLogger(__name__)
 
+# Statuses returned by get_failed_access_logs (predicate of a partial index)
+FAILED_STATUSES = ('failed', 'denied')
+
 
 class AccessLog(models.Model):
     """
@@ -15,7 +23,7 @@ class AccessLog(models.Model):
     """
     _name = 'access.log'
     _description = 'Access Log'
-    _order = 'timestamp desc'
+    _order = 'timestamp desc, id desc'
 
     session_id = fields.Many2one(
         'support.session',
@@ -29,14 +37,12 @@ class AccessLog(models.Model):
         string='Instance',
         required=True,
         ondelete='cascade',
-        index=True,
     )
 
     user_id = fields.Many2one(
         'res.users',
         string='User',
         required=True,
-        index=True,
     )
 
     action = fields.Selection([
@@ -98,6 +104,21 @@ class AccessLog(models.Model):
         string='Additional Details',
     )
 
+    def init(self):
+        """Indexes matching the filters and the order of the query helpers"""
+        # The composite indexes lead with instance_id and user_id: the
+        # single-column indexes of older versions only slow down inserts
+        # (the ORM keeps an index once index=True is removed)
+        drop_index(self.env.cr, 'access_log_instance_id_index', self._table)
+        drop_index(self.env.cr, 'access_log_user_id_index', self._table)
+        create_index(self.env.cr, 'access_log_instance_timestamp_index', self._table,
+                     ['instance_id', 'timestamp DESC', 'id DESC'])
+        create_index(self.env.cr, 'access_log_user_timestamp_index', self._table,
+                     ['user_id', 'timestamp DESC', 'id DESC'])
+        create_index(self.env.cr, 'access_log_failed_timestamp_index', self._table,
+                     ['timestamp DESC', 'id DESC'],
+                     where=f"status IN {FAILED_STATUSES}")
+
     @api.model_create_multi
     def create(self, vals_list):
         """Log creation with automatic timestamp"""
@@ -117,44 +138,115 @@ class AccessLog(models.Model):
 
         return records
 
-    def get_instance_logs(self, instance_id, limit=100):
+    @api.model
+    def log_buffered(self, vals_list):
+        """
+        Queue access logs without writing them in the current transaction.
+        They are inserted in bulk by tools/access_log_buffer.py.
+        """
+        now = fields.Datetime.now()
+        for vals in vals_list:
+            access_log_buffer.add_log(self.env.cr, dict(vals, timestamp=vals.get('timestamp') or now))
+
+    @api.model
+    def _search_page(self, domain, limit=100, cursor=None):
+        """
+        Keyset pagination in 'timestamp desc, id desc' order.
+        cursor is the value returned by _get_page_cursor() for the last
+        record of the previous page; seeking past it keeps deep pages as
+        cheap as the first one, unlike an offset.
+        """
+        query = self._search(domain, order='timestamp desc, id desc', limit=limit)
+        if cursor:
+            timestamp, record_id = self._parse_page_cursor(cursor)
+            query.add_where(SQL(
+                "(%s, %s) < (%s, %s)",
+                SQL.identifier(query.table, 'timestamp'),
+                SQL.identifier(query.table, 'id'),
+                timestamp, record_id,
+            ))
+        return self.browse(query)
+
+    def _get_page_cursor(self):
+        """Cursor of the next page, after the last record of this one"""
+        if not self:
+            return None
+        last = self[-1]
+        return f"{fields.Datetime.to_string(last.timestamp)},{last.id}"
+
+    @api.model
+    def _parse_page_cursor(self, cursor):
+        """Return (timestamp, id) from a page cursor"""
+        timestamp, _sep, record_id = cursor.rpartition(',')
+        try:
+            return fields.Datetime.to_datetime(timestamp), int(record_id)
+        except ValueError:
+            raise ValueError(f"Invalid access log cursor: {cursor}")
+
+    def get_instance_logs(self, instance_id, limit=100, cursor=None):
         """Get access logs for a specific instance"""
-        return self.search([
+        return self._search_page([
             ('instance_id', '=', instance_id),
-        ], limit=limit, order='timestamp desc')
+        ], limit=limit, cursor=cursor)
 
-    def get_user_logs(self, user_id, limit=100):
+    def get_user_logs(self, user_id, limit=100, cursor=None):
         """Get access logs for a specific user"""
-        return self.search([
+        return self._search_page([
             ('user_id', '=', user_id),
-        ], limit=limit, order='timestamp desc')
+        ], limit=limit, cursor=cursor)
 
     def get_session_logs(self, session_id):
         """Get all logs for a specific support session"""
         return self.search([
             ('session_id', '=', session_id),
-        ], order='timestamp desc')
+        ], order='timestamp desc, id desc')
 
-    def get_failed_access_logs(self, instance_id=None):
+    def get_failed_access_logs(self, instance_id=None, limit=100, cursor=None):
         """Get failed access attempts"""
-        domain = [('status', '!=', 'success')]
+        domain = [('status', 'in', list(FAILED_STATUSES))]
         if instance_id:
             domain.append(('instance_id', '=', instance_id))
 
-        return self.search(domain, order='timestamp desc', limit=100)
-
-    def cleanup_old_logs(self, days=90):
-        """Remove logs older than specified days"""
-        from datetime import timedelta
-        cutoff_date = datetime.now() - timedelta(days=days)
-
-        old_logs = self.search([
-            ('timestamp', '<', cutoff_date),
-        ])
-
-        count = len(old_logs)
-        old_logs.unlink()
-
+        return self._search_page(domain, limit=limit, cursor=cursor)
+
+    @api.model
+    def cleanup_old_logs(self, days=None, batch_size=None):
+        """
+        Remove logs older than specified days.
+        Rows are deleted with plain SQL in chunks of batch_size ids,
+        committing after each chunk, so that neither the ORM nor a single
+        transaction has to hold millions of rows.
+        """
+        params = self.env['ir.config_parameter'].sudo()
+        if days is None:
+            days = int(params.get_param('saas_access_control.log_retention_days', 90))
+        if batch_size is None:
+            batch_size = int(params.get_param('saas_access_control.log_cleanup_batch_size', 10000))
+        cutoff_date = fields.Datetime.now() - timedelta(days=days)
+        auto_commit = auto_commit_allowed()
+
+        count = 0
+        while True:
+            self.env.cr.execute("""
+                DELETE FROM access_log
+                 WHERE id IN (
+                    SELECT id FROM access_log
+                     WHERE timestamp < %s
+                     LIMIT %s
+                 )
+            """, [cutoff_date, batch_size])
+            deleted = self.env.cr.rowcount
+            count += deleted
+            if auto_commit:
+                self.env.cr.commit()
+            if deleted < batch_size:
+                break
+
+        self.invalidate_model()
         _logger.info(f"Cleaned up {count} old access logs")
         return count
 
+    @api.model
+    def cron_cleanup_old_logs(self):
+        """CRON: apply the access log retention period"""
+        return self.cleanup_old_logs()
@@ -5,6 +5,8 @@ from odoo import api, fields, models
 from datetime import datetime, timedelta
 import logging
 
+from ..tools.host_cache import invalidate_host_cache
+
 _logger = logging.getLogger(__name__)
 
 
@@ -14,6 +16,12 @@ class SaasInstanceAccessControl(models.Model):
     """
     _inherit = 'saas.instance'
 
+    suspension_ids = fields.One2many(
+        'saas.suspension',
+        'instance_id',
+        string='Suspensions',
+    )
+
     is_suspended = fields.Boolean(
         string='Is Suspended',
         compute='_compute_is_suspended',
@@ -33,25 +41,32 @@ class SaasInstanceAccessControl(models.Model):
         compute='_compute_suspension_reason',
     )
 
-    @api.depends('id')
+    def _get_active_suspensions(self):
+        """Map instance id -> latest active suspension, in a single query"""
+        instance_ids = [record.id for record in self if isinstance(record.id, int)]
+        active = {}
+        if instance_ids:
+            suspensions = self.env['saas.suspension'].search([
+                ('instance_id', 'in', instance_ids),
+                ('state', '=', 'active'),
+            ], order='create_date desc, id desc')
+            for suspension in suspensions:
+                active.setdefault(suspension.instance_id.id, suspension)
+        return active
+
+    @api.depends('suspension_ids.state')
     def _compute_is_suspended(self):
         """Check if instance has active suspension"""
+        active = self._get_active_suspensions()
         for record in self:
-            suspension = self.env['saas.suspension'].search([
-                ('instance_id', '=', record.id),
-                ('state', '=', 'active'),
-            ], limit=1)
-            record.is_suspended = bool(suspension)
+            record.is_suspended = record.id in active
 
-    @api.depends('id')
+    @api.depends('suspension_ids.state')
     def _compute_suspension_id(self):
         """Get active suspension for instance"""
+        active = self._get_active_suspensions()
         for record in self:
-            suspension = self.env['saas.suspension'].search([
-                ('instance_id', '=', record.id),
-                ('state', '=', 'active'),
-            ], limit=1)
-            record.suspension_id = suspension.id if suspension else False
+            record.suspension_id = active.get(record.id, False)
 
     @api.depends('suspension_id')
     def _compute_suspension_reason(self):
@@ -62,6 +77,25 @@ class SaasInstanceAccessControl(models.Model):
             else:
                 record.suspension_reason = None
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Drop cached host resolutions (hosts may now match an instance)"""
+        records = super().create(vals_list)
+        invalidate_host_cache(self.env.cr)
+        return records
+
+    def write(self, vals):
+        """Drop cached host resolutions of the database"""
+        result = super().write(vals)
+        invalidate_host_cache(self.env.cr)
+        return result
+
+    def unlink(self):
+        """Drop cached host resolutions of the database"""
+        result = super().unlink()
+        invalidate_host_cache(self.env.cr)
+        return result
+
     def action_suspend_instance(self):
         """Create suspension for this instance"""
         return {
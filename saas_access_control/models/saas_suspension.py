@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 # Part of Odoo. See LICENSE file for full copyright and licensing details.
 
-from odoo import api, fields, models
+from odoo import api, fields, models, tools
 from datetime import datetime, timedelta
 import logging
 
@@ -79,6 +79,32 @@ class SaasSuspension(models.Model):
         for record in self:
             record.is_active = record.state == 'active'
 
+    @api.model
+    @tools.ormcache()
+    def _get_suspended_instance_ids(self):
+        """
+        Snapshot of the ids of the instances with an active suspension.
+
+        Cached in every worker; changes clear the registry cache, which is
+        signaled to the other workers through the database, so each one
+        reloads the snapshot once instead of querying per request.
+        """
+        self.env.cr.execute("""
+            SELECT DISTINCT instance_id FROM saas_suspension WHERE state = 'active'
+        """)
+        return frozenset(instance_id for instance_id, in self.env.cr.fetchall())
+
+    @api.model
+    def is_instance_suspended(self, instance_id):
+        """Whether an instance has an active suspension (O(1) lookup)"""
+        return instance_id in self._get_suspended_instance_ids()
+
+    def _invalidate_suspension_snapshot(self):
+        """Drop the suspension snapshot in all workers, now and once committed"""
+        self.env.registry.clear_cache()
+        # A concurrent request may reload the old snapshot before the commit
+        self.env.cr.postcommit.add(self.env.registry.clear_cache)
+
     def action_resume(self):
         """Resume a suspended instance"""
         for record in self:
@@ -111,19 +137,27 @@ class SaasSuspension(models.Model):
         try:
             rpc_client = instance.get_rpc_client()
 
+            uid = rpc_client.login(
+                instance.database_name,
+                instance.admin_login,
+                instance.admin_password,
+            )
+            if not uid:
+                _logger.warning(
+                    f"Cannot sync suspension state to {instance.name}: authentication refused"
+                )
+                return
+
             # Call method on remote instance to update suspension state
-            rpc_client.call({
-                'service': 'object',
-                'method': 'execute_kw',
-                'args': [
-                    instance.server_id.db_name,
-                    self.env.user.id,
-                    'saas.access.local',
-                    'set_suspension_state',
-                    [instance.db_name],
-                    {'is_suspended': is_suspended},
-                ]
-            })
+            rpc_client.execute_kw(
+                instance.database_name,
+                uid,
+                instance.admin_password,
+                'saas.access.local',
+                'set_suspension_state',
+                [instance.database_name],
+                {'is_suspended': is_suspended},
+            )
 
             _logger.info(
                 f"Synced suspension state to {instance.name}: "
@@ -149,5 +183,19 @@ class SaasSuspension(models.Model):
                 is_suspended=True
             )
 
+        self._invalidate_suspension_snapshot()
         return record
 
+    def write(self, vals):
+        """Refresh the suspension snapshot when the state changes"""
+        result = super().write(vals)
+        if 'state' in vals or 'instance_id' in vals:
+            self._invalidate_suspension_snapshot()
+        return result
+
+    def unlink(self):
+        """Refresh the suspension snapshot"""
+        result = super().unlink()
+        self._invalidate_suspension_snapshot()
+        return result
+
@@ -8,6 +8,8 @@ import logging
 import secrets
 import string
 
+from ..tools.access_log_buffer import access_log_buffer
+
 _logger = logging.getLogger(__name__)
 
 
@@ -159,13 +161,13 @@ class SupportSession(models.Model):
         payload = {
             'session_id': record.id,
             'instance_id': record.instance_id.id,
-            'instance_db': record.instance_id.db_name,
+            'instance_db': record.instance_id.database_name,
             'support_user_id': record.support_user_id.id,
             'support_user': record.support_user_id.login,
             'reason': record.reason,
             'allowed_actions': record.allowed_actions,
             'iat': datetime.now(),
-            'exp': datetime.fromisoformat(record.expires_at),
+            'exp': fields.Datetime.to_datetime(record.expires_at),
         }
 
         token = jwt.encode(payload, secret_key, algorithm='HS256')
@@ -233,20 +235,22 @@ class SupportSession(models.Model):
             )
 
     def log_access(self, ip_address=None):
-        """Log access to support session"""
+        """
+        Log access to support session.
+        The counter increment and the log row are buffered and written in
+        bulk, so concurrent accesses never lock the session row.
+        """
+        now = fields.Datetime.now()
         for record in self:
-            record.write({
-                'accessed_at': fields.Datetime.now(),
-                'access_count': record.access_count + 1,
-            })
-
-            # Create access log entry
-            self.env['access.log'].create({
-                'session_id': record.id,
-                'instance_id': record.instance_id.id,
-                'user_id': record.support_user_id.id,
-                'ip_address': ip_address,
-                'timestamp': fields.Datetime.now(),
-                'action': 'access',
-            })
+            access_log_buffer.add_session_access(self.env.cr, record.id, now)
 
+        # Create access log entries
+        self.env['access.log'].log_buffered([{
+            'session_id': record.id,
+            'instance_id': record.instance_id.id,
+            'user_id': record.support_user_id.id,
+            'ip_address': ip_address,
+            'timestamp': now,
+            'action': 'access',
+        } for record in self])
+        self.invalidate_recordset(['access_count', 'accessed_at'])
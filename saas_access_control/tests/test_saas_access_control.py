@@ -1,5 +1,240 @@
 # -*- coding: utf-8 -*-
 # Part of Odoo. See LICENSE file for full copyright and licensing details.
 
-from . import test_saas_access_control
+from odoo.tests.common import TransactionCase
+from datetime import datetime, timedelta
+from unittest.mock import patch
+import logging
 
+from odoo.addons.saas_access_control.models.saas_suspension import SaasSuspension
+from odoo.addons.saas_access_control.tools.host_cache import HostCache, host_cache
+
+_logger = logging.getLogger(__name__)
+
+
+class SaasAccessControlTestCase(TransactionCase):
+    """Test SaaS Access Control functionality"""
+
+    def setUp(self):
+        super().setUp()
+        self.env = self.env(context=dict(self.env.context, tracking_disable=True))
+
+        server = self.env['saas.server'].create({
+            'name': 'Access Server',
+            'code': 'access-server',
+            'server_url': 'http://access.localhost:8069',
+            'max_instances': 100,
+            'state': 'active',
+        })
+        template = self.env['saas.template'].create({
+            'name': 'Access Template',
+            'code': 'access-template',
+            'template_db': 'access_template_db',
+            'server_id': server.id,
+            'is_template_ready': True,
+        })
+        plan = self.env['saas.plan'].create({
+            'name': 'Access Plan',
+            'code': 'access-plan',
+        })
+        self.instance = self.env['saas.instance'].create({
+            'name': 'Access Instance',
+            'database_name': 'access_instance',
+            'subdomain': 'access',
+            'template_id': template.id,
+            'plan_id': plan.id,
+            'server_id': server.id,
+            'partner_id': self.env['res.partner'].create({'name': 'Access Partner'}).id,
+            'state': 'active',
+        })
+
+        # Suspensions sync their state to the remote instance over RPC
+        patcher = patch.object(SaasSuspension, '_sync_suspension_state_to_instance', lambda *args, **kwargs: None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_suspension_creation(self):
+        """Test creating a suspension"""
+        # This is a placeholder - would need saas.instance to exist
+        _logger.info("SaaS Access Control module loaded successfully")
+
+    def test_support_session_jwt_generation(self):
+        """Test JWT token generation for support sessions"""
+        # This is a placeholder
+        _logger.info("Support session tests would go here")
+
+    def test_access_log_creation(self):
+        """Test access log creation"""
+        # This is a placeholder
+        _logger.info("Access log tests would go here")
+
+    def test_host_cache_lru_ttl(self):
+        """Test host cache eviction and expiry"""
+        cache = HostCache(maxsize=2, ttl=60)
+        cache.set('db', 'a.example.com', 1)
+        cache.set('db', 'b.example.com', 2)
+        self.assertEqual(cache.get('db', 'a.example.com'), 1)
+
+        # b is now the least recently used entry
+        cache.set('db', 'c.example.com', None)
+        self.assertIsNone(cache.get('db', 'b.example.com'))
+        self.assertIs(cache.get('db', 'c.example.com'), False)
+
+        with patch('odoo.addons.saas_access_control.tools.host_cache.time.monotonic', return_value=1e12):
+            self.assertIsNone(cache.get('db', 'a.example.com'))
+
+    def test_host_cache_invalidated_on_instance_write(self):
+        """Test that instance writes drop the cached host resolutions"""
+        dbname = self.env.cr.dbname
+        host_cache.set(dbname, 'cached.example.com', 1)
+        self.instance.write({'notes': 'Moved'})
+        self.assertIsNone(host_cache.get(dbname, 'cached.example.com'))
+
+    def test_suspension_snapshot(self):
+        """Test that the suspension snapshot follows suspensions"""
+        Suspension = self.env['saas.suspension']
+        self.assertFalse(Suspension.is_instance_suspended(self.instance.id))
+
+        suspension = Suspension.create({
+            'instance_id': self.instance.id,
+            'reason': 'payment',
+        })
+        self.assertTrue(Suspension.is_instance_suspended(self.instance.id))
+
+        suspension.action_resume()
+        self.assertFalse(Suspension.is_instance_suspended(self.instance.id))
+
+    def test_suspension_snapshot_cleared_after_commit(self):
+        """Test that the suspension snapshot is dropped again once committed"""
+        registry_class = type(self.env.registry)
+        with patch.object(registry_class, 'clear_cache') as clear_cache:
+            self.env['saas.suspension'].create({
+                'instance_id': self.instance.id,
+                'reason': 'payment',
+            })
+            cleared = clear_cache.call_count
+            self.assertTrue(cleared)
+            self.env.cr.postcommit.run()
+            self.assertGreater(clear_cache.call_count, cleared)
+
+    def test_instance_suspension_fields(self):
+        """Test that instance suspension fields follow suspensions"""
+        suspension = self.env['saas.suspension'].create({
+            'instance_id': self.instance.id,
+            'reason': 'abuse',
+        })
+        self.assertTrue(self.instance.is_suspended)
+        self.assertEqual(self.instance.suspension_id, suspension)
+        self.assertEqual(self.env['saas.instance'].search([('is_suspended', '=', True)]), self.instance)
+
+        suspension.action_resume()
+        self.assertFalse(self.instance.is_suspended)
+        self.assertFalse(self.instance.suspension_id)
+
+    def test_support_session_log_access(self):
+        """Test that buffered access logging counts accesses and writes logs"""
+        session = self.env['support.session'].create({
+            'instance_id': self.instance.id,
+            'reason': 'troubleshooting',
+            'expires_at': datetime.now() + timedelta(hours=1),
+        })
+
+        session.log_access(ip_address='10.0.0.1')
+        session.log_access(ip_address='10.0.0.2')
+
+        self.assertEqual(session.access_count, 2)
+        self.assertTrue(session.accessed_at)
+        logs = self.env['access.log'].search([('session_id', '=', session.id)])
+        self.assertEqual(sorted(logs.mapped('ip_address')), ['10.0.0.1', '10.0.0.2'])
+        self.assertEqual(set(logs.mapped('status')), {'success'})
+
+    def test_cleanup_old_logs_in_chunks(self):
+        """Test that retention deletes old logs in chunks and keeps recent ones"""
+        now = datetime.now()
+        logs = self.env['access.log'].create([{
+            'instance_id': self.instance.id,
+            'user_id': self.env.user.id,
+            'action': 'access',
+            'timestamp': now - timedelta(days=age),
+        } for age in [100, 120, 150, 1]])
+
+        count = self.env['access.log'].cleanup_old_logs(days=90, batch_size=2)
+
+        self.assertEqual(count, 3)
+        self.assertEqual(logs.exists(), logs[-1])
+
+    def test_access_logs_keyset_pagination(self):
+        """Test that cursor pagination walks every log once, in order"""
+        now = datetime.now().replace(microsecond=0)
+        self.env['access.log'].create([{
+            'instance_id': self.instance.id,
+            'user_id': self.env.user.id,
+            'action': 'access',
+            'status': 'denied' if index % 2 else 'success',
+            'timestamp': now - timedelta(minutes=index // 2),
+        } for index in range(7)])
+        AccessLog = self.env['access.log']
+        expected = AccessLog.search([('instance_id', '=', self.instance.id)])
+
+        pages = AccessLog.browse()
+        cursor = None
+        while True:
+            page = AccessLog.get_instance_logs(self.instance.id, limit=3, cursor=cursor)
+            pages |= page
+            if len(page) < 3:
+                break
+            cursor = page._get_page_cursor()
+
+        self.assertEqual(pages.ids, expected.ids)
+        failed = AccessLog.get_failed_access_logs(self.instance.id, limit=2)
+        self.assertEqual(failed.mapped('status'), ['denied', 'denied'])
+        self.assertEqual(
+            AccessLog.get_failed_access_logs(self.instance.id, cursor=failed._get_page_cursor()).ids,
+            expected.filtered(lambda log: log.status == 'denied')[2:].ids,
+        )
+
+    def test_access_stats_rollup(self):
+        """Test that the rollup counts each new log once per bucket"""
+        def log(status, ip_address, timestamp):
+            return {
+                'instance_id': self.instance.id,
+                'user_id': self.env.user.id,
+                'action': 'login',
+                'status': status,
+                'ip_address': ip_address,
+                'timestamp': timestamp,
+            }
+
+        AccessLog = self.env['access.log']
+        Stat = self.env['access.log.stat']
+        Stat.rollup(lag=0)
+        hour = datetime(2026, 3, 2, 10, 15)
+        AccessLog.create([
+            log('failed', '10.0.0.1', hour),
+            log('failed', '10.0.0.1', hour + timedelta(minutes=5)),
+            log('success', '10.0.0.2', hour),
+        ])
+        Stat.rollup(lag=0)
+        AccessLog.create([log('failed', '10.0.0.1', hour + timedelta(hours=1))])
+        Stat.rollup(lag=0)
+
+        def counts(resolution, status):
+            stats = Stat.search([
+                ('instance_id', '=', self.instance.id),
+                ('resolution', '=', resolution),
+                ('status', '=', status),
+            ])
+            return {(stat.bucket, stat.ip_address): stat.access_count for stat in stats}
+
+        self.assertEqual(counts('hour', 'failed'), {
+            (datetime(2026, 3, 2, 10), '10.0.0.1'): 2,
+            (datetime(2026, 3, 2, 11), '10.0.0.1'): 1,
+        })
+        self.assertEqual(counts('day', 'failed'), {(datetime(2026, 3, 2), '10.0.0.1'): 3})
+        self.assertEqual(counts('day', 'success'), {(datetime(2026, 3, 2), ''): 1})
+
+        # The high-water mark is kept out of ir.config_parameter
+        last_log = AccessLog.search([], order='id desc', limit=1)
+        self.assertEqual(self.env['access.log.stat.state']._get_state().last_log_id, last_log.id)
+        self.assertFalse(self.env['ir.config_parameter'].sudo().get_param('saas_access_control.stat_last_log_id'))
+        self.assertEqual(Stat.rollup(lag=0), 0)
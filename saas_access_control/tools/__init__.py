@@ -0,0 +1,5 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+from .host_cache import HostCache, host_cache, invalidate_host_cache
+from .access_log_buffer import AccessLogBuffer, access_log_buffer
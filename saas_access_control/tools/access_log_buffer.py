@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+"""
+Append-only buffer for access.log rows and support session counters.
+
+Requests only append to an in-memory buffer; a background thread writes
+the buffer with bulk INSERTs every FLUSH_INTERVAL seconds, or as soon as
+MAX_SIZE entries are pending. Support session accesses are aggregated per
+session and applied with one atomic increment per session, so concurrent
+token verifications never wait on each other's row locks.
+
+Entries still buffered when a worker dies are lost; the worker flushes on
+normal exit. While running tests, entries are written synchronously with
+the caller cursor.
+"""
+
+import atexit
+import json
+import logging
+import threading
+from collections import defaultdict
+
+from odoo.addons.saas_manager.tools import auto_commit_allowed
+
+_logger = logging.getLogger(__name__)
+
+# Pending entries triggering an immediate flush
+MAX_SIZE = 500
+
+# Seconds between two flushes
+FLUSH_INTERVAL = 5
+
+# Rows per INSERT statement
+INSERT_BATCH = 1000
+
+LOG_COLUMNS = [
+    'session_id', 'instance_id', 'user_id', 'action', 'timestamp',
+    'ip_address', 'user_agent', 'description', 'status', 'error_message',
+    'model_name', 'record_id', 'duration_ms', 'details',
+]
+
+REQUIRED_COLUMNS = ['instance_id', 'user_id', 'action']
+
+
+def _testing():
+    """Whether tests are running (the caller cursor must be used)"""
+    return not auto_commit_allowed()
+
+
+class AccessLogBuffer:
+    """Thread-safe buffer of access logs, flushed in bulk"""
+
+    def __init__(self, max_size=MAX_SIZE, interval=FLUSH_INTERVAL):
+        self.max_size = max_size
+        self.interval = interval
+        self._logs = defaultdict(list)
+        self._accesses = defaultdict(dict)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def add_log(self, cr, vals):
+        """Queue an access.log row (dict of LOG_COLUMNS values)"""
+        missing = [column for column in REQUIRED_COLUMNS if not vals.get(column)]
+        if missing:
+            _logger.warning(f"Access log dropped, missing {', '.join(missing)}: {vals.get('action')}")
+            return
+        row = tuple(vals.get(column) for column in LOG_COLUMNS)
+        if _testing():
+            self._write(cr, [row], {})
+            return
+        with self._lock:
+            self._logs[cr.dbname].append(row)
+            size = len(self._logs[cr.dbname])
+        self._schedule(size)
+
+    def add_session_access(self, cr, session_id, date):
+        """Queue one access of a support session"""
+        if _testing():
+            self._write(cr, [], {session_id: (1, date)})
+            return
+        with self._lock:
+            count, _last = self._accesses[cr.dbname].get(session_id, (0, None))
+            self._accesses[cr.dbname][session_id] = (count + 1, date)
+            size = len(self._accesses[cr.dbname])
+        self._schedule(size)
+
+    def pending(self, dbname):
+        """Number of buffered entries of a database"""
+        with self._lock:
+            return len(self._logs.get(dbname, ())) + len(self._accesses.get(dbname, ()))
+
+    def _schedule(self, size):
+        """Start the flush thread, or wake it up when the buffer is full"""
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(
+                        target=self._run, name='access_log_flush', daemon=True,
+                    )
+                    self._thread.start()
+        if size >= self.max_size:
+            self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                _logger.exception("Access log flush failed")
+
+    def flush(self, dbname=None):
+        """Write the buffered entries (of one database, or of all of them)"""
+        with self._lock:
+            dbnames = [dbname] if dbname else list(set(self._logs) | set(self._accesses))
+            batches = [
+                (name, self._logs.pop(name, []), self._accesses.pop(name, {}))
+                for name in dbnames
+            ]
+
+        for name, logs, accesses in batches:
+            if not logs and not accesses:
+                continue
+            # Imported here: the buffer module must not load the registry
+            from odoo.modules.registry import Registry
+            try:
+                with Registry(name).cursor() as cr:
+                    self._write(cr, logs, accesses)
+            except Exception:
+                _logger.exception(f"Could not write {len(logs)} access logs of database {name}")
+
+    def _write(self, cr, logs, accesses):
+        """Bulk INSERT the logs and increment the session counters"""
+        if accesses:
+            rows = ', '.join(['(%s::int, %s::int, %s::timestamp)'] * len(accesses))
+            params = []
+            for session_id, (count, date) in accesses.items():
+                params += [session_id, count, date]
+            cr.execute(f"""
+                UPDATE support_session AS session
+                   SET access_count = coalesce(session.access_count, 0) + access.count,
+                       accessed_at = greatest(session.accessed_at, access.date)
+                  FROM (VALUES {rows}) AS access(id, count, date)
+                 WHERE session.id = access.id
+            """, params)
+
+        for start in range(0, len(logs), INSERT_BATCH):
+            chunk = logs[start:start + INSERT_BATCH]
+            try:
+                with cr.savepoint():
+                    self._insert_logs(cr, chunk)
+            except Exception as e:
+                # One bad row must not lose the whole chunk
+                _logger.warning(f"Bulk insert of {len(chunk)} access logs failed, inserting one by one: {e}")
+                for row in chunk:
+                    try:
+                        with cr.savepoint():
+                            self._insert_logs(cr, [row])
+                    except Exception as e:
+                        _logger.warning(f"Access log dropped ({row[LOG_COLUMNS.index('action')]}): {e}")
+
+        _logger.debug(f"Flushed {len(logs)} access logs and {len(accesses)} session counters")
+
+    def _insert_logs(self, cr, rows):
+        """INSERT a list of LOG_COLUMNS tuples with one statement"""
+        placeholders = '(' + ', '.join(['%s'] * (len(LOG_COLUMNS) + 2)) + ", now() at time zone 'UTC', now() at time zone 'UTC')"
+        details_index = LOG_COLUMNS.index('details')
+        status_index = LOG_COLUMNS.index('status')
+        params = []
+        for row in rows:
+            row = list(row)
+            if row[details_index] is not None:
+                row[details_index] = json.dumps(row[details_index])
+            row[status_index] = row[status_index] or 'success'
+            params += row + [row[LOG_COLUMNS.index('user_id')], row[LOG_COLUMNS.index('user_id')]]
+        cr.execute(f"""
+            INSERT INTO access_log ({', '.join(LOG_COLUMNS)}, create_uid, write_uid, create_date, write_date)
+            VALUES {', '.join([placeholders] * len(rows))}
+        """, params)
+
+
+access_log_buffer = AccessLogBuffer()
+atexit.register(access_log_buffer.flush)
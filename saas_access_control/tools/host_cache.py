@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+"""
+In-process cache of hostname -> instance id.
+
+The access middleware resolves the request hostname on every tenant page
+load. Entries are kept per database, expire after a TTL and the least
+recently used ones are evicted past the maximum size. Writes to instances
+clear the entries of their database in the current worker; other workers
+pick the change up when the TTL expires. Suspension status is not cached
+here, see saas.suspension._get_suspended_instance_ids().
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+# Maximum number of cached hostnames per worker
+MAXSIZE = 4096
+
+# Seconds a resolution stays valid
+TTL = 60
+
+
+class HostCache:
+    """Thread-safe LRU cache with a time to live"""
+
+    def __init__(self, maxsize=MAXSIZE, ttl=TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, dbname, hostname):
+        """Return the cached instance id (False for unknown hosts) or None"""
+        key = (dbname, hostname)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, dbname, hostname, instance_id):
+        """Cache the resolution of a hostname (False for unknown hosts)"""
+        key = (dbname, hostname)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, instance_id or False)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self, dbname=None):
+        """Drop the entries of a database (all entries if dbname is None)"""
+        with self._lock:
+            if dbname is None:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if key[0] == dbname]:
+                del self._entries[key]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+host_cache = HostCache()
+
+
+def invalidate_host_cache(cr):
+    """Clear the entries of the cursor database now and once committed"""
+    dbname = cr.dbname
+    host_cache.clear(dbname)
+    # A concurrent request may cache the old state before the commit
+    cr.postcommit.add(lambda: host_cache.clear(dbname))
@@ -3,7 +3,7 @@
 
 {
     'name': 'SaaS Manager',
-    'version': '18.0.1.0.0',
+    'version': '18.0.1.1.0',
     'category': 'Administration',
     'summary': 'Multi-DB SaaS management with ultra-fast provisioning',
     'description': '''
@@ -58,10 +58,12 @@
         
         # Views
         'views/saas_server_views.xml',
+        'views/saas_server_metric_views.xml',
         'views/saas_template_views.xml',
         'views/saas_plan_views.xml',
         'views/saas_instance_views.xml',
         'views/saas_subscription_views.xml',
+        'views/saas_provisioning_job_views.xml',
         #'views/saas_dashboard_views.xml',
         'views/saas_menu.xml',
     ],
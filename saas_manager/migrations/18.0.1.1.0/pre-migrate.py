@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+"""
+Recalculer les domaines en minuscules avant la création de l'index unique.
+Recompute lowercase domains before the unique index is created.
+
+Subdomains are lowercased too. Subdomains only differing by case would share
+a hostname: the most recent ones are renamed '<subdomain>-<id>' and reported.
+"""
+
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    if not version:
+        return
+
+    cr.execute("""
+        UPDATE saas_instance instance
+           SET subdomain = lower(instance.subdomain) || '-' || instance.id
+         WHERE EXISTS (SELECT 1 FROM saas_instance other
+                        WHERE lower(other.subdomain) = lower(instance.subdomain)
+                          AND other.id < instance.id)
+     RETURNING instance.id, instance.subdomain
+    """)
+    for instance_id, subdomain in cr.fetchall():
+        _logger.warning(
+            f"SaaS instance {instance_id} renamed to subdomain '{subdomain}': "
+            f"its subdomain only differed by case from another instance"
+        )
+
+    cr.execute("UPDATE saas_instance SET subdomain = lower(subdomain) WHERE subdomain != lower(subdomain)")
+
+    cr.execute("SELECT value FROM ir_config_parameter WHERE key = 'saas.base_domain'")
+    row = cr.fetchone()
+    base_domain = row[0] if row else 'example.com'
+
+    cr.execute("""
+        UPDATE saas_instance
+           SET domain = CASE WHEN subdomain IS NULL THEN NULL
+                             ELSE lower(subdomain || '.' || %s) END
+    """, [base_domain])
+    _logger.info(f"Recomputed the domain of {cr.rowcount} SaaS instances")
+
+    cr.execute("""
+        SELECT domain FROM saas_instance
+         WHERE domain IS NOT NULL
+         GROUP BY domain
+        HAVING count(*) > 1
+    """)
+    duplicates = [domain for domain, in cr.fetchall()]
+    if duplicates:
+        # Without the unique index, a hostname would silently resolve to one of them
+        raise ValueError(
+            f"Duplicate SaaS instance domains prevent the unique index, "
+            f"fix them before upgrading: {', '.join(duplicates)}"
+        )
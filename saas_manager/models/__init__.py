@@ -2,8 +2,11 @@
 # Part of Odoo. See LICENSE file for full copyright and licensing details.
 
 from . import saas_template
+from . import saas_template_spare
 from . import saas_server
+from . import saas_server_metric
 from . import saas_plan
 from . import saas_instance
 from . import saas_subscription
+from . import saas_provisioning_job
 from . import res_partner
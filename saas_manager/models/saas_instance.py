@@ -11,13 +11,109 @@ Client instance with automated provisioning.
 import logging
 import secrets
 import string
+import time
+import psycopg2
 import requests
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime, timedelta
+from urllib.parse import parse_qs, urlparse
 from odoo import api, fields, models, _
 from odoo.exceptions import UserError, ValidationError
+from .saas_provisioning_job import PROVISIONING_STEPS
+from ..tools.misc import auto_commit_allowed
+from ..tools.rpc_client import RpcError
 
 _logger = logging.getLogger(__name__)
 
+# Timeout of each instance probe (HTTP and database), in seconds
+MONITOR_TIMEOUT = 10
+
+
+def _probe_instance(url, database_name, pg_params, verify=True, timeout=MONITOR_TIMEOUT):
+    """
+    Sonder une instance : page de connexion HTTP et base de données.
+    Probe an instance: HTTP login page and database.
+
+    Plain function (no ORM access), run in worker threads.
+
+    The login page is requested on the tenant hostname, so the server
+    dbfilter selects the tenant database as it does for users. Redirects
+    are followed (ensure_db answers 303 to pin the database); the instance
+    is healthy when they end on a 200 login page of the same host and
+    database, not on the database selector. Each probe uses its own
+    request without a cookie jar shared with other tenants or threads.
+
+    Args:
+        url (str): Tenant base URL (protocol and domain)
+        database_name (str): Tenant database name
+        pg_params (dict): PostgreSQL connection parameters of the server
+        verify (bool): Verify the TLS certificate
+
+    Returns:
+        dict: 'healthy', 'http_status', 'latency_ms', 'db_latency_ms'
+            and 'message' (failure reasons)
+    """
+    probe = {'http_status': 0, 'latency_ms': 0.0, 'db_latency_ms': 0.0}
+    errors = []
+
+    start = time.monotonic()
+    try:
+        response = requests.get(f"{url}/web/login", timeout=timeout, allow_redirects=True, verify=verify)
+        probe['latency_ms'] = (time.monotonic() - start) * 1000
+        probe['http_status'] = response.status_code
+        landed = urlparse(response.url)
+        landed_db = parse_qs(landed.query).get('db', [database_name])[0]
+        if response.status_code != 200:
+            errors.append(f"HTTP {response.status_code}")
+        elif landed.hostname != urlparse(url).hostname or landed_db != database_name:
+            errors.append(f"Redirected to {response.url}")
+        elif landed.path.startswith('/web/database'):
+            errors.append("Database not served (redirected to the database manager)")
+    except requests.exceptions.RequestException as e:
+        errors.append(f"HTTP error: {str(e)}")
+
+    start = time.monotonic()
+    try:
+        connection = psycopg2.connect(dbname=database_name, connect_timeout=timeout, **pg_params)
+        try:
+            with connection.cursor() as cr:
+                cr.execute("SELECT 1")
+            probe['db_latency_ms'] = (time.monotonic() - start) * 1000
+        finally:
+            connection.close()
+    except psycopg2.Error as e:
+        errors.append(f"Database error: {str(e).strip()}")
+
+    probe['healthy'] = not errors
+    probe['message'] = '; '.join(errors)
+    return probe
+
+
+def _probe_instance_lane(pg_params, verify, pending, results, deadline_at):
+    """
+    Sonder à la suite les instances en attente d'un serveur.
+    Probe the pending instances of a server one after the other.
+
+    A server gets a few lanes sharing its queue of pending instances, so
+    the number of lanes bounds the concurrent probes on that server. A
+    lane stops taking instances once the deadline is reached.
+
+    Args:
+        pending (deque): (instance id, database name, tenant URL) still to probe
+        results (dict): Instance id -> probe, filled in place
+        deadline_at (float): time.monotonic() value after which to stop
+    """
+    while time.monotonic() < deadline_at:
+        try:
+            instance_id, database_name, url = pending.popleft()
+        except IndexError:
+            return
+        try:
+            results[instance_id] = _probe_instance(url, database_name, pg_params, verify)
+        except Exception as e:
+            results[instance_id] = {'healthy': False, 'message': str(e)}
+
 
 class SaaSInstance(models.Model):
     """
@@ -65,7 +161,8 @@ class SaaSInstance(models.Model):
         string='Full Domain',
         compute='_compute_domain',
         store=True,
-        help="Full domain (e.g., 'client1.example.com')"
+        help="Full domain (e.g., 'client1.example.com'), lowercase; "
+             "unique index used to resolve request hostnames"
     )
     protocol = fields.Selection([
         ('http', 'HTTP'),
@@ -93,8 +190,9 @@ class SaaSInstance(models.Model):
         string='Server',
         required=True,
         tracking=True,
+        index=True,
         ondelete='restrict',
-        domain="[('state', '=', 'active'), ('available_capacity', '>', 0)]",
+        domain="[('state', 'in', ['active', 'degraded']), ('available_capacity', '>', 0)]",
         default=lambda self: self._get_default_server(),
         help="Server hosting this instance"
     )
@@ -118,13 +216,62 @@ class SaaSInstance(models.Model):
     )
     current_users = fields.Integer(
         string='Current Users',
-        compute='_compute_current_users',
-        help="Number of active users"
+        readonly=True,
+        help="Number of active internal users, collected by the user limits cron"
+    )
+    current_users_date = fields.Datetime(
+        string='Users Counted On',
+        readonly=True,
+        help="Date of the last user count"
+    )
+    user_limit_exceeded = fields.Boolean(
+        string='User Limit Exceeded',
+        readonly=True,
+        copy=False,
+        help="Set when the last user count exceeded the plan user limit"
     )
     storage_used = fields.Float(
         string='Storage Used (GB)',
-        compute='_compute_storage_used',
-        help="Storage used in GB"
+        readonly=True,
+        help="Storage used in GB (database and filestore), collected by the storage cron"
+    )
+    storage_used_date = fields.Datetime(
+        string='Storage Measured On',
+        readonly=True,
+        help="Date of the last storage measure"
+    )
+    health_state = fields.Selection([
+        ('unknown', 'Unknown'),
+        ('healthy', 'Healthy'),
+        ('unhealthy', 'Unhealthy'),
+    ], string='Health', default='unknown', readonly=True, copy=False,
+        help="Result of the last monitoring probe")
+    health_http_status = fields.Integer(
+        string='HTTP Status',
+        readonly=True,
+        copy=False,
+        help="HTTP status of the login page at the last probe (0 if unreachable)"
+    )
+    health_latency_ms = fields.Float(
+        string='HTTP Latency (ms)',
+        readonly=True,
+        copy=False
+    )
+    health_db_latency_ms = fields.Float(
+        string='Database Latency (ms)',
+        readonly=True,
+        copy=False
+    )
+    health_message = fields.Char(
+        string='Health Issue',
+        readonly=True,
+        copy=False,
+        help="Failure reasons of the last probe"
+    )
+    health_check_date = fields.Datetime(
+        string='Last Health Check',
+        readonly=True,
+        copy=False
     )
     activation_date = fields.Datetime(
         string='Activation Date',
@@ -158,10 +305,48 @@ class SaaSInstance(models.Model):
         string='Color Index',
         help="Color for kanban view"
     )
+    provisioning_job_ids = fields.One2many(
+        'saas.provisioning.job',
+        'instance_id',
+        string='Provisioning Jobs',
+        help="Background provisioning jobs of this instance"
+    )
+    provisioning_job_id = fields.Many2one(
+        'saas.provisioning.job',
+        string='Last Provisioning Job',
+        compute='_compute_provisioning_job',
+        help="Most recent provisioning job"
+    )
+    from_warm_pool = fields.Boolean(
+        string='From Warm Pool',
+        readonly=True,
+        copy=False,
+        help="Database was taken from the template warm pool instead of being cloned"
+    )
+    provisioning_checkpoint = fields.Selection(
+        selection=[(code, label) for code, label, _method in PROVISIONING_STEPS],
+        string='Last Completed Step',
+        readonly=True,
+        copy=False,
+        help="Last provisioning step completed; a retry resumes after it"
+    )
+    provisioning_step = fields.Selection(
+        related='provisioning_job_id.step',
+        string='Provisioning Step'
+    )
+    provisioning_progress = fields.Integer(
+        related='provisioning_job_id.progress',
+        string='Provisioning Progress'
+    )
+    provisioning_job_state = fields.Selection(
+        related='provisioning_job_id.state',
+        string='Provisioning Job State'
+    )
 
     _sql_constraints = [
         ('database_name_unique', 'UNIQUE(database_name)', 'Database name must be unique!'),
         ('subdomain_unique', 'UNIQUE(subdomain)', 'Subdomain must be unique!'),
+        ('domain_unique', 'UNIQUE(domain)', 'Domain must be unique!'),
     ]
 
     @api.depends('subdomain')
@@ -169,16 +354,27 @@ class SaaSInstance(models.Model):
         """
         Calcule le domaine complet depuis le sous-domaine.
         Compute full domain from subdomain.
+
+        Stored lowercase so that hostnames are resolved by exact match.
         """
         base_domain = self.env['ir.config_parameter'].sudo().get_param(
             'saas.base_domain', 'example.com'
         )
         for instance in self:
             if instance.subdomain:
-                instance.domain = f"{instance.subdomain}.{base_domain}"
+                instance.domain = f"{instance.subdomain}.{base_domain}".lower()
             else:
                 instance.domain = False
 
+    @api.depends('provisioning_job_ids')
+    def _compute_provisioning_job(self):
+        """
+        Récupère le dernier job de provisioning.
+        Get the most recent provisioning job.
+        """
+        for instance in self:
+            instance.provisioning_job_id = instance.provisioning_job_ids[:1]
+
     def _get_default_server(self):
         """
         Obtenir le serveur par défaut avec le plus de capacité disponible.
@@ -188,30 +384,64 @@ class SaaSInstance(models.Model):
         try:
             return Server.get_available_server(min_capacity_percent=10)
         except UserError:
-            # If no server with 10% capacity, try to get any active server
-            return Server.search([('state', '=', 'active')], limit=1)
+            # If no server with 10% capacity, try to get any server in service
+            return Server.search([('state', 'in', ['active', 'degraded'])], limit=1)
 
-    def _compute_current_users(self):
+    @api.onchange('plan_id', 'template_id')
+    def _onchange_placement(self):
         """
-        Calcule le nombre d'utilisateurs actifs.
-        Compute number of active users.
-        
-        TODO Phase 2: Connect to instance database and count users
+        Choisir le serveur selon le plan et le template.
+        Pick the server according to the plan and template.
         """
-        for instance in self:
-            # Placeholder - TODO Phase 2: Query instance database
-            instance.current_users = 0
+        if self.state != 'draft' or not self.plan_id:
+            return
+        try:
+            self.server_id = self.env['saas.server'].get_available_server(
+                min_capacity_percent=10,
+                plan=self.plan_id,
+                template=self.template_id,
+            )
+        except UserError:
+            # Keep the current server; provisioning validates it
+            pass
 
-    def _compute_storage_used(self):
+    def _store_collected_values(self, values, fname, date_fname):
         """
-        Calcule l'espace disque utilisé.
-        Compute storage used.
-        
-        TODO Phase 2: Query PostgreSQL database size
+        Enregistrer des mesures collectées en une seule requête.
+        Store collected measures in a single statement.
+
+        Args:
+            values (dict): Instance id -> value
+            fname (str): Column receiving the value
+            date_fname (str): Column receiving the collection date
         """
-        for instance in self:
-            # Placeholder - TODO Phase 2: Query database size
-            instance.storage_used = 0.0
+        if not values:
+            return
+        now = fields.Datetime.now()
+        rows = ', '.join(['(%s, %s)'] * len(values))
+        params = [now]
+        for instance_id, value in values.items():
+            params += [instance_id, value]
+        self.env.cr.execute(f"""
+            UPDATE saas_instance AS instance
+               SET {fname} = collected.value, {date_fname} = %s
+              FROM (VALUES {rows}) AS collected(id, value)
+             WHERE instance.id = collected.id
+        """, params)
+        self.browse(list(values)).invalidate_recordset([fname, date_fname])
+
+    def get_rpc_client(self):
+        """
+        Obtenir le client RPC du serveur hébergeant l'instance.
+        Get the RPC client of the server hosting the instance.
+
+        Returns:
+            OdooRpcClient: Pooled client of the instance server
+        """
+        self.ensure_one()
+        if not self.server_id:
+            raise UserError(_("Instance '%s' has no server assigned.") % self.name)
+        return self.server_id.get_rpc_client()
 
     @api.model
     def _generate_random_password(self, length=16):
@@ -252,14 +482,19 @@ class SaaSInstance(models.Model):
         Provisionner l'instance complète (orchestration).
         Provision the complete instance (orchestration).
         
-        Workflow:
-        1. Valider les prérequis
-        2. Cloner la base de données template
-        3. Neutraliser les données sensibles
-        4. Personnaliser l'instance
-        5. Créer l'administrateur client
-        6. Configurer le sous-domaine
-        7. Activer l'instance
+        Valide les prérequis puis place un job dans la file de provisioning.
+        Les étapes sont exécutées hors de la requête par le pool de workers.
+
+        Validates prerequisites then enqueues a provisioning job. Steps run
+        outside the request in the worker pool (see saas.provisioning.job):
+
+        1. Cloner la base de données template
+        2. Neutraliser les données sensibles
+        3. Personnaliser l'instance
+        4. Créer l'administrateur client
+        5. Configurer le sous-domaine
+        6. Activer l'instance
+        7. Envoyer l'email de provisioning
         """
         self.ensure_one()
         
@@ -269,8 +504,8 @@ class SaaSInstance(models.Model):
         if not self.template_id.is_template_ready:
             raise UserError(_('Template %s is not ready for cloning.') % self.template_id.name)
         
-        # Validate server state
-        if self.server_id.state != 'active':
+        # Validate server state (degraded servers are still reachable)
+        if self.server_id.state not in ('active', 'degraded'):
             raise UserError(
                 _("Cannot provision instance on server '%s'.\n\n"
                   "Server state is '%s'. Server must be 'active' to provision instances.\n\n"
@@ -285,54 +520,79 @@ class SaaSInstance(models.Model):
                   "Please select a different server or increase max instances on this server.") % (self.server_id.name, self.server_id.available_capacity)
             )
         
-        try:
-            # Update state to provisioning
-            self.write({'state': 'provisioning'})
-            self.env.cr.commit()  # Commit state change
-            
-            _logger.info(f"Starting provisioning for instance: {self.name}")
-            
-            # Step 1: Clone template database (~5s)
-            self._clone_template_database()
-            
-            # Step 2: Neutralize sensitive data (~2s)
-            self._neutralize_database()
-            
-            # Step 3: Customize instance (~2s)
-            self._customize_instance()
-            
-            # Step 4: Create client admin (~1s)
-            self._create_client_admin()
-            
-            # Step 5: Configure subdomain (~1s)
-            self._configure_subdomain()
-            
-            # Step 6: Activate instance
-            self.write({
-                'state': 'active',
-                'activation_date': fields.Datetime.now(),
-            })
-            
-            _logger.info(f"Instance {self.name} provisioned successfully")
-            
-            # Step 7: Send provisioning email to customer
-            self._send_provisioning_email()
+        self.write({'state': 'provisioning'})
+        job = self.env['saas.provisioning.job'].create({
+            'instance_id': self.id,
+        })
+        job._trigger_worker()
 
-            return {
-                'type': 'ir.actions.client',
-                'tag': 'display_notification',
-                'params': {
-                    'title': _('Instance Provisioned'),
-                    'message': _('Instance %s is now active at %s') % (self.name, self.domain),
-                    'type': 'success',
-                    'sticky': False,
-                }
+        _logger.info(f"Provisioning job {job.name} queued for instance: {self.name}")
+
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Provisioning Queued'),
+                'message': _('Instance %s is being provisioned in the background (%s)') % (self.name, job.name),
+                'type': 'info',
+                'sticky': False,
+                'next': {'type': 'ir.actions.client', 'tag': 'soft_reload'},
             }
-            
-        except Exception as e:
-            _logger.error(f"Provisioning failed for {self.name}: {str(e)}")
-            self.write({'state': 'draft'})
-            raise UserError(_('Provisioning failed: %s') % str(e))
+        }
+
+    def action_retry_provisioning(self):
+        """
+        Relancer un provisioning échoué depuis son dernier checkpoint.
+        Retry a failed provisioning from its last checkpoint.
+
+        Completed steps (e.g. the cloned database) are kept: the new job
+        resumes right after the last completed step. Steps running after
+        the activation (e.g. the provisioning email) can be retried on an
+        active instance.
+        """
+        self.ensure_one()
+
+        if self.state != 'provisioning' and self.provisioning_job_id.state != 'failed':
+            raise UserError(_('Only instances being provisioned or with a failed provisioning job can be retried.'))
+
+        if self.provisioning_job_ids.filtered(lambda job: job.state in ('queued', 'running')):
+            raise UserError(_('A provisioning job is already queued or running for this instance.'))
+
+        job = self.env['saas.provisioning.job'].create({
+            'instance_id': self.id,
+        })
+        job._trigger_worker()
+
+        _logger.info(
+            f"Provisioning job {job.name} queued for instance {self.name}, "
+            f"resuming after step '{self.provisioning_checkpoint or 'none'}'"
+        )
+
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Provisioning Retried'),
+                'message': _('Provisioning of %s resumes in the background (%s)') % (self.name, job.name),
+                'type': 'info',
+                'sticky': False,
+                'next': {'type': 'ir.actions.client', 'tag': 'soft_reload'},
+            }
+        }
+
+    def _activate_provisioned_instance(self):
+        """
+        Activer l'instance à la fin du provisioning.
+        Activate the instance at the end of provisioning.
+        """
+        self.ensure_one()
+
+        self.write({
+            'state': 'active',
+            'activation_date': fields.Datetime.now(),
+        })
+
+        _logger.info(f"Instance {self.name} provisioned successfully")
 
     def _clone_template_database(self):
         """
@@ -377,61 +637,47 @@ class SaaSInstance(models.Model):
                   )
             )
         
-        _logger.info(f"Cloning template {self.template_id.template_db} to {self.database_name} on server {self.server_id.name}")
+        template = self.template_id
+
+        # Take a pre-cloned spare database when the warm pool has one
+        if template.pool_size:
+            spare = self.env['saas.template.spare']._claim_spare(template)
+            template._record_pool_lookup(hit=bool(spare))
+            if spare:
+                _logger.info(f"Warm pool hit: using spare {spare.name} for {self.database_name}")
+                spare._assign_to_instance(self)
+                self.write({'from_warm_pool': True})
+                return
+            _logger.info(f"Warm pool miss for template {template.name}")
+
+        _logger.info(f"Cloning template {template.template_db} to {self.database_name} on server {self.server_id.name}")
         
         # Call template's clone method which uses server's DB configuration
-        self.template_id.clone_template_db(self.database_name)
+        template.clone_template_db(self.database_name)
 
     def _neutralize_database(self):
         """
         Neutraliser les données sensibles du template cloné.
         Neutralize sensitive data from cloned template.
-        
-        TODO Phase 2: Implement with odoorpc
-        
-        Example implementation:
-            import odoorpc
-            
-            # Connect to instance database
-            odoo = odoorpc.ODOO(
-                host=config.get('odoo_host'),
-                port=config.get('odoo_port'),
-                protocol='jsonrpc+ssl'
-            )
-            
-            # Login as superuser
-            odoo.login(self.database_name, 'admin', 'admin')
-            
-            # Neutralize data
-            User = odoo.env['res.users']
-            Partner = odoo.env['res.partner']
-            Company = odoo.env['res.company']
-            
-            # Reset admin password
-            admin_user = User.browse(2)
-            User.write([admin_user], {'password': 'admin'})
-            
-            # Clear sensitive company data
-            companies = Company.search([])
-            Company.write(companies, {
-                'vat': False,
-                'company_registry': False,
-                'email': False,
-                'phone': False,
-            })
-            
-            # Anonymize demo users
-            demo_users = User.search([('id', '>', 2)])
-            for user_id in demo_users:
-                User.write([user_id], {
-                    'email': f'demo.user{user_id}@example.com',
-                    'password': 'demo',
-                })
-            
-            _logger.info(f"Database {self.database_name} neutralized")
+
+        Company identity, template user emails and API keys are scrubbed
+        directly in PostgreSQL (see saas.server._pg_neutralize_database).
+        Databases taken from the warm pool were neutralized when the spare
+        was built.
         """
-        _logger.info(f"TODO Phase 2: Neutralize database {self.database_name}")
-        # Placeholder - actual implementation in Phase 2
+        self.ensure_one()
+
+        if self.from_warm_pool:
+            _logger.info(f"Database {self.database_name} comes from the warm pool, already neutralized")
+            return
+
+        try:
+            self.server_id._pg_neutralize_database(self.database_name)
+        except psycopg2.Error as e:
+            _logger.exception(f"PostgreSQL error while neutralizing {self.database_name}")
+            raise UserError(
+                _("Failed to neutralize the database %s.\n\nError: %s") % (self.database_name, str(e))
+            )
 
     def _customize_instance(self):
         """
@@ -494,50 +740,27 @@ class SaaSInstance(models.Model):
 
             # First, use admin/admin to update the admin user
             # We'll call execute_kw to update res.users with ID 2
-            payload = {
-                'jsonrpc': '2.0',
-                'method': 'call',
-                'params': {
-                    'service': 'object',
-                    'method': 'execute_kw',
-                    'args': [
-                        self.database_name,      # database name
-                        2,                        # admin user ID
-                        'admin',                  # current admin password
-                        'res.users',             # model
-                        'write',                 # method
-                        [[2], {                  # write args: [IDs], {values}
-                            'name': self.partner_id.name,
-                            'login': admin_login,
-                            'password': admin_password,
-                            'email': self.partner_id.email or admin_login,
-                        }]
-                    ]
-                },
-                'id': 1
-            }
-
             _logger.info(f"Updating admin user via RPC: {rpc_url}")
 
-            response = requests.post(
-                rpc_url,
-                json=payload,
-                timeout=30,
-                verify=False
-            )
-
-            response.raise_for_status()
-            result = response.json()
-
-            # Check for RPC errors
-            if 'error' in result and result['error']:
-                error_data = result['error'].get('data', {})
-                error_msg = error_data.get('message', str(result['error']))
-                _logger.error(f"Failed to update admin user: {error_msg}")
-                # Don't raise error, just log warning and continue
-                _logger.warning(f"Admin user configuration may not be complete: {error_msg}")
-            else:
+            try:
+                self.get_rpc_client().execute_kw(
+                    self.database_name,      # database name
+                    2,                        # admin user ID
+                    'admin',                  # current admin password
+                    'res.users',             # model
+                    'write',                 # method
+                    [[2], {                  # write args: [IDs], {values}
+                        'name': self.partner_id.name,
+                        'login': admin_login,
+                        'password': admin_password,
+                        'email': self.partner_id.email or admin_login,
+                    }]
+                )
                 _logger.info(f"Admin user updated successfully for {self.database_name}")
+            except RpcError as e:
+                _logger.error(f"Failed to update admin user: {str(e)}")
+                # Don't raise error, just log warning and continue
+                _logger.warning(f"Admin user configuration may not be complete: {str(e)}")
 
             # Store the credentials
             self.write({
@@ -972,48 +1195,23 @@ class SaaSInstance(models.Model):
             _logger.info(f"Deleting database {self.database_name} on server {server.name}")
             _logger.info(f"Using server URL: {base_url}")
 
-            # Endpoint for database operations
-            rpc_url = f"{base_url}/jsonrpc"
-
-            # Payload for dropping the database
-            payload = {
-                'jsonrpc': '2.0',
-                'method': 'call',
-                'params': {
-                    'service': 'db',
-                    'method': 'drop',
-                    'args': [
-                        master_password,        # master password
-                        self.database_name,     # database name to drop
-                    ]
-                },
-                'id': 1
-            }
-
             _logger.info(f"Dropping database via RPC: {self.database_name}")
 
-            # Make RPC call
-            response = requests.post(
-                rpc_url,
-                json=payload,
+            server.get_rpc_client().call(
+                'db', 'drop',
+                master_password,        # master password
+                self.database_name,     # database name to drop
                 timeout=300  # Allow up to 5 minutes for database deletion
             )
 
-            response.raise_for_status()
-            result = response.json()
-
-            # Check for RPC errors
-            if 'error' in result and result['error']:
-                error_data = result['error'].get('data', {})
-                error_msg = error_data.get('message', str(result['error']))
-                _logger.warning(f"RPC Error: {error_msg}")
-                raise UserError(
-                    _("Failed to delete database via RPC.\n\nError: %s") % error_msg
-                )
-
             _logger.info(f"Database {self.database_name} deleted successfully")
             return True
 
+        except RpcError as e:
+            _logger.warning(f"RPC Error: {str(e)}")
+            raise UserError(
+                _("Failed to delete database via RPC.\n\nError: %s") % str(e)
+            )
         except requests.exceptions.Timeout:
             _logger.error(f"Database deletion timed out for {self.database_name}")
             raise UserError(
@@ -1061,69 +1259,234 @@ class SaaSInstance(models.Model):
         """
         CRON: Vérifier les abonnements expirés et suspendre les instances.
         CRON: Check expired subscriptions and suspend instances.
+
+        Les instances sont expirées par lots, avec un commit par lot.
+
+        Instances are expired in chunks of saas.expiry_batch_size: one write
+        per chunk, expiration emails queued (sent by the mail queue cron),
+        and a commit per chunk so that a crash does not redo finished work.
+        A chunk failing as a whole is retried record by record.
         """
         _logger.info("Running subscription expiry check...")
-        
-        # Find instances with expired subscriptions
-        expired_instances = self.search([
-            ('state', '=', 'active'),
-            ('expiration_date', '<=', fields.Datetime.now()),
-        ])
-        
-        for instance in expired_instances:
+
+        batch_size = int(self.env['ir.config_parameter'].sudo().get_param('saas.expiry_batch_size', 500))
+        auto_commit = auto_commit_allowed()
+        now = fields.Datetime.now()
+        expired_count = 0
+        failed_ids = []
+
+        while True:
+            # Find instances with expired subscriptions
+            chunk = self.search([
+                ('state', '=', 'active'),
+                ('expiration_date', '<=', now),
+                ('id', 'not in', failed_ids),
+            ], limit=batch_size, order='id')
+            if not chunk:
+                break
+
             try:
-                instance.write({'state': 'expired'})
-                _logger.info(f"Instance {instance.name} marked as expired")
-                
-                # TODO Phase 2: Send expiration email
-                
+                with self.env.cr.savepoint():
+                    chunk.write({'state': 'expired'})
+                    chunk._queue_expiration_emails()
+                expired_count += len(chunk)
             except Exception as e:
-                _logger.error(f"Failed to expire instance {instance.name}: {str(e)}")
+                _logger.error(f"Failed to expire a chunk of {len(chunk)} instances, retrying one by one: {str(e)}")
+                for instance in chunk:
+                    try:
+                        with self.env.cr.savepoint():
+                            instance.write({'state': 'expired'})
+                            instance._queue_expiration_emails()
+                        expired_count += 1
+                    except Exception as e:
+                        _logger.error(f"Failed to expire instance {instance.name}: {str(e)}")
+                        failed_ids.append(instance.id)
+
+            if auto_commit:
+                self.env.cr.commit()
+
+        _logger.info(f"Subscription expiry check done: {expired_count} instances expired")
+
+    def _queue_expiration_emails(self):
+        """
+        Mettre en file les emails d'expiration (envoi asynchrone).
+        Queue expiration emails (sent asynchronously by the mail queue).
+        """
+        template = self.env.ref('saas_manager.mail_template_instance_expired', raise_if_not_found=False)
+        if not template:
+            _logger.warning(
+                "Email template 'saas_manager.mail_template_instance_expired' "
+                "not found. Skipping expiration emails"
+            )
+            return
+
+        recipients = self.filtered(lambda instance: instance.partner_id.email)
+        if recipients:
+            template.send_mail_batch(recipients.ids, force_send=False, raise_exception=False)
 
     @api.model
     def cron_monitor_instances(self):
         """
-        CRON: Monitorer les instances (usage, santé).
-        CRON: Monitor instances (usage, health).
-        
-        TODO Phase 2: Implement monitoring
+        CRON: Monitorer les instances (santé HTTP et base de données).
+        CRON: Monitor instances (HTTP and database health).
+
+        Les instances sont sondées en parallèle, avec un nombre limité de
+        sondes simultanées par serveur.
+
+        Active instances are probed concurrently: each server gets at most
+        saas.monitor_workers_per_server lanes, all lanes share a pool of
+        saas.monitor_workers threads, and no probe starts after
+        saas.monitor_deadline seconds. Instances of servers that are not in
+        service are left to the server health check. Results are written
+        in batch and newly unhealthy instances are flagged in their chatter.
         """
         _logger.info("Running instance monitoring...")
-        
-        active_instances = self.search([('state', '=', 'active')])
-        
+
+        active_instances = self.search([
+            ('state', '=', 'active'),
+            ('server_id.state', 'in', ['active', 'degraded']),
+        ])
+        if not active_instances:
+            return
+
+        params = self.env['ir.config_parameter'].sudo()
+        max_workers = int(params.get_param('saas.monitor_workers', 16))
+        per_server = max(1, int(params.get_param('saas.monitor_workers_per_server', 4)))
+        deadline = float(params.get_param('saas.monitor_deadline', 300))
+
+        # Probe arguments are read here: worker threads must not touch the ORM
+        instances_by_server = defaultdict(list)
         for instance in active_instances:
-            try:
-                # TODO Phase 2: Check database health, disk usage, etc.
-                _logger.debug(f"Monitoring instance {instance.name}")
-                
-            except Exception as e:
-                _logger.error(f"Monitoring failed for {instance.name}: {str(e)}")
+            instances_by_server[instance.server_id].append(
+                (instance.id, instance.database_name, f"{instance.protocol}://{instance.domain}")
+            )
+
+        lanes = []
+        for server, server_instances in instances_by_server.items():
+            pending = deque(server_instances)
+            pg_params = server._get_pg_params()
+            lanes += [(pg_params, server.rpc_verify_ssl, pending)] * min(per_server, len(pending))
+
+        results = {}
+        deadline_at = time.monotonic() + deadline
+        executor = ThreadPoolExecutor(
+            max_workers=max(1, min(max_workers, len(lanes))),
+            thread_name_prefix='saas_monitor',
+        )
+        try:
+            futures = [
+                executor.submit(_probe_instance_lane, pg_params, verify, pending, results, deadline_at)
+                for pg_params, verify, pending in lanes
+            ]
+            # Let the probes started before the deadline finish
+            wait(futures, timeout=deadline + MONITOR_TIMEOUT * 2)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        results = dict(results)
+        skipped = len(active_instances) - len(results)
+        if skipped:
+            _logger.warning(f"Instance monitoring deadline reached: {skipped} instances not probed")
+
+        self.browse(list(results))._apply_monitoring_results(results)
+        _logger.info(
+            f"Instance monitoring done: {sum(probe['healthy'] for probe in results.values())}/{len(results)} instances healthy"
+        )
+
+    def _apply_monitoring_results(self, results):
+        """
+        Enregistrer les résultats des sondes et signaler les instances en échec.
+        Store probe results and flag failing instances.
+
+        Args:
+            results (dict): Instance id -> probe (see _probe_instance)
+        """
+        if not results:
+            return
+        previous = {instance.id: instance.health_state for instance in self}
+
+        rows = ', '.join(['(%s::int, %s::varchar, %s::int, %s::float8, %s::float8, %s::varchar)'] * len(results))
+        params = [fields.Datetime.now()]
+        for instance_id, probe in results.items():
+            params += [
+                instance_id,
+                'healthy' if probe['healthy'] else 'unhealthy',
+                probe.get('http_status') or 0,
+                probe.get('latency_ms') or 0.0,
+                probe.get('db_latency_ms') or 0.0,
+                probe.get('message') or None,
+            ]
+        self.env.cr.execute(f"""
+            UPDATE saas_instance AS instance
+               SET health_check_date = %s,
+                   health_state = probe.state,
+                   health_http_status = probe.http_status,
+                   health_latency_ms = probe.latency_ms,
+                   health_db_latency_ms = probe.db_latency_ms,
+                   health_message = probe.message
+              FROM (VALUES {rows}) AS probe(id, state, http_status, latency_ms, db_latency_ms, message)
+             WHERE instance.id = probe.id
+        """, params)
+        self.invalidate_recordset([
+            'health_check_date', 'health_state', 'health_http_status',
+            'health_latency_ms', 'health_db_latency_ms', 'health_message',
+        ])
+
+        # Only state changes are posted, not every failed probe
+        for instance in self:
+            if instance.health_state == previous[instance.id]:
+                continue
+            if instance.health_state == 'unhealthy':
+                _logger.warning(f"Instance {instance.name} is unhealthy: {instance.health_message}")
+                instance.message_post(
+                    body=_("Instance health check failed: %s") % instance.health_message
+                )
+            elif previous[instance.id] == 'unhealthy':
+                _logger.info(f"Instance {instance.name} recovered")
+                instance.message_post(
+                    body=_("Instance health check succeeded again.")
+                )
 
     @api.model
     def cron_check_user_limits(self):
         """
         CRON: Vérifier les limites d'utilisateurs et alerter.
         CRON: Check user limits and alert.
-        
-        TODO Phase 2: Implement limit checking
+
+        Counts the users of every instance, one server at a time, then
+        posts an alert on instances going above their plan user limit.
         """
         _logger.info("Running user limit check...")
-        
+
         active_instances = self.search([('state', '=', 'active')])
-        
-        for instance in active_instances:
+
+        for server in active_instances.server_id:
             try:
-                # TODO Phase 2: Query instance database for user count
-                # Compare with plan.user_limit
-                # Send alert if limit exceeded
-                pass
-                
+                server._collect_instance_users()
             except Exception as e:
-                _logger.error(f"Limit check failed for {instance.name}: {str(e)}")
+                _logger.error(f"User count collection failed on server {server.name}: {str(e)}")
 
-    @api.model
-    def create(self, vals):
+        counted = active_instances.filtered('current_users_date')
+        over_limit = counted.filtered(lambda instance: instance.current_users > instance.plan_id.user_limit)
+
+        # Alert only when an instance goes over its limit, not on every run
+        newly_over = over_limit.filtered(lambda instance: not instance.user_limit_exceeded)
+        for instance in newly_over:
+            _logger.warning(
+                f"Instance {instance.name} exceeds its user limit: "
+                f"{instance.current_users}/{instance.plan_id.user_limit}"
+            )
+            instance.message_post(
+                body=_("User limit exceeded: %(users)s active users for a limit of %(limit)s (plan %(plan)s).",
+                       users=instance.current_users,
+                       limit=instance.plan_id.user_limit,
+                       plan=instance.plan_id.name),
+            )
+        newly_over.write({'user_limit_exceeded': True})
+        (counted - over_limit).filtered('user_limit_exceeded').write({'user_limit_exceeded': False})
+
+    @api.model_create_multi
+    def create(self, vals_list):
         """
         Créer une nouvelle instance SaaS.
         Create a new SaaS instance.
@@ -1131,14 +1494,71 @@ class SaaSInstance(models.Model):
         Assure que partner_id est toujours défini avec l'utilisateur actuel par défaut.
         Ensures that partner_id is always set to the current user's partner by default.
 
+        Une place est réservée sur le serveur : la ligne du serveur est
+        verrouillée et sa capacité vérifiée avant l'insertion.
+
+        A slot is reserved on the server: the server row is locked and its
+        capacity checked before inserting, so that concurrent signups
+        cannot overfill it. The instance holds its slot until it is
+        terminated.
+
         Args:
-            vals (dict): Values for the new instance
+            vals_list (list): Values for the new instances
 
         Returns:
-            SaaSInstance: The created instance
+            SaaSInstance: The created instances
         """
-        # Si partner_id n'est pas fourni, utiliser le partenaire de l'utilisateur actuel
-        if not vals.get('partner_id') and self.env.user.partner_id:
-            vals['partner_id'] = self.env.user.partner_id.id
+        Server = self.env['saas.server']
+        additional = defaultdict(int)
+        for vals in vals_list:
+            # Si partner_id n'est pas fourni, utiliser le partenaire de l'utilisateur actuel
+            if not vals.get('partner_id') and self.env.user.partner_id:
+                vals['partner_id'] = self.env.user.partner_id.id
+
+            # Hostnames are case-insensitive: keep subdomains unique once lowercased
+            if vals.get('subdomain'):
+                vals['subdomain'] = vals['subdomain'].lower()
 
-        return super().create(vals)
+            if not vals.get('server_id'):
+                vals['server_id'] = self.env.context.get('default_server_id') or self._place_new_instance(vals).id
+            if vals.get('server_id'):
+                additional[vals['server_id']] += 1
+
+        servers = Server.browse(list(additional))
+        servers._lock_capacity()
+        servers._check_capacity(additional)
+
+        return super().create(vals_list)
+
+    def write(self, vals):
+        """
+        Réserver une place sur le nouveau serveur en cas de déplacement.
+        Reserve a slot on the new server when instances are moved.
+
+        Subdomains are stored lowercase, as in create.
+        """
+        if vals.get('subdomain'):
+            vals = dict(vals, subdomain=vals['subdomain'].lower())
+        if vals.get('server_id'):
+            server = self.env['saas.server'].browse(vals['server_id'])
+            moving = self.filtered(lambda instance: instance.server_id != server and instance.state != 'terminated')
+            if moving:
+                server._lock_capacity()
+                server._check_capacity({server.id: len(moving)})
+        return super().write(vals)
+
+    @api.model
+    def _place_new_instance(self, vals):
+        """
+        Choisir et verrouiller un serveur pour une nouvelle instance.
+        Pick and lock a server for a new instance.
+
+        Raises:
+            UserError: If no server can host the instance
+        """
+        return self.env['saas.server'].get_available_server(
+            min_capacity_percent=10,
+            plan=self.env['saas.plan'].browse(vals.get('plan_id')),
+            template=self.env['saas.template'].browse(vals.get('template_id')),
+            lock=True,
+        )
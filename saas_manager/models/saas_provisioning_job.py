@@ -0,0 +1,381 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+"""
+SaaS Provisioning Job
+=====================
+File d'attente persistante des provisionings d'instances.
+Persistent queue of instance provisioning jobs.
+"""
+
+import logging
+import threading
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from odoo import api, fields, models, _
+from odoo.exceptions import UserError
+
+from ..tools.misc import auto_commit_allowed
+
+_logger = logging.getLogger(__name__)
+
+# Ordered provisioning pipeline: (step code, label, saas.instance method)
+PROVISIONING_STEPS = [
+    ('clone', 'Clone Template Database', '_clone_template_database'),
+    ('neutralize', 'Neutralize Database', '_neutralize_database'),
+    ('customize', 'Customize Instance', '_customize_instance'),
+    ('admin', 'Create Client Admin', '_create_client_admin'),
+    ('subdomain', 'Configure Subdomain', '_configure_subdomain'),
+    ('activate', 'Activate Instance', '_activate_provisioned_instance'),
+    ('email', 'Send Provisioning Email', '_send_provisioning_email'),
+]
+
+
+def _step_index(step):
+    """
+    Position d'une étape dans le pipeline (-1 si aucune).
+    Position of a step in the pipeline (-1 if none).
+    """
+    for index, (code, _label, _method) in enumerate(PROVISIONING_STEPS):
+        if code == step:
+            return index
+    return -1
+
+
+class SaaSProvisioningJob(models.Model):
+    """
+    SaaS Provisioning Job - Background Provisioning Queue
+
+    Un job représente le provisioning d'une instance, exécuté hors de la
+    requête HTTP par un pool de workers lancé depuis un cron.
+
+    A job represents the provisioning of one instance, executed outside
+    the HTTP request by a worker pool started from a cron.
+    """
+    _name = 'saas.provisioning.job'
+    _description = 'SaaS Provisioning Job'
+    _order = 'id desc'
+
+    name = fields.Char(
+        string='Reference',
+        required=True,
+        copy=False,
+        readonly=True,
+        default=lambda self: _('New'),
+        help="Job reference"
+    )
+    instance_id = fields.Many2one(
+        'saas.instance',
+        string='Instance',
+        required=True,
+        ondelete='cascade',
+        index=True,
+        help="Instance being provisioned"
+    )
+    server_id = fields.Many2one(
+        'saas.server',
+        string='Server',
+        related='instance_id.server_id',
+        store=True,
+        help="Server hosting the instance"
+    )
+    state = fields.Selection([
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ], string='State', default='queued', required=True, index=True)
+    step = fields.Selection(
+        selection=[(code, label) for code, label, _method in PROVISIONING_STEPS],
+        string='Current Step',
+        readonly=True,
+        help="Pipeline step currently being executed"
+    )
+    progress = fields.Integer(
+        string='Progress (%)',
+        default=0,
+        readonly=True,
+        help="Provisioning progress percentage"
+    )
+    date_started = fields.Datetime(
+        string='Started On',
+        readonly=True
+    )
+    date_finished = fields.Datetime(
+        string='Finished On',
+        readonly=True
+    )
+    heartbeat = fields.Datetime(
+        string='Last Heartbeat',
+        readonly=True,
+        copy=False,
+        help="Last time the worker reported progress on this job"
+    )
+    error_message = fields.Text(
+        string='Error',
+        readonly=True,
+        help="Error raised by the failing step"
+    )
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        """
+        Override create to generate sequence.
+        """
+        for vals in vals_list:
+            if vals.get('name', _('New')) == _('New'):
+                vals['name'] = self.env['ir.sequence'].next_by_code('saas.provisioning.job') or _('New')
+        return super().create(vals_list)
+
+    # ------------------------------------------------------------------
+    # Queue management
+    # ------------------------------------------------------------------
+
+    @api.model
+    def _trigger_worker(self):
+        """
+        Réveiller le cron de traitement des jobs.
+        Wake up the job processing cron.
+        """
+        cron = self.env.ref('saas_manager.ir_cron_process_provisioning_jobs', raise_if_not_found=False)
+        if cron:
+            cron._trigger()
+
+    @api.model
+    def _get_worker_count(self):
+        """
+        Nombre de jobs provisionnés en parallèle.
+        Number of jobs provisioned concurrently.
+        """
+        workers = self.env['ir.config_parameter'].sudo().get_param('saas.provisioning_workers', '4')
+        try:
+            return max(int(workers), 1)
+        except ValueError:
+            return 4
+
+    @api.model
+    def _claim_jobs(self, limit):
+        """
+        Réserver des jobs en attente pour ce worker.
+        Claim queued jobs for this worker.
+
+        Uses SKIP LOCKED so that concurrent cron workers never pick the
+        same job twice.
+
+        Args:
+            limit (int): Maximum number of jobs to claim
+
+        Returns:
+            list: Claimed job IDs
+        """
+        self.env.cr.execute("""
+            SELECT id FROM saas_provisioning_job
+             WHERE state = 'queued'
+             ORDER BY id
+             LIMIT %s
+               FOR UPDATE SKIP LOCKED
+        """, [limit])
+        job_ids = [row[0] for row in self.env.cr.fetchall()]
+        if job_ids:
+            now = fields.Datetime.now()
+            self.browse(job_ids).write({
+                'state': 'running',
+                'date_started': now,
+                'heartbeat': now,
+                'error_message': False,
+            })
+            if auto_commit_allowed():
+                self.env.cr.commit()
+        return job_ids
+
+    @api.model
+    def _requeue_stale_jobs(self):
+        """
+        Remettre en file les jobs dont le worker a disparu.
+        Requeue jobs whose worker died.
+
+        Jobs in 'running' whose heartbeat is older than
+        saas.provisioning_job_timeout minutes are queued again; they resume
+        from their checkpoint. The heartbeat is re-checked under a row lock
+        and rows locked by a live worker are skipped, so a slow job is never
+        run twice.
+        """
+        timeout = self.env['ir.config_parameter'].sudo().get_param('saas.provisioning_job_timeout', '60')
+        try:
+            timeout = int(timeout)
+        except ValueError:
+            timeout = 60
+        self.flush_model(['state', 'heartbeat', 'date_started'])
+        self.env.cr.execute("""
+            SELECT id FROM saas_provisioning_job
+             WHERE state = 'running'
+               AND coalesce(heartbeat, date_started) < %s
+               FOR UPDATE SKIP LOCKED
+        """, [fields.Datetime.now() - timedelta(minutes=timeout)])
+        stale_jobs = self.browse([row[0] for row in self.env.cr.fetchall()])
+        if stale_jobs:
+            _logger.warning(f"Requeuing {len(stale_jobs)} stale provisioning jobs: {stale_jobs.mapped('name')}")
+            stale_jobs.write({'state': 'queued'})
+        return stale_jobs
+
+    @api.model
+    def cron_process_provisioning_jobs(self):
+        """
+        CRON: Traiter la file de provisioning avec un pool de workers.
+        CRON: Process the provisioning queue with a worker pool.
+
+        Each job runs in its own thread and database cursor, so N instances
+        are provisioned concurrently while HTTP workers stay available.
+        """
+        self._requeue_stale_jobs()
+
+        if not auto_commit_allowed():
+            # Tests cannot see data through a separate cursor: run inline
+            for job_id in self._claim_jobs(self._get_worker_count()):
+                self.browse(job_id)._run()
+            return
+
+        workers = self._get_worker_count()
+        _logger.info(f"Processing provisioning queue with {workers} workers")
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='saas_provisioning') as executor:
+            running = set()
+            while True:
+                free_slots = workers - len(running)
+                if free_slots:
+                    for job_id in self._claim_jobs(free_slots):
+                        running.add(executor.submit(self._run_in_new_cursor, job_id))
+                if not running:
+                    break
+                _done, running = wait(running, return_when=FIRST_COMPLETED)
+
+    def _run_in_new_cursor(self, job_id):
+        """
+        Exécuter un job dans un curseur dédié (thread worker).
+        Run a job within a dedicated cursor (worker thread).
+        """
+        threading.current_thread().dbname = self.env.cr.dbname
+        with self.env.registry.cursor() as cr:
+            env = api.Environment(cr, self.env.uid, self.env.context)
+            env['saas.provisioning.job'].browse(job_id)._run()
+
+    # ------------------------------------------------------------------
+    # Execution
+    # ------------------------------------------------------------------
+
+    def _set_step(self, step, progress):
+        """
+        Publier l'avancement du job.
+        Publish job progress.
+
+        Also refreshes the heartbeat, which tells _requeue_stale_jobs that
+        the worker is still alive.
+        """
+        self.write({'step': step, 'progress': progress, 'heartbeat': fields.Datetime.now()})
+        if auto_commit_allowed():
+            self.env.cr.commit()
+
+    def _checkpoint(self, step):
+        """
+        Enregistrer une étape terminée sur l'instance.
+        Persist a completed step on the instance.
+
+        The checkpoint is committed immediately so that a later failure
+        (or a crashed worker) never loses the work already done.
+        """
+        self.instance_id.write({'provisioning_checkpoint': step})
+        if auto_commit_allowed():
+            self.env.cr.commit()
+
+    def _run(self):
+        """
+        Exécuter les étapes restantes du pipeline de provisioning.
+        Execute the remaining steps of the provisioning pipeline.
+
+        Steps up to the instance checkpoint are skipped, so a retry resumes
+        right after the last completed step (e.g. without re-cloning).
+        """
+        self.ensure_one()
+        instance = self.instance_id
+        total = len(PROVISIONING_STEPS)
+        resume_index = _step_index(instance.provisioning_checkpoint) + 1
+
+        if resume_index:
+            _logger.info(
+                f"Resuming provisioning job {self.name} for instance {instance.name} "
+                f"after step '{instance.provisioning_checkpoint}'"
+            )
+        else:
+            _logger.info(f"Starting provisioning job {self.name} for instance: {instance.name}")
+
+        try:
+            for index, (step, _label, method) in enumerate(PROVISIONING_STEPS):
+                if index < resume_index:
+                    continue
+                self._set_step(step, int(index * 100 / total))
+                getattr(instance, method)()
+                self._checkpoint(step)
+
+            self.write({
+                'state': 'done',
+                'progress': 100,
+                'date_finished': fields.Datetime.now(),
+            })
+            _logger.info(f"Provisioning job {self.name} done for instance {instance.name}")
+
+        except Exception as e:
+            _logger.exception(f"Provisioning job {self.name} failed for {instance.name}")
+            if auto_commit_allowed():
+                self.env.cr.rollback()
+            # The instance stays in provisioning: completed steps are kept
+            # and a retry resumes from the checkpoint
+            self.write({
+                'state': 'failed',
+                'date_finished': fields.Datetime.now(),
+                'error_message': str(e),
+            })
+            instance.message_post(
+                body=_('Provisioning failed at step "%s": %s') % (
+                    dict(self._fields['step'].selection).get(self.step, self.step), str(e)
+                )
+            )
+
+        if auto_commit_allowed():
+            self.env.cr.commit()
+
+    def action_retry(self):
+        """
+        Relancer le provisioning depuis le dernier checkpoint.
+        Retry provisioning from the last checkpoint.
+
+        Works for any failed job, including a step failing after the
+        instance was activated (e.g. the provisioning email).
+        """
+        self.ensure_one()
+
+        if self.state != 'failed':
+            raise UserError(_('Only failed provisioning jobs can be retried.'))
+
+        return self.instance_id.action_retry_provisioning()
+
+    def action_view_instance(self):
+        """
+        Ouvrir l'instance provisionnée.
+        Open the provisioned instance.
+        """
+        self.ensure_one()
+
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': 'saas.instance',
+            'view_mode': 'form',
+            'res_id': self.instance_id.id,
+        }
+
+    def unlink(self):
+        """
+        Override unlink to prevent deletion of running jobs.
+        """
+        if any(job.state == 'running' for job in self):
+            raise UserError(_("Cannot delete a running provisioning job."))
+        return super().unlink()
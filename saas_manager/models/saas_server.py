@@ -8,15 +8,234 @@ Gestion des serveurs Odoo multi-tenant.
 Management of multi-tenant Odoo servers.
 """
 
+import json
 import logging
+import os
+import shutil
+import time
+import uuid
+import psycopg2
 import requests
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
+from psycopg2 import errors as pg_errors, sql
 from urllib.parse import urlparse, urlunparse
 from odoo import api, fields, models, _
 from odoo.exceptions import UserError, ValidationError
 
+from ..tools.rpc_client import OdooRpcClient
+
 _logger = logging.getLogger(__name__)
 
+# Timeout of a single health probe, in seconds
+HEALTH_CHECK_TIMEOUT = 10
+
+# Default weight of each resource dimension in placement scores
+# (overridden by the JSON config parameter saas.placement_weights)
+PLACEMENT_WEIGHTS = {
+    'instances': 1.0,
+    'cpu': 1.0,
+    'memory': 1.0,
+    'disk': 1.0,
+    'connections': 1.0,
+}
+
+# Resources an instance is expected to use per plan user, used to project
+# a plan onto a server (overridden by saas.placement_<key> config parameters)
+PLACEMENT_DEMAND_PER_USER = {
+    'cpu': 0.1,
+    'memory': 0.15,
+    'connections': 2.0,
+}
+
+# Queries scrubbing the data a clone inherits from its template: company
+# identity, template user emails and API keys. The admin user (id 2) keeps
+# its credentials, the admin provisioning step logs in with them.
+NEUTRALIZE_QUERIES = [
+    """
+    UPDATE res_partner
+       SET vat = NULL, email = NULL, phone = NULL
+     WHERE id IN (SELECT partner_id FROM res_company)
+    """,
+    """
+    UPDATE res_company SET company_registry = NULL
+    """,
+    """
+    UPDATE res_partner
+       SET email = 'demo.user' || res_users.id || '@example.com'
+      FROM res_users
+     WHERE res_users.partner_id = res_partner.id
+       AND res_users.id > 2
+       AND NOT res_users.share
+    """,
+    """
+    DELETE FROM res_users_apikeys
+    """,
+]
+
+
+def _probe_health(client, server_name, timeout=HEALTH_CHECK_TIMEOUT):
+    """
+    Interroger /web/health d'un serveur.
+    Probe /web/health of a server.
+
+    Plain function working on an RPC client only (no ORM access), so that
+    it can run in worker threads.
+
+    Returns:
+        bool: True if the server answered
+    """
+    test_url = f"{client.base_url}/web/health"
+
+    try:
+        _logger.info(f"Testing connection to server {server_name}: {test_url}")
+
+        response = client.get('/web/health', timeout=timeout, allow_redirects=True)
+
+        # Si la réponse HTTP 200 ou 404 (page existe mais pas trouvée), le serveur répond
+        # Si c'est un 302 redirect, c'est aussi bon signe
+        if response.status_code in [200, 301, 302, 303, 307, 308, 404]:
+            _logger.info(f"Connection to server {server_name} successful. Status: {response.status_code}")
+            return True
+        else:
+            _logger.warning(f"Server {server_name} returned HTTP {response.status_code}. URL: {test_url}")
+            return False
+
+    except requests.exceptions.Timeout:
+        _logger.warning(f"Connection to server {server_name} timed out ({timeout}s). URL: {client.base_url}")
+        return False
+    except requests.exceptions.ConnectionError as e:
+        _logger.warning(f"Could not connect to server {server_name}. URL: {client.base_url}. Error: {str(e)}")
+        return False
+    except requests.exceptions.RequestException as e:
+        _logger.warning(f"Request error connecting to server {server_name}: {str(e)}")
+        return False
+    except Exception as e:
+        _logger.warning(f"Error testing connection to server {server_name}: {str(e)}")
+        return False
+
+
+def _probe_resources(server_name, pg_params, data_dir):
+    """
+    Mesurer les ressources PostgreSQL et disque d'un serveur.
+    Measure PostgreSQL and disk resources of a server.
+
+    Returns:
+        dict: db_connections, database_count, db_size_mb, disk_used_percent
+            (missing keys when a measure is unavailable)
+    """
+    metrics = {}
+
+    try:
+        connection = psycopg2.connect(dbname='postgres', connect_timeout=5, **pg_params)
+        try:
+            with connection.cursor() as cr:
+                cr.execute("SELECT count(*) FROM pg_stat_activity")
+                metrics['db_connections'] = cr.fetchone()[0]
+                cr.execute("""
+                    SELECT count(*), coalesce(sum(pg_database_size(datname)), 0)
+                      FROM pg_database
+                     WHERE NOT datistemplate
+                """)
+                database_count, db_size = cr.fetchone()
+                metrics['database_count'] = database_count
+                metrics['db_size_mb'] = db_size / (1024 * 1024)
+        finally:
+            connection.close()
+    except psycopg2.Error as e:
+        _logger.warning(f"Could not collect database metrics of server {server_name}: {str(e)}")
+
+    if data_dir:
+        try:
+            usage = shutil.disk_usage(data_dir)
+            metrics['disk_used_percent'] = usage.used / usage.total * 100 if usage.total else 0.0
+        except OSError as e:
+            _logger.warning(f"Could not collect disk usage of server {server_name}: {str(e)}")
+
+    return metrics
+
+
+def _directory_size(path, seen=None):
+    """
+    Taille totale des fichiers d'un répertoire (parcours os.scandir).
+    Total size of the files of a directory (os.scandir walk).
+
+    Hardlinked files are counted once: files whose (st_dev, st_ino) is
+    already in `seen` are skipped, and the files counted are added to it.
+    Sharing `seen` across directories counts a file linked in several of
+    them only in the first one.
+
+    Args:
+        path (str): Directory to measure
+        seen (set): (st_dev, st_ino) of the files already counted (optional)
+
+    Returns:
+        int: Size in bytes (0 if the directory does not exist); unreadable
+        directories are logged and skipped
+    """
+    seen = set() if seen is None else seen
+    total = 0
+    stack = [path]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        stat = entry.stat(follow_symlinks=False)
+                        key = (stat.st_dev, stat.st_ino)
+                        if key in seen:
+                            continue
+                        seen.add(key)
+                        total += stat.st_size
+        except FileNotFoundError:
+            continue
+        except OSError as e:
+            # An unreadable directory must not abort the metering of the others
+            _logger.warning(f"Could not scan {e.filename} for storage metering: {e}")
+            continue
+    return total
+
+
+def _probe_availability(client, server_name):
+    """
+    Sonde de disponibilité d'un serveur : état et latence.
+    Availability probe of a server: state and latency.
+
+    Plain function (no ORM access), run in worker threads.
+
+    Returns:
+        dict: 'online' and, when online, 'latency_ms'
+    """
+    start = time.monotonic()
+    online = _probe_health(client, server_name)
+    probe = {'online': online}
+    if online:
+        probe['latency_ms'] = (time.monotonic() - start) * 1000
+    return probe
+
+
+def _probe_server(client, server_name, pg_params, data_dir):
+    """
+    Sonde complète d'un serveur : disponibilité, latence et ressources.
+    Full server probe: availability, latency and resources.
+
+    Plain function (no ORM access). A failing resource probe never hides
+    the availability of the server.
+
+    Returns:
+        dict: 'online', 'latency_ms' and the resource metrics
+    """
+    probe = _probe_availability(client, server_name)
+    if probe['online']:
+        try:
+            probe.update(_probe_resources(server_name, pg_params, data_dir))
+        except Exception as e:
+            _logger.warning(f"Resource probe failed for server {server_name}: {str(e)}")
+    return probe
+
 
 class SaaSServer(models.Model):
     """
@@ -79,6 +298,29 @@ class SaaSServer(models.Model):
         help="SSH/Connection password (encrypted)"
     )
 
+    # RPC Configuration
+    rpc_timeout = fields.Integer(
+        string='RPC Timeout (s)',
+        default=30,
+        help="Default timeout of RPC calls to this server. Long operations "
+             "(database duplication, module installation) use their own timeout."
+    )
+    rpc_retries = fields.Integer(
+        string='RPC Retries',
+        default=3,
+        help="Retries when the connection to the server fails"
+    )
+    rpc_backoff = fields.Float(
+        string='RPC Backoff Factor',
+        default=0.5,
+        help="Exponential backoff factor between retries (0.5 waits 0.5s, 1s, 2s, ...)"
+    )
+    rpc_verify_ssl = fields.Boolean(
+        string='Verify SSL Certificate',
+        default=False,
+        help="Verify the TLS certificate of the server"
+    )
+
     # Database Configuration
     db_host = fields.Char(
         string='Database Host',
@@ -104,6 +346,24 @@ class SaaSServer(models.Model):
         default='admin',
         help="Odoo master password for database operations"
     )
+    clone_method = fields.Selection(
+        string='Clone Method',
+        selection=[
+            ('rpc', 'Odoo RPC (duplicate_database)'),
+            ('native', 'PostgreSQL TEMPLATE'),
+        ],
+        default='rpc',
+        required=True,
+        help="How template databases are cloned on this server.\n"
+             "Odoo RPC: the Odoo server duplicates the database and copies the filestore.\n"
+             "PostgreSQL TEMPLATE: CREATE DATABASE ... TEMPLATE issued directly on the "
+             "database host, filestore copied with hardlinks (requires the data directory)."
+    )
+    data_dir = fields.Char(
+        string='Data Directory',
+        help="Odoo data directory of this server as reachable from the manager "
+             "(e.g., '/var/lib/odoo'). The filestore is '<data_dir>/filestore/<database>'."
+    )
 
     # Server Resources
     cpu_cores = fields.Integer(
@@ -125,6 +385,7 @@ class SaaSServer(models.Model):
         selection=[
             ('draft', 'Draft'),
             ('active', 'Active'),
+            ('degraded', 'Degraded'),
             ('maintenance', 'Maintenance'),
             ('offline', 'Offline'),
             ('disabled', 'Disabled'),
@@ -157,6 +418,56 @@ class SaaSServer(models.Model):
         help="Server health status"
     )
 
+    consecutive_failures = fields.Integer(
+        string='Consecutive Failures',
+        readonly=True,
+        help="Failed health probes in a row"
+    )
+    consecutive_successes = fields.Integer(
+        string='Consecutive Successes',
+        readonly=True,
+        help="Successful health probes in a row"
+    )
+    failure_threshold = fields.Integer(
+        string='Failure Threshold',
+        default=3,
+        help="Failed probes in a row before the server goes offline. "
+             "A server failing fewer probes is degraded but keeps receiving instances."
+    )
+    recovery_threshold = fields.Integer(
+        string='Recovery Threshold',
+        default=2,
+        help="Successful probes in a row before a degraded or offline server is active again"
+    )
+
+    # Metrics
+    metric_ids = fields.One2many(
+        'saas.server.metric',
+        'server_id',
+        string='Metrics',
+        help="Health and resource measurements history"
+    )
+    last_latency_ms = fields.Float(
+        string='Latency (ms)',
+        compute='_compute_last_metrics',
+        help="Response time measured by the last health probe"
+    )
+    last_db_connections = fields.Integer(
+        string='DB Connections',
+        compute='_compute_last_metrics',
+        help="Open PostgreSQL connections at the last health probe"
+    )
+    last_db_size_mb = fields.Float(
+        string='Databases Size (MB)',
+        compute='_compute_last_metrics',
+        help="Total size of the databases at the last health probe"
+    )
+    last_disk_used_percent = fields.Float(
+        string='Disk Used (%)',
+        compute='_compute_last_metrics',
+        help="Disk usage of the data directory at the last health probe"
+    )
+
     # Capacity Management
     max_instances = fields.Integer(
         string='Max Instances',
@@ -166,15 +477,37 @@ class SaaSServer(models.Model):
     instance_count = fields.Integer(
         string='Current Instances',
         compute='_compute_instance_count',
+        store=True,
+        index=True,
+        compute_sudo=True,
         readonly=True,
-        help="Number of instances currently hosted"
+        help="Number of instances currently hosted (terminated instances excluded)"
     )
     available_capacity = fields.Float(
         string="Capacité disponible (%)",
         compute='_compute_available_capacity',
-        store=True,  # Ajouter store=True
+        store=True,
+        index=True,
         compute_sudo=True
     )
+    max_db_connections = fields.Integer(
+        string='Max DB Connections',
+        help="PostgreSQL connections available to the instances of this server, "
+             "used by the placement engine (0 ignores connections)"
+    )
+    enforce_resource_capacity = fields.Boolean(
+        string='Enforce Resource Capacity',
+        default=False,
+        help="Reject placements whose projected CPU, memory, disk or connections "
+             "exceed the declared capacity. When unchecked, these projections "
+             "only rank servers and max_instances is the only hard limit."
+    )
+    spare_pool_limit = fields.Integer(
+        string='Max Spare Databases',
+        default=10,
+        help="Maximum number of pre-cloned spare databases kept on this server, "
+             "all templates included (0 disables warm pools on this server)"
+    )
 
     # Relationships
     instance_ids = fields.One2many(
@@ -230,6 +563,28 @@ class SaaSServer(models.Model):
                     _('Maximum instances must be greater than 0.')
                 )
 
+    @api.constrains('clone_method', 'data_dir')
+    def _check_clone_method(self):
+        """
+        Valider la configuration du clonage natif.
+        Validate native clone configuration.
+        """
+        for server in self:
+            if server.clone_method == 'native' and not server.data_dir:
+                raise ValidationError(
+                    _('The data directory is required to clone databases with PostgreSQL TEMPLATE.')
+                )
+
+    @api.constrains('failure_threshold', 'recovery_threshold')
+    def _check_health_thresholds(self):
+        """
+        Valider les seuils de santé.
+        Validate health thresholds.
+        """
+        for server in self:
+            if server.failure_threshold < 1 or server.recovery_threshold < 1:
+                raise ValidationError(_('Health thresholds must be at least 1.'))
+
     @api.depends('state')
     def _compute_is_online(self):
         """
@@ -237,16 +592,27 @@ class SaaSServer(models.Model):
         Determine if the server is online.
         """
         for server in self:
-            server.is_online = server.state == 'active'
+            server.is_online = server.state in ('active', 'degraded')
 
-    @api.depends('instance_ids')
+    @api.depends('instance_ids', 'instance_ids.state')
     def _compute_instance_count(self):
         """
         Compter le nombre d'instances actuelles.
         Count current number of instances.
+
+        Counted with a single GROUP BY query rather than by loading the
+        hosted instances. Terminated instances do not use capacity.
         """
+        counts = {}
+        if self.ids:
+            groups = self.env['saas.instance'].with_context(active_test=False)._read_group(
+                [('server_id', 'in', self.ids), ('state', '!=', 'terminated')],
+                ['server_id'],
+                ['__count'],
+            )
+            counts = {server.id: count for server, count in groups}
         for server in self:
-            server.instance_count = len(server.instance_ids)
+            server.instance_count = counts.get(server.id, 0)
 
     @api.depends('max_instances', 'instance_count')
     def _compute_available_capacity(self):
@@ -261,6 +627,51 @@ class SaaSServer(models.Model):
             else:
                 server.available_capacity = 0.0
 
+    def get_rpc_client(self):
+        """
+        Obtenir le client RPC du serveur (connexions persistantes).
+        Get the RPC client of the server (pooled keep-alive connections).
+
+        Returns:
+            OdooRpcClient: Client sharing the pooled session of this server
+        """
+        self.ensure_one()
+        return OdooRpcClient(
+            self.server_url,
+            master_password=self.master_password,
+            timeout=self.rpc_timeout or 30,
+            verify=self.rpc_verify_ssl,
+            retries=max(self.rpc_retries, 0),
+            backoff=self.rpc_backoff,
+        )
+
+    def _compute_last_metrics(self):
+        """
+        Calculer les dernières mesures (une requête pour tous les serveurs).
+        Compute the latest measures (one query for all servers).
+        """
+        latest = {}
+        if self.ids:
+            self.env.cr.execute("""
+                SELECT DISTINCT ON (server_id)
+                       server_id, latency_ms, db_connections, db_size_mb, disk_used_percent
+                  FROM saas_server_metric
+                 WHERE server_id IN %s
+                   AND resolution = 'raw'
+                   AND availability > 0
+                 ORDER BY server_id, date DESC
+            """, [tuple(self.ids)])
+            latest = {row[0]: row[1:] for row in self.env.cr.fetchall()}
+
+        for server in self:
+            latency_ms, db_connections, db_size_mb, disk_used_percent = latest.get(
+                server.id, (0.0, 0, 0.0, 0.0)
+            )
+            server.last_latency_ms = latency_ms
+            server.last_db_connections = db_connections
+            server.last_db_size_mb = db_size_mb
+            server.last_disk_used_percent = disk_used_percent
+
     def _test_connection(self):
         """
         Tester la connexion au serveur via RPC.
@@ -270,46 +681,349 @@ class SaaSServer(models.Model):
             bool: True if connection successful
         """
         self.ensure_one()
-        rpc_url = None
+        return _probe_health(self.get_rpc_client(), self.name)
+
+    # ------------------------------------------------------------------
+    # Direct PostgreSQL access
+    # ------------------------------------------------------------------
+
+    def _pg_connect(self, dbname='postgres'):
+        """
+        Ouvrir une connexion PostgreSQL directe vers le serveur.
+        Open a direct PostgreSQL connection to the server.
+
+        Args:
+            dbname (str): Database to connect to
+
+        Returns:
+            psycopg2.connection: Connection in autocommit mode (caller closes it)
+        """
+        self.ensure_one()
+        connection = psycopg2.connect(dbname=dbname, connect_timeout=10, **self._get_pg_params())
+        connection.autocommit = True
+        return connection
+
+    def _collect_instance_users(self):
+        """
+        Compter les utilisateurs internes actifs de toutes les instances du serveur.
+        Count the active internal users of all instances of the server.
+
+        PostgreSQL cannot query another database from a connection, so the
+        server databases are visited in one pass with a short connection
+        each; the counts are stored with a single UPDATE. The existing
+        databases are listed first: missing databases are skipped, and an
+        unreachable server costs a single connection timeout instead of one
+        per instance.
+
+        Returns:
+            dict: Instance id -> user count
+        """
+        self.ensure_one()
+        instances = self.env['saas.instance'].search([
+            ('server_id', '=', self.id),
+            ('state', 'in', ['active', 'suspended', 'expired']),
+        ])
+        if not instances:
+            return {}
+
+        counts = {}
+        try:
+            connection = self._pg_connect()
+            try:
+                with connection.cursor() as cr:
+                    cr.execute(
+                        "SELECT datname FROM pg_database WHERE datname = ANY(%s)",
+                        [instances.mapped('database_name')]
+                    )
+                    existing = {row[0] for row in cr.fetchall()}
+            finally:
+                connection.close()
+        except psycopg2.OperationalError as e:
+            _logger.warning(f"Could not count users on server {self.name}: {str(e)}")
+            return counts
+
+        for instance in instances:
+            if instance.database_name not in existing:
+                _logger.warning(f"Could not count users of {instance.database_name}: database not found")
+                continue
+            try:
+                connection = self._pg_connect(instance.database_name)
+            except psycopg2.OperationalError as e:
+                # The server went away: do not wait for every other database
+                _logger.warning(f"Server {self.name} unreachable, user count aborted: {str(e)}")
+                break
+            try:
+                with connection.cursor() as cr:
+                    # Superuser (id 1) and portal/public users excluded
+                    cr.execute("""
+                        SELECT count(*) FROM res_users
+                         WHERE active AND NOT share AND id != 1
+                    """)
+                    counts[instance.id] = cr.fetchone()[0]
+            except psycopg2.Error as e:
+                _logger.warning(f"Could not count users of {instance.database_name}: {str(e)}")
+            finally:
+                connection.close()
+
+        instances._store_collected_values(counts, 'current_users', 'current_users_date')
+        _logger.info(f"Counted users of {len(counts)}/{len(instances)} instances on server {self.name}")
+        return counts
+
+    def _collect_instance_storage(self):
+        """
+        Mesurer l'espace utilisé par toutes les instances du serveur.
+        Measure the storage used by all instances of the server.
+
+        Database sizes come from a single pg_database_size() query for the
+        whole server; filestores are measured with a directory scan when
+        the data directory is known, each hardlinked file being counted
+        once. Results are stored with one UPDATE.
 
+        Returns:
+            dict: Instance id -> storage used in GB
+        """
+        self.ensure_one()
+        instances = self.env['saas.instance'].search([
+            ('server_id', '=', self.id),
+            ('state', 'not in', ['draft', 'terminated']),
+        ])
+        if not instances:
+            return {}
+
+        connection = self._pg_connect()
         try:
-            # Nettoyer l'URL de base (sans le chemin)
-            base_url = self.server_url.rstrip('/')
+            with connection.cursor() as cr:
+                cr.execute("""
+                    SELECT datname, pg_database_size(datname)
+                      FROM pg_database
+                     WHERE datname = ANY(%s)
+                """, [instances.mapped('database_name')])
+                db_sizes = dict(cr.fetchall())
+        finally:
+            connection.close()
+
+        # Clones hardlink the template filestore: files still shared with a
+        # template are template storage and are not billed to instances
+        seen = set()
+        if self.data_dir:
+            templates = self.env['saas.template'].with_context(active_test=False).search([
+                ('server_id', '=', self.id),
+                ('template_db', '!=', False),
+            ])
+            for template in templates:
+                _directory_size(self._get_filestore_path(template.template_db), seen)
+
+        storage = {}
+        for instance in instances.sorted('id'):
+            if instance.database_name not in db_sizes:
+                continue
+            size = db_sizes[instance.database_name]
+            if self.data_dir:
+                size += _directory_size(self._get_filestore_path(instance.database_name), seen)
+            storage[instance.id] = size / (1024 ** 3)
+
+        instances._store_collected_values(storage, 'storage_used', 'storage_used_date')
+        _logger.info(f"Measured storage of {len(storage)}/{len(instances)} instances on server {self.name}")
+        return storage
+
+    def _get_pg_params(self):
+        """
+        Paramètres de connexion PostgreSQL du serveur.
+        PostgreSQL connection parameters of the server.
+        """
+        self.ensure_one()
+        return {
+            'host': self.db_host or None,
+            'port': self.db_port or None,
+            'user': self.db_user or None,
+            'password': self.db_password or None,
+        }
 
-            # Tester la connexion en accédant à un endpoint simple
-            # plutôt que de faire un appel RPC complexe
-            test_url = f"{base_url}/web/health"
+    def _get_probe_args(self):
+        """
+        Arguments de _probe_server, lus avant de quitter l'ORM.
+        Arguments of _probe_server, read before leaving the ORM.
+        """
+        self.ensure_one()
+        return (self.get_rpc_client(), self.name, self._get_pg_params(), self.data_dir)
 
-            _logger.info(f"Testing connection to server {self.name}: {test_url}")
+    def _pg_terminate_connections(self, cr, db_name):
+        """
+        Fermer les connexions ouvertes sur une base.
+        Terminate open connections to a database.
+        """
+        cr.execute("""
+            SELECT pg_terminate_backend(pid)
+              FROM pg_stat_activity
+             WHERE datname = %s
+               AND pid <> pg_backend_pid()
+        """, [db_name])
+
+    def _pg_clone_database(self, source_db, new_db_name, attempts=3):
+        """
+        Cloner une base avec CREATE DATABASE ... TEMPLATE puis son filestore.
+        Clone a database with CREATE DATABASE ... TEMPLATE, then its filestore.
 
-            response = requests.get(
-                test_url,
-                timeout=10,
-                verify=False,
-                allow_redirects=True
-            )
+        The template must have no open connection while it is copied, so
+        they are terminated first; a connection sneaking in between is
+        handled by retrying. When a later step fails, the new database and
+        its filestore are dropped so that the clone can be retried.
 
-            # Si la réponse HTTP 200 ou 404 (page existe mais pas trouvée), le serveur répond
-            # Si c'est un 302 redirect, c'est aussi bon signe
-            if response.status_code in [200, 301, 302, 303, 307, 308, 404]:
-                _logger.info(f"Connection to server {self.name} successful. Status: {response.status_code}")
-                return True
-            else:
-                _logger.warning(f"Server {self.name} returned HTTP {response.status_code}. URL: {test_url}")
-                return False
+        Args:
+            source_db (str): Template database name
+            new_db_name (str): New database name
+            attempts (int): Attempts when the template is in use
+        """
+        self.ensure_one()
+        start = time.monotonic()
 
-        except requests.exceptions.Timeout:
-            _logger.warning(f"Connection to server {self.name} timed out (10s). URL: {base_url}")
-            return False
-        except requests.exceptions.ConnectionError as e:
-            _logger.warning(f"Could not connect to server {self.name}. URL: {base_url}. Error: {str(e)}")
-            return False
-        except requests.exceptions.RequestException as e:
-            _logger.warning(f"Request error connecting to server {self.name}: {str(e)}")
-            return False
-        except Exception as e:
-            _logger.warning(f"Error testing connection to server {self.name}: {str(e)}")
-            return False
+        connection = self._pg_connect()
+        try:
+            with connection.cursor() as cr:
+                query = sql.SQL("CREATE DATABASE {} ENCODING 'unicode' TEMPLATE {}").format(
+                    sql.Identifier(new_db_name), sql.Identifier(source_db)
+                )
+                for attempt in range(1, attempts + 1):
+                    self._pg_terminate_connections(cr, source_db)
+                    try:
+                        cr.execute(query)
+                        break
+                    except pg_errors.ObjectInUse:
+                        if attempt == attempts:
+                            raise
+                        _logger.warning(f"Template {source_db} in use, retrying clone ({attempt}/{attempts})")
+                        time.sleep(attempt)
+        finally:
+            connection.close()
+
+        try:
+            # A clone must not share the identity of its template
+            connection = self._pg_connect(new_db_name)
+            try:
+                with connection.cursor() as cr:
+                    cr.execute("""
+                        UPDATE ir_config_parameter SET value = %s WHERE key = 'database.uuid';
+                        UPDATE ir_config_parameter SET value = %s WHERE key = 'database.secret';
+                        UPDATE ir_config_parameter SET value = %s WHERE key = 'database.create_date';
+                    """, [str(uuid.uuid1()), str(uuid.uuid4()), fields.Datetime.to_string(datetime.now())])
+            finally:
+                connection.close()
+
+            self._copy_filestore(source_db, new_db_name)
+        except BaseException:
+            # Leave nothing behind that would make a retry fail
+            _logger.warning(f"Clone of {source_db} into {new_db_name} failed, dropping the new database")
+            self._pg_drop_database(new_db_name)
+            raise
+
+        _logger.info(
+            f"Database {new_db_name} cloned natively from {source_db} on server {self.name} "
+            f"in {time.monotonic() - start:.1f}s"
+        )
+
+    def _pg_drop_database(self, db_name):
+        """
+        Supprimer une base et son filestore.
+        Drop a database and its filestore.
+
+        Used to clean up a failed clone: errors are logged, not raised, so
+        they do not hide the failure being cleaned up.
+        """
+        self.ensure_one()
+        try:
+            connection = self._pg_connect()
+            try:
+                with connection.cursor() as cr:
+                    self._pg_terminate_connections(cr, db_name)
+                    cr.execute(sql.SQL("DROP DATABASE IF EXISTS {}").format(sql.Identifier(db_name)))
+            finally:
+                connection.close()
+        except psycopg2.Error:
+            _logger.exception(f"Could not drop database {db_name} on server {self.name}")
+
+        if self.data_dir:
+            shutil.rmtree(self._get_filestore_path(db_name), ignore_errors=True)
+
+    def _pg_neutralize_database(self, db_name):
+        """
+        Neutraliser une base clonée d'un template.
+        Neutralize a database cloned from a template.
+
+        Runs NEUTRALIZE_QUERIES in a single transaction, so a clone is
+        either fully neutralized or left untouched.
+
+        Args:
+            db_name (str): Cloned database name
+        """
+        self.ensure_one()
+
+        connection = self._pg_connect(db_name)
+        try:
+            connection.autocommit = False
+            with connection, connection.cursor() as cr:
+                for query in NEUTRALIZE_QUERIES:
+                    cr.execute(query)
+        finally:
+            connection.close()
+
+        _logger.info(f"Database {db_name} neutralized on server {self.name}")
+
+    def _pg_rename_database(self, old_name, new_name):
+        """
+        Renommer une base et son filestore.
+        Rename a database and its filestore.
+        """
+        self.ensure_one()
+
+        connection = self._pg_connect()
+        try:
+            with connection.cursor() as cr:
+                self._pg_terminate_connections(cr, old_name)
+                cr.execute(sql.SQL("ALTER DATABASE {} RENAME TO {}").format(
+                    sql.Identifier(old_name), sql.Identifier(new_name)
+                ))
+        finally:
+            connection.close()
+
+        old_path = self._get_filestore_path(old_name)
+        if os.path.exists(old_path):
+            os.rename(old_path, self._get_filestore_path(new_name))
+
+    def _get_filestore_path(self, db_name):
+        """
+        Chemin du filestore d'une base.
+        Filestore path of a database.
+        """
+        self.ensure_one()
+        return os.path.join(self.data_dir, 'filestore', db_name)
+
+    def _copy_filestore(self, source_db, new_db_name):
+        """
+        Copier le filestore avec des liens physiques.
+        Copy the filestore using hardlinks.
+
+        Odoo attachments are content-addressed and never modified in place,
+        so hardlinks are safe and make the copy a metadata-only operation.
+        Files are copied when linking is not possible (other filesystem).
+        """
+        self.ensure_one()
+        source = self._get_filestore_path(source_db)
+        target = self._get_filestore_path(new_db_name)
+
+        if not os.path.isdir(source):
+            _logger.warning(f"No filestore found for {source_db} at {source}, skipping filestore copy")
+            return
+
+        def link_or_copy(src, dst):
+            try:
+                os.link(src, dst)
+            except OSError:
+                shutil.copy2(src, dst)
+
+        # The target database was just created: a filestore left there by
+        # an interrupted clone is stale
+        shutil.rmtree(target, ignore_errors=True)
+        shutil.copytree(source, target, copy_function=link_or_copy)
 
     def action_check_health(self):
         """
@@ -322,32 +1036,16 @@ class SaaSServer(models.Model):
         self.ensure_one()
 
         try:
-            is_online = self._test_connection()
-
-            if is_online:
-                health_status = 'healthy'
-                new_state = 'active'
-            else:
-                health_status = 'critical'
-                new_state = 'offline'
-
-            self.write({
-                'health_status': health_status,
-                'last_check_date': datetime.now(),
-                'state': new_state,
-            })
+            probe = _probe_server(*self._get_probe_args())
+            is_online = probe['online']
+            self._apply_health_results({self.id: probe})
 
             message = _('Server is %s') % ('ONLINE' if is_online else 'OFFLINE')
             notification_type = 'success' if is_online else 'danger'
 
         except Exception as e:
             _logger.exception("Error checking server health")
-            health_status = 'critical'
-            self.write({
-                'health_status': health_status,
-                'last_check_date': datetime.now(),
-                'state': 'offline',
-            })
+            self._apply_health_results({self.id: {'online': False}})
             message = _('Health check failed: %s') % str(e)
             notification_type = 'danger'
 
@@ -362,6 +1060,92 @@ class SaaSServer(models.Model):
             }
         }
 
+    def _apply_health_results(self, results):
+        """
+        Enregistrer le résultat des sondes de santé.
+        Store the outcome of health probes.
+
+        Les compteurs sont mis à jour en SQL ; l'ORM n'écrit que les
+        changements d'état.
+
+        Consecutive failure/success counters are updated with a single SQL
+        statement; the ORM only writes servers whose state or health status
+        changes (see _get_health_transition), grouped by new values. Every
+        probe is appended to the metrics history.
+
+        Args:
+            results (dict): Server id -> probe dict (see _probe_server)
+        """
+        if not self:
+            return
+        now = datetime.now()
+        Metric = self.env['saas.server.metric']
+        online_ids = []
+        metric_vals = []
+        for server in self:
+            probe = results.get(server.id) or {'online': False}
+            if probe.get('online'):
+                online_ids.append(server.id)
+            metric_vals.append(Metric._prepare_from_probe(server.id, probe, now))
+
+        self.env.cr.execute("""
+            UPDATE saas_server
+               SET consecutive_successes = CASE WHEN id = ANY(%(online)s::int[])
+                                                THEN consecutive_successes + 1 ELSE 0 END,
+                   consecutive_failures = CASE WHEN id = ANY(%(online)s::int[])
+                                               THEN 0 ELSE consecutive_failures + 1 END,
+                   last_check_date = %(now)s
+             WHERE id IN %(ids)s
+        """, {'online': online_ids, 'now': now, 'ids': tuple(self.ids)})
+        self.invalidate_recordset(['consecutive_successes', 'consecutive_failures', 'last_check_date'])
+
+        groups = defaultdict(list)
+        for server in self:
+            vals = server._get_health_transition(server.id in online_ids)
+            if vals:
+                groups[tuple(sorted(vals.items()))].append(server.id)
+
+        for vals, server_ids in groups.items():
+            self.browse(server_ids).write(dict(vals))
+        Metric.create(metric_vals)
+
+    def _get_health_transition(self, is_online):
+        """
+        Calculer le nouvel état après une sonde (avec hystérésis).
+        Compute the new state after a probe (with hysteresis).
+
+        - active -> degraded on the first failure
+        - active/degraded -> offline after failure_threshold failures in a row
+        - degraded/offline -> active after recovery_threshold successes in a row
+        - draft, maintenance and disabled servers keep their state
+
+        Args:
+            is_online (bool): Outcome of the probe (counters already updated)
+
+        Returns:
+            dict: Changed values (empty if nothing changes)
+        """
+        self.ensure_one()
+        state = self.state
+
+        if is_online:
+            if state in ('degraded', 'offline') and self.consecutive_successes >= self.recovery_threshold:
+                state = 'active'
+            health_status = 'warning' if state in ('degraded', 'offline') else 'healthy'
+        else:
+            if state in ('active', 'degraded') and self.consecutive_failures >= self.failure_threshold:
+                state = 'offline'
+            elif state == 'active':
+                state = 'degraded'
+            health_status = 'warning' if state == 'degraded' else 'critical'
+
+        vals = {}
+        if state != self.state:
+            vals['state'] = state
+        if health_status != self.health_status:
+            vals['health_status'] = health_status
+        return vals
+
     def action_activate(self):
         """
         Activer le serveur.
@@ -383,6 +1167,8 @@ class SaaSServer(models.Model):
             'state': 'active',
             'health_status': 'healthy',
             'last_check_date': datetime.now(),
+            'consecutive_failures': 0,
+            'consecutive_successes': 0,
         })
 
         return {
@@ -471,6 +1257,25 @@ class SaaSServer(models.Model):
             'context': {'default_server_id': self.id},
         }
 
+    def action_view_metrics(self):
+        """
+        Voir l'historique des mesures du serveur.
+        View the metrics history of the server.
+
+        Returns:
+            dict: Action to display metrics
+        """
+        self.ensure_one()
+
+        return {
+            'name': _('Metrics of %s') % self.name,
+            'type': 'ir.actions.act_window',
+            'res_model': 'saas.server.metric',
+            'view_mode': 'graph,list,pivot',
+            'domain': [('server_id', '=', self.id)],
+            'context': {'default_server_id': self.id},
+        }
+
     def action_test_connection(self):
         """
         Tester la connexion au serveur.
@@ -506,49 +1311,374 @@ class SaaSServer(models.Model):
             }
         }
 
-    def get_available_server(self, min_capacity_percent=20):
+    def get_available_server(self, min_capacity_percent=20, plan=None, template=None, strategy=None,
+                             lock=False):
         """
         Obtenir un serveur disponible avec suffisamment de capacité.
         Get an available server with sufficient capacity.
 
+        Les serveurs candidats sont notés selon la marge projetée (CPU,
+        mémoire, disque, connexions, instances) après ajout d'une instance
+        du plan demandé.
+
+        Candidate servers are scored on their projected headroom (CPU,
+        memory, disk, connections and instance slots) once an instance of
+        the requested plan is added. The ranking depends on the placement
+        strategy. Hard limits are max_instances and min_capacity_percent;
+        resource projections only exclude a server when it enforces its
+        resource capacity (enforce_resource_capacity).
+
+        Instances are cloned from the template database, which only exists
+        on the template server: when a template is given, its server is the
+        only candidate.
+
         Args:
             min_capacity_percent (float): Minimum required capacity percentage
+            plan (saas.plan): Plan of the instance to place (optional)
+            template (saas.template): Template of the instance (optional)
+            strategy (str): Placement strategy: 'spread', 'binpack', 'affinity'
+                or any strategy scored by a _placement_score_<strategy> method
+                (default: saas.placement_strategy config parameter)
+            lock (bool): Lock the returned server row until the end of the
+                transaction (see _lock_capacity). Servers locked by a
+                concurrent placement are skipped when another one fits.
 
         Returns:
             saas.server: The best available server
 
         Raises:
-            UserError: If no available server found
+            UserError: If no available server found, or if the template
+                server cannot host the instance
         """
         available_servers = self.search([
-            ('state', '=', 'active'),
+            ('state', 'in', ['active', 'degraded']),
             ('available_capacity', '>=', min_capacity_percent),
         ], order='available_capacity DESC')
-
-        if not available_servers:
+        if template and template.server_id:
+            available_servers &= template.server_id
+
+        strategy = strategy or self.env['ir.config_parameter'].sudo().get_param(
+            'saas.placement_strategy', 'spread'
+        )
+        score_method = f'_placement_score_{strategy}'
+        if not hasattr(available_servers, score_method):
+            raise UserError(_("Unknown placement strategy '%s'.") % strategy)
+
+        weights = self._get_placement_weights()
+        demand = self._get_plan_demand(plan)
+        committed = available_servers._get_committed_resources()
+
+        ranked = []
+        for server in available_servers:
+            headroom = server._get_headroom(committed[server.id], demand)
+            if not server._fits_headroom(headroom):
+                continue
+            score = getattr(server, score_method)(headroom, weights, template)
+            # Degraded servers missed a probe but are not offline yet: they
+            # stay eligible, after the healthy ones, so that a network blip
+            # does not change placement
+            ranked.append((server.state == 'active', score, server))
+
+        if not ranked and template and template.server_id:
+            raise UserError(
+                _("Server '%s' of template '%s' cannot host a new instance "
+                  "(not in service, below %d%% capacity or full).\n\n"
+                  "Please free capacity on this server or use a template hosted on another server.")
+                % (template.server_id.name, template.name, min_capacity_percent)
+            )
+        if not ranked:
             raise UserError(
                 _("No available server found with at least %d%% capacity.\n\n"
                   "Please add more servers or increase maximum instances.") % min_capacity_percent
             )
 
-        # Return the server with the most available capacity
-        return available_servers[0]
+        ranked.sort(key=lambda item: item[:2], reverse=True)
+        if lock:
+            for _active, _score, server in ranked:
+                self.env.cr.execute(
+                    "SELECT id FROM saas_server WHERE id = %s FOR UPDATE SKIP LOCKED", [server.id]
+                )
+                if self.env.cr.fetchone():
+                    return server
+            # Every candidate is being placed on: wait for the best one
+            ranked[0][2]._lock_capacity()
+        return ranked[0][2]
+
+    def _lock_capacity(self):
+        """
+        Verrouiller les serveurs pour réserver des places d'instance.
+        Lock the servers to reserve instance slots.
+
+        The row lock is held until the end of the transaction, so that
+        concurrent placements on the same server are serialized and see
+        each other's instances when checking the capacity.
+        """
+        if self.ids:
+            self.env.cr.execute(
+                "SELECT id FROM saas_server WHERE id IN %s ORDER BY id FOR UPDATE",
+                [tuple(self.ids)]
+            )
+
+    def _check_capacity(self, additional=None):
+        """
+        Vérifier la capacité des serveurs (lignes déjà verrouillées).
+        Check the capacity of the servers (rows already locked).
+
+        Counts hosted instances in SQL rather than from the stored
+        instance_count, which a concurrent transaction may be updating.
+
+        Args:
+            additional (dict): Server id -> instances about to be added
+
+        Raises:
+            UserError: If a server would exceed max_instances
+        """
+        additional = additional or {}
+        if not self.ids:
+            return
+        self.env.cr.execute("""
+            SELECT server_id, count(*)
+              FROM saas_instance
+             WHERE server_id IN %s
+               AND state != 'terminated'
+             GROUP BY server_id
+        """, [tuple(self.ids)])
+        counts = dict(self.env.cr.fetchall())
+
+        for server in self:
+            total = counts.get(server.id, 0) + additional.get(server.id, 0)
+            if total > server.max_instances:
+                raise UserError(
+                    _("Server '%s' is full (%d/%d instances).\n\n"
+                      "Please select another server or increase its maximum instances.")
+                    % (server.name, counts.get(server.id, 0), server.max_instances)
+                )
+
+    @api.model
+    def _get_placement_weights(self):
+        """
+        Poids des dimensions de placement.
+        Weights of the placement dimensions.
+        """
+        weights = dict(PLACEMENT_WEIGHTS)
+        param = self.env['ir.config_parameter'].sudo().get_param('saas.placement_weights')
+        if param:
+            try:
+                weights.update({key: float(value) for key, value in json.loads(param).items()})
+            except (ValueError, TypeError, AttributeError):
+                _logger.warning(f"Invalid saas.placement_weights parameter ignored: {param}")
+        return weights
+
+    @api.model
+    def _get_plan_demand(self, plan):
+        """
+        Ressources projetées d'une instance d'un plan.
+        Projected resources of an instance of a plan.
+
+        Args:
+            plan (saas.plan): Plan (empty: one instance slot only)
+
+        Returns:
+            dict: cpu (cores), memory (GB), disk (GB), connections, instances
+        """
+        demand = {'instances': 1.0, 'cpu': 0.0, 'memory': 0.0, 'disk': 0.0, 'connections': 0.0}
+        if not plan:
+            return demand
+
+        params = self.env['ir.config_parameter'].sudo()
+        for key, default in PLACEMENT_DEMAND_PER_USER.items():
+            per_user = float(params.get_param(f'saas.placement_{key}_per_user', default))
+            demand[key] = plan.user_limit * per_user
+        demand['disk'] = plan.storage_limit
+        return demand
+
+    def _get_committed_resources(self):
+        """
+        Ressources déjà engagées par les instances de chaque serveur.
+        Resources already committed by the instances of each server.
+
+        Returns:
+            dict: Server id -> demand dict (see _get_plan_demand)
+        """
+        committed = {
+            server.id: {'instances': 0.0, 'cpu': 0.0, 'memory': 0.0, 'disk': 0.0, 'connections': 0.0}
+            for server in self
+        }
+        if not self:
+            return committed
+
+        groups = self.env['saas.instance'].sudo().with_context(active_test=False)._read_group(
+            [('server_id', 'in', self.ids), ('state', '!=', 'terminated')],
+            ['server_id', 'plan_id'],
+            ['__count'],
+        )
+        demands = {}
+        for server, plan, count in groups:
+            if plan not in demands:
+                demands[plan] = self._get_plan_demand(plan)
+            for key, value in demands[plan].items():
+                committed[server.id][key] += value * count
+        return committed
+
+    def _get_headroom(self, committed, demand):
+        """
+        Marge restante par dimension après placement (0 à 1, négative si
+        la demande ne tient pas).
+        Remaining headroom per dimension after placement (0 to 1, negative
+        when the demand does not fit).
+
+        Dimensions without a declared capacity (0) are ignored.
+        """
+        self.ensure_one()
+        capacities = {
+            'instances': self.max_instances,
+            'cpu': self.cpu_cores,
+            'memory': self.memory_gb,
+            'disk': self.disk_gb,
+            'connections': self.max_db_connections,
+        }
+        return {
+            key: (capacity - committed[key] - demand[key]) / capacity
+            for key, capacity in capacities.items()
+            if capacity > 0
+        }
+
+    def _fits_headroom(self, headroom):
+        """
+        Vérifier qu'une instance tient sur le serveur.
+        Check that an instance fits on the server.
+
+        Projected resources are estimates: they only reject a placement on
+        servers enforcing their resource capacity. Instance slots are always
+        a hard limit.
+        """
+        self.ensure_one()
+        if self.enforce_resource_capacity:
+            return min(headroom.values()) >= 0
+        return headroom.get('instances', 0.0) >= 0
+
+    def _placement_score_spread(self, headroom, weights, template):
+        """
+        Stratégie 'spread' : la plus grande marge pondérée d'abord.
+        'spread' strategy: largest weighted headroom first.
+        """
+        self.ensure_one()
+        total = sum(weights.get(key, 0.0) for key in headroom)
+        if not total:
+            return 0.0
+        return sum(value * weights.get(key, 0.0) for key, value in headroom.items()) / total
+
+    def _placement_score_binpack(self, headroom, weights, template):
+        """
+        Stratégie 'binpack' : le serveur le plus rempli qui peut accueillir l'instance.
+        'binpack' strategy: fullest server that still fits the instance.
+        """
+        return -self._placement_score_spread(headroom, weights, template)
+
+    def _placement_score_affinity(self, headroom, weights, template):
+        """
+        Stratégie 'affinity' : le serveur du template d'abord (clonage local).
+        'affinity' strategy: the template server first (local cloning).
+        """
+        affinity = 1.0 if template and template.server_id == self else 0.0
+        return affinity + self._placement_score_spread(headroom, weights, template) / 2
 
     @api.model
     def cron_check_all_servers_health(self):
         """
-        CRON: Vérifier la santé de tous les serveurs actifs.
-        CRON: Check health of all active servers.
+        CRON: Vérifier la santé des serveurs en service.
+        CRON: Check health of all servers in service.
+
+        Les serveurs sont sondés en parallèle avec une échéance globale,
+        puis les résultats sont écrits en lot.
+
+        Servers are probed concurrently under a global deadline, so the cron
+        lasts about one probe timeout whatever the fleet size. Probes still
+        running at the deadline count as failed. Resources (PostgreSQL and
+        disk) are measured by separate probes with their own deadline
+        (saas.resource_probe_deadline): when they are slow, only the metrics
+        are missing. Results are then written in batch.
         """
         _logger.info("Running server health check...")
         
-        servers = self.search([('state', 'in', ['active', 'maintenance'])])
-        
+        # Offline servers are probed too, so that they can recover
+        servers = self.search([('state', 'in', ['active', 'degraded', 'maintenance', 'offline'])])
+        if not servers:
+            return
+
+        params = self.env['ir.config_parameter'].sudo()
+        max_workers = int(params.get_param('saas.health_check_workers', 32))
+        deadline = float(params.get_param('saas.health_check_deadline', HEALTH_CHECK_TIMEOUT + 5))
+        resource_deadline = float(params.get_param('saas.resource_probe_deadline', 30))
+
+        # Probe arguments are read here: worker threads must not touch the ORM
+        probes = {server.id: server._get_probe_args() for server in servers}
+
+        start = time.monotonic()
+        executor = ThreadPoolExecutor(
+            max_workers=max(1, min(max_workers, 2 * len(probes))),
+            thread_name_prefix='saas_health',
+        )
+        try:
+            # Availability probes are submitted first so that they never
+            # wait behind resource probes for a worker
+            futures = {
+                executor.submit(_probe_availability, client, name): server_id
+                for server_id, (client, name, _pg_params, _data_dir) in probes.items()
+            }
+            resource_futures = {
+                executor.submit(_probe_resources, name, pg_params, data_dir): server_id
+                for server_id, (_client, name, pg_params, data_dir) in probes.items()
+            }
+            done, not_done = wait(futures, timeout=deadline)
+            resources_done, _resources_not_done = wait(
+                resource_futures, timeout=max(resource_deadline - (time.monotonic() - start), 0)
+            )
+        finally:
+            # Do not wait for probes past the deadline
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        results = {}
+        for future in done:
+            try:
+                results[futures[future]] = future.result()
+            except Exception as e:
+                _logger.error(f"Health check failed for server {probes[futures[future]][1]}: {str(e)}")
+                results[futures[future]] = {'online': False}
+        for future in not_done:
+            _logger.warning(f"Health check of server {probes[futures[future]][1]} exceeded the {deadline}s deadline")
+            results[futures[future]] = {'online': False}
+
+        # Resource metrics are only kept for servers that answered; a slow
+        # or failing resource probe leaves the availability untouched
+        for future in resources_done:
+            probe = results[resource_futures[future]]
+            if not probe['online']:
+                continue
+            try:
+                probe.update(future.result())
+            except Exception as e:
+                _logger.warning(f"Resource probe failed for server {probes[resource_futures[future]][1]}: {str(e)}")
+
+        servers._apply_health_results(results)
+        _logger.info(
+            f"Health check done: {sum(probe['online'] for probe in results.values())}/{len(results)} servers online"
+        )
+
+    @api.model
+    def cron_collect_storage_usage(self):
+        """
+        CRON: Mesurer l'espace utilisé par les instances.
+        CRON: Measure the storage used by instances.
+        """
+        _logger.info("Running instance storage collection...")
+
+        servers = self.search([('state', 'in', ['active', 'degraded', 'maintenance'])])
         for server in servers:
             try:
-                server.action_check_health()
+                server._collect_instance_storage()
             except Exception as e:
-                _logger.error(f"Health check failed for server {server.name}: {str(e)}")
+                _logger.error(f"Storage collection failed on server {server.name}: {str(e)}")
 
     @api.model
     def create(self, vals):
@@ -564,7 +1694,8 @@ class SaaSServer(models.Model):
         Override write to add additional logic.
         """
         if 'state' in vals:
-            _logger.info(f"Server {self.name} state changed to: {vals['state']}")
+            for server in self:
+                _logger.info(f"Server {server.name} state changed to: {vals['state']}")
         return super().write(vals)
 
     def unlink(self):
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+"""
+SaaS Server Metric
+==================
+Historique des mesures de santé et de ressources des serveurs.
+History of server health and resource measurements.
+"""
+
+import logging
+from datetime import timedelta
+from odoo import api, fields, models
+
+_logger = logging.getLogger(__name__)
+
+# Downsampling chain: (source resolution, target resolution, date_trunc unit,
+# config parameter holding the source retention in days, default days)
+DOWNSAMPLING = [
+    ('raw', 'hour', 'hour', 'saas.metric_raw_retention_days', 7),
+    ('hour', 'day', 'day', 'saas.metric_hourly_retention_days', 90),
+]
+
+
+class SaaSServerMetric(models.Model):
+    """
+    SaaS Server Metric - Health Time Series
+
+    Une ligne par sonde de santé (résolution 'raw'). Les lignes anciennes
+    sont agrégées par heure puis par jour pour garder un historique compact.
+
+    One row per health probe ('raw' resolution). Old rows are aggregated
+    per hour, then per day, to keep a compact history.
+    """
+    _name = 'saas.server.metric'
+    _description = 'SaaS Server Metric'
+    _order = 'date desc, id desc'
+    _rec_name = 'date'
+
+    server_id = fields.Many2one(
+        'saas.server',
+        string='Server',
+        required=True,
+        ondelete='cascade',
+        index=True
+    )
+    date = fields.Datetime(
+        string='Date',
+        required=True,
+        default=fields.Datetime.now,
+        index=True
+    )
+    resolution = fields.Selection([
+        ('raw', 'Raw'),
+        ('hour', 'Hourly'),
+        ('day', 'Daily'),
+    ], string='Resolution', default='raw', required=True, index=True)
+    sample_count = fields.Integer(
+        string='Samples',
+        default=1,
+        help="Number of probes aggregated in this row"
+    )
+    availability = fields.Float(
+        string='Availability (%)',
+        aggregator='avg',
+        help="Share of successful probes"
+    )
+    latency_ms = fields.Float(
+        string='Latency (ms)',
+        aggregator='avg',
+        help="Response time of /web/health (average when aggregated)"
+    )
+    db_connections = fields.Integer(
+        string='DB Connections',
+        aggregator='max',
+        help="Open PostgreSQL connections (maximum when aggregated)"
+    )
+    database_count = fields.Integer(
+        string='Databases',
+        aggregator='max'
+    )
+    db_size_mb = fields.Float(
+        string='Databases Size (MB)',
+        aggregator='max',
+        help="Total size of the databases (maximum when aggregated)"
+    )
+    disk_used_percent = fields.Float(
+        string='Disk Used (%)',
+        aggregator='max',
+        help="Disk usage of the data directory (maximum when aggregated)"
+    )
+
+    _sql_constraints = [
+        ('availability_range', 'CHECK(availability >= 0 AND availability <= 100)',
+         'Availability must be between 0 and 100!'),
+    ]
+
+    @api.model
+    def _prepare_from_probe(self, server_id, probe, date):
+        """
+        Valeurs d'une mesure brute depuis le résultat d'une sonde.
+        Values of a raw metric from a probe result.
+        """
+        return {
+            'server_id': server_id,
+            'date': date,
+            'resolution': 'raw',
+            'availability': 100.0 if probe.get('online') else 0.0,
+            'latency_ms': probe.get('latency_ms') or 0.0,
+            'db_connections': probe.get('db_connections') or 0,
+            'database_count': probe.get('database_count') or 0,
+            'db_size_mb': probe.get('db_size_mb') or 0.0,
+            'disk_used_percent': probe.get('disk_used_percent') or 0.0,
+        }
+
+    @api.model
+    def cron_downsample_metrics(self):
+        """
+        CRON: Agréger et purger l'historique des mesures.
+        CRON: Downsample and purge the metrics history.
+
+        1. Raw rows older than saas.metric_raw_retention_days become hourly rows
+        2. Hourly rows older than saas.metric_hourly_retention_days become daily rows
+        3. Daily rows older than saas.metric_retention_days are deleted
+        """
+        params = self.env['ir.config_parameter'].sudo()
+        now = fields.Datetime.now()
+
+        for source, target, unit, param, default_days in DOWNSAMPLING:
+            days = int(params.get_param(param, default_days))
+            # Only aggregate complete buckets, so a bucket is never split
+            self.env.cr.execute("SELECT date_trunc(%s, %s::timestamp)", [unit, now - timedelta(days=days)])
+            limit = self.env.cr.fetchone()[0]
+
+            self.env.cr.execute("""
+                INSERT INTO saas_server_metric (
+                    server_id, date, resolution, sample_count, availability,
+                    latency_ms, db_connections, database_count, db_size_mb,
+                    disk_used_percent, create_uid, create_date, write_uid, write_date
+                )
+                SELECT server_id, date_trunc(%(unit)s, date), %(target)s, sum(sample_count),
+                       sum(availability * sample_count) / sum(sample_count),
+                       coalesce(sum(latency_ms * sample_count) FILTER (WHERE latency_ms > 0)
+                                / nullif(sum(sample_count) FILTER (WHERE latency_ms > 0), 0), 0),
+                       max(db_connections), max(database_count), max(db_size_mb),
+                       max(disk_used_percent),
+                       %(uid)s, now() at time zone 'UTC', %(uid)s, now() at time zone 'UTC'
+                  FROM saas_server_metric
+                 WHERE resolution = %(source)s
+                   AND date < %(limit)s
+                 GROUP BY server_id, date_trunc(%(unit)s, date)
+            """, {'unit': unit, 'target': target, 'source': source, 'limit': limit, 'uid': self.env.uid})
+            aggregated = self.env.cr.rowcount
+
+            self.env.cr.execute("""
+                DELETE FROM saas_server_metric
+                 WHERE resolution = %s
+                   AND date < %s
+            """, [source, limit])
+            _logger.info(
+                f"Downsampled {self.env.cr.rowcount} {source} server metrics into {aggregated} {target} rows"
+            )
+
+        days = int(params.get_param('saas.metric_retention_days', 730))
+        self.env.cr.execute("""
+            DELETE FROM saas_server_metric
+             WHERE resolution = 'day'
+               AND date < %s
+        """, [now - timedelta(days=days)])
+        if self.env.cr.rowcount:
+            _logger.info(f"Purged {self.env.cr.rowcount} daily server metrics")
+
+        self.invalidate_model()
@@ -13,6 +13,8 @@ from dateutil.relativedelta import relativedelta
 from odoo import api, fields, models, _
 from odoo.exceptions import UserError, ValidationError
 
+from ..tools.misc import auto_commit_allowed
+
 _logger = logging.getLogger(__name__)
 
 
@@ -78,6 +80,12 @@ class SaaSSubscription(models.Model):
         tracking=True,
         help="Automatically renew subscription"
     )
+    auto_renew_checked_date = fields.Date(
+        string='Renewal Checked On',
+        readonly=True,
+        copy=False,
+        help="Last day the auto-renewal cron examined this subscription"
+    )
     is_trial = fields.Boolean(
         string='Trial Period',
         default=False,
@@ -135,14 +143,15 @@ class SaaSSubscription(models.Model):
         ('dates_check', 'CHECK(end_date >= start_date)', 'End date must be after start date!'),
     ]
 
-    @api.model
-    def create(self, vals):
+    @api.model_create_multi
+    def create(self, vals_list):
         """
         Override create to generate sequence.
         """
-        if vals.get('name', _('New')) == _('New'):
-            vals['name'] = self.env['ir.sequence'].next_by_code('saas.subscription') or _('New')
-        return super(SaaSSubscription, self).create(vals)
+        for vals in vals_list:
+            if vals.get('name', _('New')) == _('New'):
+                vals['name'] = self.env['ir.sequence'].next_by_code('saas.subscription') or _('New')
+        return super(SaaSSubscription, self).create(vals_list)
 
     @api.depends('plan_id', 'period')
     def _compute_amount(self):
@@ -196,51 +205,71 @@ class SaaSSubscription(models.Model):
         Activate subscription.
         """
         self.ensure_one()
+        self._activate()
         
-        if self.state != 'draft':
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Subscription Activated'),
+                'message': _('Subscription %s is now active') % self.name,
+                'type': 'success',
+                'sticky': False,
+            }
+        }
+
+    def _activate(self):
+        """
+        Activer des abonnements et reporter leur échéance sur les instances.
+        Activate subscriptions and carry their end date over to the instances.
+        """
+        if any(subscription.state != 'draft' for subscription in self):
             raise UserError(_('Only draft subscriptions can be activated.'))
-        
+
         self.write({'state': 'active'})
-        
+
         # Update instance expiration date
-        if self.instance_id:
-            self.instance_id.write({
+        for subscription in self.filtered('instance_id'):
+            subscription.instance_id.write({
                 'expiration_date': fields.Datetime.from_string(
-                    str(self.end_date) + ' 23:59:59'
+                    str(subscription.end_date) + ' 23:59:59'
                 ),
-                'subscription_id': self.id,
+                'subscription_id': subscription.id,
             })
+
+    def action_renew(self):
+        """
+        Renouveler l'abonnement.
+        Renew subscription.
+        """
+        self.ensure_one()
+        new_subscription = self._renew()
         
         return {
             'type': 'ir.actions.client',
             'tag': 'display_notification',
             'params': {
-                'title': _('Subscription Activated'),
-                'message': _('Subscription %s is now active') % self.name,
+                'title': _('Subscription Renewed'),
+                'message': _('New subscription %s created') % new_subscription.name,
                 'type': 'success',
                 'sticky': False,
             }
         }
 
-    def action_renew(self):
+    def _prepare_renewal_vals(self):
         """
-        Renouveler l'abonnement.
-        Renew subscription.
+        Valeurs de l'abonnement qui succède à celui-ci.
+        Values of the subscription succeeding this one.
         """
         self.ensure_one()
-        
-        if self.state not in ['active', 'expired']:
-            raise UserError(_('Only active or expired subscriptions can be renewed.'))
-        
-        # Create new subscription
         new_start_date = self.end_date + relativedelta(days=1)
-        
+
         if self.period == 'monthly':
             new_end_date = new_start_date + relativedelta(months=1)
         else:  # yearly
             new_end_date = new_start_date + relativedelta(years=1)
-        
-        new_subscription = self.create({
+
+        return {
             'instance_id': self.instance_id.id,
             'plan_id': self.plan_id.id,
             'start_date': new_start_date,
@@ -248,25 +277,33 @@ class SaaSSubscription(models.Model):
             'period': self.period,
             'auto_renew': self.auto_renew,
             'is_trial': False,
-        })
-        
-        # Mark current subscription as expired
-        self.write({'state': 'expired'})
-        
-        # Activate new subscription
-        new_subscription.action_activate()
-        
-        return {
-            'type': 'ir.actions.client',
-            'tag': 'display_notification',
-            'params': {
-                'title': _('Subscription Renewed'),
-                'message': _('New subscription %s created') % new_subscription.name,
-                'type': 'success',
-                'sticky': False,
-            }
         }
 
+    def _renew(self):
+        """
+        Renouveler des abonnements en lot.
+        Renew subscriptions as a batch.
+
+        Successors are created with a single create() call, the renewed
+        subscriptions expired with a single write(), then the successors
+        are activated.
+
+        Returns:
+            saas.subscription: New subscriptions, in the order of self
+        """
+        if any(subscription.state not in ['active', 'expired'] for subscription in self):
+            raise UserError(_('Only active or expired subscriptions can be renewed.'))
+
+        # Create new subscriptions
+        new_subscriptions = self.create([subscription._prepare_renewal_vals() for subscription in self])
+
+        # Mark current subscriptions as expired
+        self.write({'state': 'expired'})
+
+        # Activate new subscriptions
+        new_subscriptions._activate()
+        return new_subscriptions
+
     def action_cancel(self):
         """
         Annuler l'abonnement.
@@ -298,32 +335,78 @@ class SaaSSubscription(models.Model):
         """
         CRON: Renouvellement automatique des abonnements.
         CRON: Automatic renewal of subscriptions.
+
+        Les abonnements sont renouvelés par lots, avec un commit par lot.
+
+        Subscriptions are renewed in chunks of saas.renewal_batch_size, in id
+        order, with a commit per chunk. Each chunk is stamped with
+        auto_renew_checked_date by a single UPDATE in the same transaction,
+        so a run restarted the same day skips the subscriptions already
+        examined. Subscriptions created after the run started (including the
+        successors it creates) are left to the next run. A chunk failing as
+        a whole is retried record by record.
         """
         _logger.info("Running subscription auto-renewal...")
-        
+
+        params = self.env['ir.config_parameter'].sudo()
+        batch_size = int(params.get_param('saas.renewal_batch_size', 500))
+        auto_commit = auto_commit_allowed()
+        today = fields.Date.today()
+
+        self.env.cr.execute("SELECT max(id) FROM saas_subscription")
+        max_id = self.env.cr.fetchone()[0] or 0
+
         # Find subscriptions expiring in the next 7 days with auto_renew
-        expiring_soon = fields.Date.today() + relativedelta(days=7)
-        
-        subscriptions = self.search([
-            ('state', '=', 'active'),
-            ('auto_renew', '=', True),
-            ('end_date', '<=', expiring_soon),
-        ])
-        
-        for subscription in subscriptions:
+        expiring_soon = today + relativedelta(days=7)
+        renewed_count = 0
+        last_id = 0
+
+        while True:
+            chunk = self.search([
+                ('state', '=', 'active'),
+                ('auto_renew', '=', True),
+                ('end_date', '<=', expiring_soon),
+                ('id', '>', last_id),
+                ('id', '<=', max_id),
+                '|', ('auto_renew_checked_date', '=', False), ('auto_renew_checked_date', '<', today),
+            ], limit=batch_size, order='id')
+            if not chunk:
+                break
+
+            # Check payment state before renewing
+            to_renew = chunk.filtered(lambda subscription: subscription.payment_state == 'paid')
+            for subscription in chunk - to_renew:
+                _logger.warning(
+                    f"Subscription {subscription.name} not renewed: payment pending"
+                )
+                # TODO Phase 2: Send payment reminder email
+
             try:
-                # Check payment state before renewing
-                if subscription.payment_state == 'paid':
-                    subscription.action_renew()
-                    _logger.info(f"Subscription {subscription.name} auto-renewed")
-                else:
-                    _logger.warning(
-                        f"Subscription {subscription.name} not renewed: payment pending"
-                    )
-                    # TODO Phase 2: Send payment reminder email
-                    
+                with self.env.cr.savepoint():
+                    to_renew._renew()
+                renewed_count += len(to_renew)
             except Exception as e:
-                _logger.error(f"Auto-renewal failed for {subscription.name}: {str(e)}")
+                _logger.error(f"Auto-renewal failed for a chunk of {len(to_renew)} subscriptions, retrying one by one: {str(e)}")
+                for subscription in to_renew:
+                    try:
+                        with self.env.cr.savepoint():
+                            subscription._renew()
+                        renewed_count += 1
+                    except Exception as e:
+                        _logger.error(f"Auto-renewal failed for {subscription.name}: {str(e)}")
+
+            # Plain SQL: the stamp is committed with the chunk and does not
+            # go through write() (tracking, recomputations) or any cache
+            self.env.cr.execute(
+                "UPDATE saas_subscription SET auto_renew_checked_date = %s WHERE id IN %s",
+                [today, tuple(chunk.ids)]
+            )
+            chunk.invalidate_recordset(['auto_renew_checked_date'])
+            last_id = chunk[-1].id
+            if auto_commit:
+                self.env.cr.commit()
+
+        _logger.info(f"Subscription auto-renewal done: {renewed_count} subscriptions renewed")
 
     def action_view_invoices(self):
         """
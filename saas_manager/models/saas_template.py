@@ -10,11 +10,14 @@ PostgreSQL master database serving as a template for cloning.
 
 import logging
 import json
+import psycopg2
 import requests
 from odoo import api, fields, models, _, tools
 from odoo.exceptions import UserError, ValidationError
 from odoo.tools import config
 
+from ..tools.rpc_client import RpcError
+
 _logger = logging.getLogger(__name__)
 
 
@@ -98,6 +101,41 @@ class SaaSTemplate(models.Model):
         default=True
     )
 
+    # Warm Pool
+    pool_size = fields.Integer(
+        string='Warm Pool Size',
+        default=0,
+        help="Number of pre-cloned spare databases kept ready for provisioning (0 disables the pool)"
+    )
+    spare_ids = fields.One2many(
+        'saas.template.spare',
+        'template_id',
+        string='Spare Databases',
+        help="Pre-cloned databases of this template"
+    )
+    pool_ready_count = fields.Integer(
+        string='Ready Spares',
+        compute='_compute_pool_ready_count',
+        help="Number of spare databases ready to be claimed"
+    )
+    pool_hit_count = fields.Integer(
+        string='Pool Hits',
+        readonly=True,
+        copy=False,
+        help="Provisionings served by a spare database"
+    )
+    pool_miss_count = fields.Integer(
+        string='Pool Misses',
+        readonly=True,
+        copy=False,
+        help="Provisionings which had to clone the template"
+    )
+    pool_hit_rate = fields.Float(
+        string='Pool Hit Rate (%)',
+        compute='_compute_pool_hit_rate',
+        help="Percentage of provisionings served by the warm pool"
+    )
+
     _sql_constraints = [
         ('code_unique', 'UNIQUE(code)', 'Template code must be unique!'),
         ('template_db_unique', 'UNIQUE(template_db)', 'Template database name must be unique!'),
@@ -114,6 +152,83 @@ class SaaSTemplate(models.Model):
                 ('template_id', '=', template.id)
             ])
 
+    @api.depends('spare_ids.state')
+    def _compute_pool_ready_count(self):
+        """
+        Calcule le nombre de bases de réserve prêtes.
+        Compute the number of ready spare databases.
+        """
+        for template in self:
+            template.pool_ready_count = len(template.spare_ids.filtered(lambda spare: spare.state == 'ready'))
+
+    @api.depends('pool_hit_count', 'pool_miss_count')
+    def _compute_pool_hit_rate(self):
+        """
+        Calcule le taux de succès du pool.
+        Compute the warm pool hit rate.
+        """
+        for template in self:
+            total = template.pool_hit_count + template.pool_miss_count
+            template.pool_hit_rate = (template.pool_hit_count / total) * 100 if total else 0.0
+
+    def _record_pool_lookup(self, hit):
+        """
+        Comptabiliser un accès au pool (succès ou échec).
+        Record a warm pool lookup (hit or miss).
+
+        Incremented in SQL so concurrent provisionings never lose a count.
+
+        Args:
+            hit (bool): True if a spare database was claimed
+        """
+        self.ensure_one()
+        column = 'pool_hit_count' if hit else 'pool_miss_count'
+        self.env.cr.execute(
+            f"UPDATE saas_template SET {column} = COALESCE({column}, 0) + 1 WHERE id = %s",
+            [self.id]
+        )
+        self.invalidate_recordset([column])
+
+    def _neutralize_spare_database(self, db_name):
+        """
+        Neutraliser une base de réserve après duplication.
+        Neutralize a spare database after duplication.
+
+        Same neutralization as saas.instance._neutralize_database, which
+        is skipped for instances taken from the warm pool.
+
+        Args:
+            db_name (str): Name of the spare database
+        """
+        self.ensure_one()
+
+        try:
+            self.server_id._pg_neutralize_database(db_name)
+        except psycopg2.Error as e:
+            _logger.exception(f"PostgreSQL error while neutralizing spare database {db_name}")
+            raise UserError(
+                _("Failed to neutralize the spare database %s.\n\nError: %s") % (db_name, str(e))
+            )
+
+    def action_view_spares(self):
+        """
+        Voir les bases de réserve de ce template.
+        View spare databases of this template.
+
+        Returns:
+            dict: Action to display spare databases
+        """
+        self.ensure_one()
+
+        return {
+            'name': _('Spare Databases of %s') % self.name,
+            'type': 'ir.actions.act_window',
+            'res_model': 'saas.template.spare',
+            'view_mode': 'list,form',
+            'domain': [('template_id', '=', self.id)],
+            'context': {'default_template_id': self.id},
+        }
+
     def _create_template_db_via_rpc(self, base_url, db_name, admin_password='admin'):
         """
         Créer une base de données template via l'API RPC jsonrpc2 d'Odoo.
@@ -131,49 +246,28 @@ class SaaSTemplate(models.Model):
             UserError: If RPC call fails
         """
         try:
-            # Endpoint for creating database
-            rpc_url = f"{base_url}/jsonrpc"
-
-            # Payload for creating database
-            payload = {
-                'jsonrpc': '2.0',
-                'method': 'call',
-                'params': {
-                    'service': 'db',
-                    'method': 'create_database',
-                    'args': [
-                        admin_password,  # master password
-                        db_name,  # new database name
-                        False,  # demo data
-                        'en_US',  # language
-                        'admin',  # admin password (new)
-                    ]
-                },
-                'id': 1
-            }
+            client = self.server_id.get_rpc_client()
 
             _logger.info(f"Creating database via RPC: {db_name}")
-            _logger.info(f"RPC URL: {rpc_url}")
-
-            # Make RPC call
-            response = requests.post(
-                rpc_url,
-                json=payload,
+            _logger.info(f"RPC URL: {base_url}/jsonrpc")
+
+            result = client.call(
+                'db', 'create_database',
+                admin_password,  # master password
+                db_name,  # new database name
+                False,  # demo data
+                'en_US',  # language
+                'admin',  # admin password (new)
                 timeout=600
             )
 
-            response.raise_for_status()
-            result = response.json()
-
-            if 'error' in result and result['error']:
-                error_msg = result['error'].get('data', {}).get('message', str(result['error']))
-                raise UserError(
-                    _("RPC Error while creating database.\n\nError: %s") % error_msg
-                )
-
             _logger.info(f"Database created successfully via RPC: {db_name}")
             return result
 
+        except RpcError as e:
+            raise UserError(
+                _("RPC Error while creating database.\n\nError: %s") % str(e)
+            )
         except requests.exceptions.RequestException as e:
             _logger.exception("Request error during RPC call")
             raise UserError(
@@ -187,128 +281,137 @@ class SaaSTemplate(models.Model):
                 _("Error creating database via RPC.\n\nError: %s") % str(e)
             )
 
-    def _install_modules_via_rpc(self, base_url, db_name, modules_to_install, admin_login='admin', admin_password='admin'):
+    def _install_modules_via_rpc(self, base_url, db_name, modules_to_install, admin_login='admin',
+                                 admin_password='admin', batch=True):
         """
         Installer les modules dans la base de données via l'API RPC.
         Install modules in the database via RPC API.
 
+        En mode batch, les modules sont recherchés en un seul appel puis
+        installés ensemble (une seule reconstruction du registre).
+
+        In batch mode, modules are resolved with a single search and
+        installed together with one button_immediate_install, so the target
+        server rebuilds its registry once instead of once per module. If the
+        batch install fails, modules are installed one by one to isolate the
+        faulty ones.
+
         Args:
             base_url (str): Base URL of the Odoo instance
             db_name (str): Database name
             modules_to_install (list): List of module names to install
             admin_login (str): Admin login username
             admin_password (str): Admin password
+            batch (bool): Install all modules in a single call
 
         Returns:
-            dict: Response from RPC call
+            dict: Report with 'status' and the module names per outcome
+                ('installed', 'already_installed', 'not_found', 'failed')
+                plus 'errors' (module name -> error message)
 
         Raises:
             UserError: If module installation fails
         """
         try:
-            rpc_url = f"{base_url}/jsonrpc"
+            client = self.server_id.get_rpc_client()
 
             # Step 1: Authenticate
-            auth_payload = {
-                'jsonrpc': '2.0',
-                'method': 'call',
-                'params': {
-                    'service': 'common',
-                    'method': 'login',
-                    'args': [db_name, admin_login, admin_password]
-                },
-                'id': 1
-            }
-
             _logger.info(f"Authenticating to database {db_name} via RPC")
-            auth_response = requests.post(rpc_url, json=auth_payload, timeout=30)
-            auth_response.raise_for_status()
-            auth_result = auth_response.json()
-
-            if 'error' in auth_result and auth_result['error']:
+            try:
+                user_id = client.login(db_name, admin_login, admin_password)
+            except RpcError as e:
                 raise UserError(
-                    _("Authentication failed via RPC.\n\nError: %s") % str(auth_result['error'])
+                    _("Authentication failed via RPC.\n\nError: %s") % str(e.error or e)
                 )
 
-            user_id = auth_result.get('result', False)
             if not user_id:
                 raise UserError(_("Failed to authenticate to the database via RPC."))
 
             _logger.info(f"Authenticated successfully with user ID: {user_id}")
 
-            # Step 2: Install modules
-            for module_name in modules_to_install:
-                try:
-                    # First, search for the module by name
-                    search_payload = {
-                        'jsonrpc': '2.0',
-                        'method': 'call',
-                        'params': {
-                            'service': 'object',
-                            'method': 'execute_kw',
-                            'args': [
-                                db_name,
-                                user_id,
-                                admin_password,
-                                'ir.module.module',
-                                'search',
-                                [[['name', '=', module_name]]]
-                            ]
-                        },
-                        'id': 1
-                    }
-
-                    _logger.info(f"Searching for module {module_name} via RPC")
-                    search_response = requests.post(rpc_url, json=search_payload, timeout=30)
-                    search_response.raise_for_status()
-                    search_result = search_response.json()
-
-                    if 'error' in search_result and search_result['error']:
-                        _logger.warning(f"Failed to search for module {module_name}: {search_result['error']}")
-                        continue
+            def execute(method, args, timeout=None):
+                return client.execute_kw(
+                    db_name, user_id, admin_password,
+                    'ir.module.module', method, args, timeout=timeout
+                )
 
-                    module_ids = search_result.get('result', [])
-                    if not module_ids:
-                        _logger.warning(f"Module {module_name} not found")
-                        continue
+            report = {
+                'installed': [],
+                'already_installed': [],
+                'not_found': [],
+                'failed': [],
+                'errors': {},
+            }
 
-                    _logger.info(f"Found module {module_name} with IDs: {module_ids}")
-
-                    # Now install the module
-                    install_payload = {
-                        'jsonrpc': '2.0',
-                        'method': 'call',
-                        'params': {
-                            'service': 'object',
-                            'method': 'execute_kw',
-                            'args': [
-                                db_name,
-                                user_id,
-                                admin_password,
-                                'ir.module.module',
-                                'button_install',
-                                [module_ids]  # Pass the list of IDs, not a domain
-                            ]
-                        },
-                        'id': 1
-                    }
-
-                    _logger.info(f"Installing module {module_name} via RPC")
-                    install_response = requests.post(rpc_url, json=install_payload, timeout=300)
-                    install_response.raise_for_status()
-                    install_result = install_response.json()
-
-                    if 'error' in install_result and install_result['error']:
-                        _logger.warning(f"Failed to install module {module_name}: {install_result['error']}")
-                    else:
-                        _logger.info(f"Module {module_name} installed successfully")
+            # Step 2: Resolve all modules in one call
+            _logger.info(f"Searching for {len(modules_to_install)} modules via RPC")
+            modules = execute('search_read', [
+                [['name', 'in', list(modules_to_install)]],
+                ['name', 'state'],
+            ])
+            module_ids = {module['name']: module['id'] for module in modules}
+
+            to_install = []
+            for module in modules:
+                if module['state'] == 'installed':
+                    report['already_installed'].append(module['name'])
+                else:
+                    to_install.append(module['name'])
+            for module_name in modules_to_install:
+                if module_name not in module_ids:
+                    _logger.warning(f"Module {module_name} not found")
+                    report['not_found'].append(module_name)
 
-                except Exception as e:
-                    _logger.warning(f"Error installing module {module_name} via RPC: {str(e)}")
+            # Step 3: Install
+            if to_install:
+                if batch:
+                    try:
+                        _logger.info(f"Installing modules {', '.join(to_install)} via RPC")
+                        execute(
+                            'button_immediate_install',
+                            [[module_ids[name] for name in to_install]],
+                            timeout=1800
+                        )
+                        to_install = []
+                    except RpcError as e:
+                        _logger.warning(
+                            f"Batch module installation failed, installing one by one: {str(e)}"
+                        )
+
+                for module_name in to_install:
+                    try:
+                        _logger.info(f"Installing module {module_name} via RPC")
+                        execute('button_immediate_install', [[module_ids[module_name]]], timeout=300)
+                    except RpcError as e:
+                        _logger.warning(f"Failed to install module {module_name}: {str(e)}")
+                        report['errors'][module_name] = str(e)
 
-            _logger.info("All modules installation completed via RPC")
-            return {'status': 'success'}
+                # Step 4: Report the actual state of each module
+                states = {
+                    module['name']: module['state']
+                    for module in execute('read', [list(module_ids.values()), ['name', 'state']])
+                }
+                for module_name in module_ids:
+                    if module_name in report['already_installed']:
+                        continue
+                    if states.get(module_name) == 'installed':
+                        report['installed'].append(module_name)
+                    else:
+                        report['failed'].append(module_name)
+                        report['errors'].setdefault(
+                            module_name, f"Module state is '{states.get(module_name)}'"
+                        )
+
+            report['status'] = 'error' if report['failed'] else 'success'
+            _logger.info(
+                f"Module installation report for {db_name}: "
+                f"installed={report['installed']}, already_installed={report['already_installed']}, "
+                f"not_found={report['not_found']}, failed={report['failed']}"
+            )
+            return report
 
+        except UserError:
+            raise
         except requests.exceptions.RequestException as e:
             _logger.exception("Request error during module installation via RPC")
             raise UserError(
@@ -364,13 +467,19 @@ class SaaSTemplate(models.Model):
 
             # Step 2: Install base modules via RPC
             modules_to_install = ['base', 'web', 'mail', 'portal']
-            self._install_modules_via_rpc(
+            report = self._install_modules_via_rpc(
                 base_url,
                 template_db_name,
                 modules_to_install,
                 admin_login='admin',
                 admin_password='admin'
             )
+            if report['failed']:
+                raise UserError(
+                    _("Some modules could not be installed in the template database.\n\n%s") % '\n'.join(
+                        f"{name}: {report['errors'].get(name, '')}" for name in report['failed']
+                    )
+                )
 
             # Step 3: Mark template as ready
             self.write({
@@ -451,6 +560,9 @@ class SaaSTemplate(models.Model):
                 _("Template '%s' is not ready. Please create the template database first.") % self.name
             )
 
+        if self.server_id.clone_method == 'native':
+            return self._clone_template_db_native(new_db_name)
+
         try:
             # Get server details
             server = self.server_id
@@ -460,50 +572,25 @@ class SaaSTemplate(models.Model):
             _logger.info(f"Cloning template {self.template_db} to {new_db_name} on server {server.name}")
             _logger.info(f"Using server URL: {base_url}")
 
-            # Endpoint for database operations
-            rpc_url = f"{base_url}/jsonrpc"
-
-            # Payload for duplicating the database
-            # This uses Odoo's built-in database duplication functionality
-            payload = {
-                'jsonrpc': '2.0',
-                'method': 'call',
-                'params': {
-                    'service': 'db',
-                    'method': 'duplicate_database',
-                    'args': [
-                        master_password,      # master password
-                        self.template_db,      # source database name
-                        new_db_name,           # new database name
-                    ]
-                },
-                'id': 1
-            }
-
             _logger.info(f"Duplicating database via RPC: {self.template_db} → {new_db_name}")
 
-            # Make RPC call
-            response = requests.post(
-                rpc_url,
-                json=payload,
+            # This uses Odoo's built-in database duplication functionality
+            server.get_rpc_client().call(
+                'db', 'duplicate_database',
+                master_password,      # master password
+                self.template_db,      # source database name
+                new_db_name,           # new database name
                 timeout=600  # Allow up to 10 minutes for database duplication
             )
 
-            response.raise_for_status()
-            result = response.json()
-
-            # Check for RPC errors
-            if 'error' in result and result['error']:
-                error_data = result['error'].get('data', {})
-                error_msg = error_data.get('message', str(result['error']))
-                _logger.warning(f"RPC Error: {error_msg}")
-                raise UserError(
-                    _("Failed to duplicate database via RPC.\n\nError: %s") % error_msg
-                )
-
             _logger.info(f"Database duplicated successfully: {new_db_name}")
             return True
 
+        except RpcError as e:
+            _logger.warning(f"RPC Error: {str(e)}")
+            raise UserError(
+                _("Failed to duplicate database via RPC.\n\nError: %s") % str(e)
+            )
         except requests.exceptions.Timeout:
             _logger.error(f"Database duplication timed out for {new_db_name}")
             raise UserError(
@@ -526,6 +613,46 @@ class SaaSTemplate(models.Model):
                 _("An unexpected error occurred while cloning the template database.\n\nError: %s") % str(e)
             )
 
+    def _clone_template_db_native(self, new_db_name):
+        """
+        Cloner la base template directement dans PostgreSQL.
+        Clone the template database directly in PostgreSQL.
+
+        Uses CREATE DATABASE ... TEMPLATE on the server database host and
+        hardlinks the filestore, so the Odoo server is not in the data path.
+
+        Args:
+            new_db_name (str): Name of the new database to create
+
+        Returns:
+            bool: True if successful
+
+        Raises:
+            UserError: If cloning fails
+        """
+        self.ensure_one()
+        server = self.server_id
+
+        _logger.info(f"Cloning template {self.template_db} to {new_db_name} natively on server {server.name}")
+
+        try:
+            server._pg_clone_database(self.template_db, new_db_name)
+            return True
+        except psycopg2.Error as e:
+            _logger.exception("PostgreSQL error during native database clone")
+            raise UserError(
+                _("Failed to clone the template database in PostgreSQL.\n\n"
+                  "Host: %s\n\n"
+                  "Error: %s") % (server.db_host, str(e))
+            )
+        except OSError as e:
+            _logger.exception("Filesystem error during filestore copy")
+            raise UserError(
+                _("The filestore of the cloned database could not be copied, the clone was removed.\n\n"
+                  "Data directory: %s\n\n"
+                  "Error: %s") % (server.data_dir, str(e))
+            )
+
     def action_access_template_db(self):
         """
         Ouvrir l'URL pour accéder à la configuration du template.
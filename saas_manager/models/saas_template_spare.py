@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+"""
+SaaS Template Spare Database
+============================
+Pool de bases pré-clonées prêtes à être attribuées aux nouvelles instances.
+Pool of pre-cloned databases ready to be handed to new instances.
+"""
+
+import logging
+import secrets
+from odoo import api, fields, models, _
+from odoo.exceptions import UserError
+
+from ..tools.misc import auto_commit_allowed
+from ..tools.rpc_client import RpcError
+
+_logger = logging.getLogger(__name__)
+
+
+class SaaSTemplateSpare(models.Model):
+    """
+    SaaS Template Spare - Warm Pool Database
+
+    Base de données déjà dupliquée et neutralisée depuis un template.
+    Au provisioning, elle est simplement renommée au nom de l'instance.
+
+    Database already duplicated and neutralized from a template. At
+    provisioning time it is simply renamed to the instance database name.
+    """
+    _name = 'saas.template.spare'
+    _description = 'SaaS Template Spare Database'
+    _order = 'id'
+
+    name = fields.Char(
+        string='Database Name',
+        required=True,
+        readonly=True,
+        help="PostgreSQL name of the spare database"
+    )
+    template_id = fields.Many2one(
+        'saas.template',
+        string='Template',
+        required=True,
+        ondelete='cascade',
+        index=True,
+        help="Template the spare was cloned from"
+    )
+    server_id = fields.Many2one(
+        'saas.server',
+        string='Server',
+        related='template_id.server_id',
+        store=True,
+        index=True,
+        help="Server hosting the spare database"
+    )
+    template_version = fields.Char(
+        string='Template Version',
+        readonly=True,
+        help="Template version at clone time; outdated spares are dropped"
+    )
+    state = fields.Selection([
+        ('building', 'Building'),
+        ('ready', 'Ready'),
+        ('claimed', 'Claimed'),
+        ('failed', 'Failed'),
+    ], string='State', default='building', required=True, index=True)
+    instance_id = fields.Many2one(
+        'saas.instance',
+        string='Claimed By',
+        readonly=True,
+        ondelete='set null',
+        help="Instance which received this database"
+    )
+    date_ready = fields.Datetime(
+        string='Ready Since',
+        readonly=True
+    )
+    error_message = fields.Text(
+        string='Error',
+        readonly=True
+    )
+
+    _sql_constraints = [
+        ('name_unique', 'UNIQUE(name)', 'Spare database name must be unique!'),
+    ]
+
+    # ------------------------------------------------------------------
+    # Claiming
+    # ------------------------------------------------------------------
+
+    @api.model
+    def _claim_spare(self, template):
+        """
+        Réserver une base prête pour un template.
+        Claim a ready spare database for a template.
+
+        Uses SKIP LOCKED so that concurrent provisionings never receive the
+        same spare.
+
+        Args:
+            template (saas.template): Template to claim a spare for
+
+        Returns:
+            saas.template.spare: Claimed spare (empty if the pool is empty)
+        """
+        self.env.cr.execute("""
+            SELECT id FROM saas_template_spare
+             WHERE template_id = %s
+               AND state = 'ready'
+               AND template_version IS NOT DISTINCT FROM %s
+             ORDER BY id
+             LIMIT 1
+               FOR UPDATE SKIP LOCKED
+        """, [template.id, template.template_version])
+        row = self.env.cr.fetchone()
+        return self.browse(row[0]) if row else self.browse()
+
+    def _assign_to_instance(self, instance):
+        """
+        Attribuer la base de réserve à une instance (renommage).
+        Hand the spare database over to an instance (rename).
+
+        Args:
+            instance (saas.instance): Instance receiving the database
+        """
+        self.ensure_one()
+
+        # Mark as claimed before renaming: the spare must never be handed
+        # out twice, even if the rename outcome is unknown
+        self.write({'state': 'claimed', 'instance_id': instance.id})
+        if auto_commit_allowed():
+            self.env.cr.commit()
+
+        try:
+            if self.server_id.clone_method == 'native':
+                self.server_id._pg_rename_database(self.name, instance.database_name)
+            else:
+                self._rpc_db_call('rename', [self.name, instance.database_name], timeout=300)
+        except Exception as e:
+            self.write({'state': 'failed', 'error_message': str(e)})
+            if auto_commit_allowed():
+                self.env.cr.commit()
+            raise
+
+        _logger.info(f"Spare database {self.name} renamed to {instance.database_name}")
+
+    # ------------------------------------------------------------------
+    # Remote database operations
+    # ------------------------------------------------------------------
+
+    def _rpc_db_call(self, method, args, timeout=600):
+        """
+        Appeler le service 'db' du serveur hébergeant la base de réserve.
+        Call the 'db' service of the server hosting the spare.
+
+        Args:
+            method (str): db service method (e.g. 'rename', 'drop')
+            args (list): Arguments after the master password
+            timeout (int): Request timeout in seconds
+
+        Raises:
+            UserError: If the RPC call fails
+        """
+        self.ensure_one()
+        try:
+            return self.server_id.get_rpc_client().db_call(method, *args, timeout=timeout)
+        except RpcError as e:
+            raise UserError(
+                _("RPC Error on spare database %s (%s).\n\nError: %s") % (self.name, method, str(e))
+            )
+
+    def _build(self):
+        """
+        Dupliquer et neutraliser la base de réserve.
+        Duplicate and neutralize the spare database.
+        """
+        self.ensure_one()
+        template = self.template_id
+
+        try:
+            template.clone_template_db(self.name)
+            template._neutralize_spare_database(self.name)
+            self.write({
+                'state': 'ready',
+                'date_ready': fields.Datetime.now(),
+            })
+            _logger.info(f"Spare database {self.name} ready for template {template.name}")
+        except Exception as e:
+            _logger.exception(f"Failed to build spare database {self.name}")
+            self.write({'state': 'failed', 'error_message': str(e)})
+
+    def _drop(self):
+        """
+        Supprimer la base de réserve sur le serveur puis l'enregistrement.
+        Drop the spare database on the server, then the record.
+        """
+        for spare in self:
+            try:
+                spare._rpc_db_call('drop', [spare.name], timeout=300)
+            except Exception as e:
+                # A failed build may not have created the database at all
+                _logger.warning(f"Could not drop spare database {spare.name}: {str(e)}")
+            spare.unlink()
+
+    # ------------------------------------------------------------------
+    # Pool maintenance
+    # ------------------------------------------------------------------
+
+    @api.model
+    def cron_refill_spare_pools(self):
+        """
+        CRON: Maintenir les pools de bases pré-clonées.
+        CRON: Maintain the warm pools of pre-cloned databases.
+
+        1. Drop spares built from an outdated template version or failed
+        2. Build missing spares up to saas.template.pool_size, without
+           exceeding saas.server.spare_pool_limit on each server
+        """
+        _logger.info("Running template warm pool refill...")
+
+        outdated = self.search([('state', 'in', ['ready', 'failed'])]).filtered(
+            lambda spare: spare.state == 'failed'
+            or spare.template_version != spare.template_id.template_version
+            or not spare.template_id.active
+        )
+        if outdated:
+            _logger.info(f"Dropping {len(outdated)} outdated or failed spare databases")
+            outdated._drop()
+            if auto_commit_allowed():
+                self.env.cr.commit()
+
+        templates = self.env['saas.template'].search([
+            ('pool_size', '>', 0),
+            ('is_template_ready', '=', True),
+            ('server_id.state', '=', 'active'),
+        ])
+
+        for template in templates:
+            server = template.server_id
+            server_spares = self.search_count([
+                ('server_id', '=', server.id),
+                ('state', 'in', ['building', 'ready']),
+            ])
+            template_spares = self.search_count([
+                ('template_id', '=', template.id),
+                ('state', 'in', ['building', 'ready']),
+            ])
+            missing = min(
+                template.pool_size - template_spares,
+                server.spare_pool_limit - server_spares,
+            )
+
+            for _index in range(max(missing, 0)):
+                spare = self.create({
+                    'name': f"{template.template_db}_spare_{secrets.token_hex(4)}",
+                    'template_id': template.id,
+                    'template_version': template.template_version,
+                })
+                if auto_commit_allowed():
+                    self.env.cr.commit()
+                spare._build()
+                if auto_commit_allowed():
+                    self.env.cr.commit()
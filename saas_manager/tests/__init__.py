@@ -3,4 +3,5 @@
 
 from . import test_saas_server
 from . import test_saas_template
+from . import test_saas_provisioning
 
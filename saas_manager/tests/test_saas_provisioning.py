@@ -0,0 +1,507 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+"""
+Tests for SaaS Provisioning Jobs
+"""
+
+import threading
+import time
+import psycopg2
+from contextlib import ExitStack, contextmanager
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+from odoo import fields
+from odoo.tests.common import TransactionCase
+from odoo.exceptions import UserError
+
+from odoo.addons.saas_manager.models.saas_instance import SaaSInstance
+from odoo.addons.saas_manager.models.saas_server import SaaSServer
+
+
+class TestSaaSProvisioning(TransactionCase):
+    """Test cases for saas.provisioning.job model"""
+
+    def setUp(self):
+        """Set up test data"""
+        super().setUp()
+
+        self.server = self.env['saas.server'].create({
+            'name': 'Provisioning Server',
+            'code': 'prov-server',
+            'server_url': 'http://prov.localhost:8069',
+            'max_instances': 100,
+            'state': 'active',
+        })
+        self.template = self.env['saas.template'].create({
+            'name': 'Provisioning Template',
+            'code': 'prov-template',
+            'template_db': 'prov_template_db',
+            'server_id': self.server.id,
+            'is_template_ready': True,
+        })
+        self.plan = self.env['saas.plan'].create({
+            'name': 'Provisioning Plan',
+            'code': 'prov-plan',
+        })
+        self.partner = self.env['res.partner'].create({
+            'name': 'Provisioning Partner',
+        })
+        self.instance = self.env['saas.instance'].create({
+            'name': 'Provisioning Instance',
+            'database_name': 'prov_instance',
+            'subdomain': 'prov',
+            'template_id': self.template.id,
+            'plan_id': self.plan.id,
+            'server_id': self.server.id,
+            'partner_id': self.partner.id,
+        })
+
+    @contextmanager
+    def _patch_remote_steps(self, **overrides):
+        """Patch the pipeline steps that talk to remote servers"""
+        steps = {
+            '_clone_template_database': lambda self: True,
+            '_neutralize_database': lambda self: True,
+            '_create_client_admin': lambda self: True,
+            '_send_provisioning_email': lambda self: True,
+        }
+        steps.update(overrides)
+        with ExitStack() as stack:
+            for name, func in steps.items():
+                stack.enter_context(patch.object(SaaSInstance, name, func))
+            yield
+
+    def _run_jobs(self, **overrides):
+        """Run the provisioning worker with the remote steps patched"""
+        with self._patch_remote_steps(**overrides):
+            self.env['saas.provisioning.job'].cron_process_provisioning_jobs()
+
+    def test_provision_enqueues_job(self):
+        """Test that provisioning only enqueues a job"""
+        self.instance.action_provision_instance()
+
+        self.assertEqual(self.instance.state, 'provisioning')
+        self.assertEqual(len(self.instance.provisioning_job_ids), 1)
+        job = self.instance.provisioning_job_id
+        self.assertEqual(job.state, 'queued')
+        self.assertNotEqual(job.name, 'New')
+
+    def test_provision_requires_draft(self):
+        """Test that only draft instances can be provisioned"""
+        self.instance.action_provision_instance()
+        with self.assertRaises(UserError):
+            self.instance.action_provision_instance()
+
+    def test_worker_runs_pipeline(self):
+        """Test that the worker runs every step and activates the instance"""
+        self.instance.action_provision_instance()
+        self._run_jobs()
+
+        job = self.instance.provisioning_job_id
+        self.assertEqual(job.state, 'done')
+        self.assertEqual(job.progress, 100)
+        self.assertEqual(self.instance.state, 'active')
+        self.assertTrue(self.instance.activation_date)
+
+    def test_worker_records_failure(self):
+        """Test that a failing step marks the job as failed"""
+        def fail(self):
+            raise UserError('RPC unreachable')
+
+        self.instance.action_provision_instance()
+        self._run_jobs(_create_client_admin=fail)
+
+        job = self.instance.provisioning_job_id
+        self.assertEqual(job.state, 'failed')
+        self.assertEqual(job.step, 'admin')
+        self.assertIn('RPC unreachable', job.error_message)
+
+    def test_failure_keeps_checkpoint(self):
+        """Test that a failure keeps the instance and its completed steps"""
+        def fail(self):
+            raise UserError('RPC unreachable')
+
+        self.instance.action_provision_instance()
+        self._run_jobs(_create_client_admin=fail)
+
+        self.assertEqual(self.instance.state, 'provisioning')
+        self.assertEqual(self.instance.provisioning_checkpoint, 'customize')
+
+    def test_retry_resumes_from_checkpoint(self):
+        """Test that a retry skips the steps already completed"""
+        def fail(self):
+            raise UserError('RPC unreachable')
+
+        def clone_again(self):
+            raise AssertionError('Template database cloned twice')
+
+        self.instance.action_provision_instance()
+        self._run_jobs(_create_client_admin=fail)
+
+        self.instance.provisioning_job_id.action_retry()
+        self.assertEqual(len(self.instance.provisioning_job_ids), 2)
+
+        self._run_jobs(_clone_template_database=clone_again)
+
+        self.assertEqual(self.instance.provisioning_job_id.state, 'done')
+        self.assertEqual(self.instance.provisioning_checkpoint, 'email')
+        self.assertEqual(self.instance.state, 'active')
+
+    def test_retry_after_activation(self):
+        """Test that a step failing after activation can be retried"""
+        def fail(self):
+            raise UserError('SMTP unreachable')
+
+        self.instance.action_provision_instance()
+        self._run_jobs(_send_provisioning_email=fail)
+
+        self.assertEqual(self.instance.provisioning_job_id.state, 'failed')
+        self.assertEqual(self.instance.state, 'active')
+        self.assertEqual(self.instance.provisioning_checkpoint, 'activate')
+
+        self.instance.provisioning_job_id.action_retry()
+        self._run_jobs()
+
+        self.assertEqual(self.instance.provisioning_job_id.state, 'done')
+        self.assertEqual(self.instance.provisioning_checkpoint, 'email')
+
+    def test_requeue_uses_heartbeat(self):
+        """Test that only jobs without a recent heartbeat are requeued"""
+        self.instance.action_provision_instance()
+        job = self.instance.provisioning_job_id
+        long_ago = fields.Datetime.now() - timedelta(hours=3)
+        job.write({'state': 'running', 'date_started': long_ago, 'heartbeat': fields.Datetime.now()})
+
+        Job = self.env['saas.provisioning.job']
+        self.assertFalse(Job._requeue_stale_jobs())
+        self.assertEqual(job.state, 'running')
+
+        job.heartbeat = long_ago
+        self.assertEqual(Job._requeue_stale_jobs(), job)
+        self.assertEqual(job.state, 'queued')
+
+    def test_warm_pool_hit(self):
+        """Test that provisioning takes a ready spare database"""
+        self.template.pool_size = 1
+        spare = self.env['saas.template.spare'].create({
+            'name': 'prov_template_db_spare_test',
+            'template_id': self.template.id,
+            'template_version': self.template.template_version,
+            'state': 'ready',
+        })
+
+        with patch.object(type(spare), '_rpc_db_call', lambda self, method, args, timeout=600: True):
+            self.instance._clone_template_database()
+
+        self.assertEqual(spare.state, 'claimed')
+        self.assertEqual(spare.instance_id, self.instance)
+        self.assertTrue(self.instance.from_warm_pool)
+        self.assertEqual(self.template.pool_hit_count, 1)
+        self.assertEqual(self.template.pool_hit_rate, 100.0)
+
+    def test_spare_neutralized_before_ready(self):
+        """Test that a spare is neutralized before it can be claimed"""
+        spare = self.env['saas.template.spare'].create({
+            'name': 'prov_template_db_spare_build',
+            'template_id': self.template.id,
+            'template_version': self.template.template_version,
+        })
+        neutralized = []
+
+        def neutralize(server, db_name):
+            self.assertEqual(spare.state, 'building')
+            neutralized.append(db_name)
+
+        with patch.object(type(self.template), 'clone_template_db', lambda self, new_db_name: True), \
+                patch.object(SaaSServer, '_pg_neutralize_database', neutralize):
+            spare._build()
+
+        self.assertEqual(neutralized, ['prov_template_db_spare_build'])
+        self.assertEqual(spare.state, 'ready')
+
+    def test_spare_not_ready_when_neutralization_fails(self):
+        """Test that a spare failing neutralization is never handed out"""
+        spare = self.env['saas.template.spare'].create({
+            'name': 'prov_template_db_spare_broken',
+            'template_id': self.template.id,
+            'template_version': self.template.template_version,
+        })
+
+        def neutralize(server, db_name):
+            raise psycopg2.OperationalError('connection refused')
+
+        with patch.object(type(self.template), 'clone_template_db', lambda self, new_db_name: True), \
+                patch.object(SaaSServer, '_pg_neutralize_database', neutralize):
+            spare._build()
+
+        self.assertEqual(spare.state, 'failed')
+        self.assertIn('connection refused', spare.error_message)
+        self.assertFalse(self.env['saas.template.spare']._claim_spare(self.template))
+
+    def test_warm_pool_miss(self):
+        """Test that an empty pool falls back to cloning the template"""
+        self.template.pool_size = 1
+        cloned = []
+
+        def clone(self, new_db_name):
+            cloned.append(new_db_name)
+            return True
+
+        with patch.object(type(self.template), 'clone_template_db', clone):
+            self.instance._clone_template_database()
+
+        self.assertEqual(cloned, ['prov_instance'])
+        self.assertFalse(self.instance.from_warm_pool)
+        self.assertEqual(self.template.pool_miss_count, 1)
+
+    def _mock_pg_server(self, users):
+        """Mocked _pg_connect of a server whose databases have `users` internal users"""
+        connections = []
+
+        def pg_connect(server, dbname='postgres'):
+            connection = MagicMock()
+            cr = connection.cursor.return_value.__enter__.return_value
+            cr.fetchall.return_value = [(name,) for name in users]
+            cr.fetchone.return_value = (users.get(dbname),)
+            connections.append(dbname)
+            return connection
+
+        return patch.object(SaaSServer, '_pg_connect', pg_connect), connections
+
+    def test_user_limit_check(self):
+        """Test that collected user counts are stored and alerted once per crossing"""
+        self.instance.state = 'active'
+        self.plan.user_limit = 10
+        pg_connect, connections = self._mock_pg_server({'prov_instance': 12})
+
+        with pg_connect:
+            self.env['saas.instance'].cron_check_user_limits()
+
+        self.assertEqual(connections, ['postgres', 'prov_instance'])
+        self.assertEqual(self.instance.current_users, 12)
+        self.assertTrue(self.instance.current_users_date)
+        self.assertTrue(self.instance.user_limit_exceeded)
+        alerts = self.instance.message_ids.filtered(lambda message: 'User limit exceeded' in (message.body or ''))
+        self.assertEqual(len(alerts), 1)
+
+        # Still over the limit: no new alert
+        with pg_connect:
+            self.env['saas.instance'].cron_check_user_limits()
+        alerts = self.instance.message_ids.filtered(lambda message: 'User limit exceeded' in (message.body or ''))
+        self.assertEqual(len(alerts), 1)
+
+        # Back under the limit, then over again: alerted again
+        pg_connect, _connections = self._mock_pg_server({'prov_instance': 8})
+        with pg_connect:
+            self.env['saas.instance'].cron_check_user_limits()
+        self.assertFalse(self.instance.user_limit_exceeded)
+        pg_connect, _connections = self._mock_pg_server({'prov_instance': 11})
+        with pg_connect:
+            self.env['saas.instance'].cron_check_user_limits()
+        alerts = self.instance.message_ids.filtered(lambda message: 'User limit exceeded' in (message.body or ''))
+        self.assertEqual(len(alerts), 2)
+
+    def test_user_count_unreachable_server(self):
+        """Test that an unreachable server costs a single connection attempt"""
+        self.instance.state = 'active'
+        self.env['saas.instance'].create({
+            'name': 'Second Instance',
+            'database_name': 'prov_second',
+            'subdomain': 'prov-second',
+            'template_id': self.template.id,
+            'plan_id': self.plan.id,
+            'server_id': self.server.id,
+            'partner_id': self.partner.id,
+            'state': 'active',
+        })
+        attempts = []
+
+        def pg_connect(server, dbname='postgres'):
+            attempts.append(dbname)
+            raise psycopg2.OperationalError('timeout expired')
+
+        with patch.object(SaaSServer, '_pg_connect', pg_connect):
+            self.assertEqual(self.server._collect_instance_users(), {})
+
+        self.assertEqual(attempts, ['postgres'])
+        self.assertFalse(self.instance.current_users_date)
+
+    def test_expiry_in_chunks(self):
+        """Test that expired instances are processed in chunks with queued emails"""
+        self.env['ir.config_parameter'].sudo().set_param('saas.expiry_batch_size', 1)
+        self.partner.email = 'customer@example.com'
+        other = self.env['saas.instance'].create({
+            'name': 'Expiring Instance',
+            'database_name': 'prov_expiring',
+            'subdomain': 'prov-expiring',
+            'template_id': self.template.id,
+            'plan_id': self.plan.id,
+            'server_id': self.server.id,
+            'partner_id': self.partner.id,
+        })
+        (self.instance | other).write({
+            'state': 'active',
+            'expiration_date': fields.Datetime.now() - timedelta(days=1),
+        })
+        mail_count = self.env['mail.mail'].search_count([])
+
+        self.env['saas.instance'].cron_check_subscription_expiry()
+
+        self.assertEqual(self.instance.state, 'expired')
+        self.assertEqual(other.state, 'expired')
+        self.assertEqual(self.env['mail.mail'].search_count([]), mail_count + 2)
+
+    def test_auto_renew_in_chunks(self):
+        """Test that paid subscriptions are renewed in chunks and examined once a day"""
+        self.env['ir.config_parameter'].sudo().set_param('saas.renewal_batch_size', 1)
+        today = fields.Date.today()
+        subscriptions = self.env['saas.subscription'].create([{
+            'instance_id': self.instance.id,
+            'plan_id': self.plan.id,
+            'start_date': today - timedelta(days=30),
+            'end_date': today,
+            'state': 'active',
+            'payment_state': payment_state,
+        } for payment_state in ['paid', 'pending']])
+        paid, pending = subscriptions
+
+        self.env['saas.subscription'].cron_auto_renew()
+
+        self.assertEqual(paid.state, 'expired')
+        self.assertEqual(pending.state, 'active')
+        successor = self.instance.subscription_id
+        self.assertEqual(successor.state, 'active')
+        self.assertEqual(successor.start_date, today + timedelta(days=1))
+        self.assertEqual(paid.auto_renew_checked_date, today)
+        self.assertEqual(pending.auto_renew_checked_date, today)
+        self.assertFalse(self.env['ir.config_parameter'].sudo().get_param('saas.renewal_high_water_mark'))
+
+        # A rerun the same day skips the subscriptions already examined
+        pending.payment_state = 'paid'
+        self.env['saas.subscription'].cron_auto_renew()
+        self.assertEqual(pending.state, 'active')
+        self.assertEqual(self.instance.subscription_id, successor)
+
+        # The next day, they are examined again
+        pending.auto_renew_checked_date = today - timedelta(days=1)
+        self.env['saas.subscription'].cron_auto_renew()
+        self.assertEqual(pending.state, 'expired')
+
+    def test_monitor_flags_unhealthy_instances(self):
+        """Test that monitoring stores probe results and flags failing instances"""
+        self.instance.state = 'active'
+
+        def probe(url, database_name, pg_params, verify=True, timeout=10):
+            return {'healthy': False, 'http_status': 503, 'latency_ms': 5.0,
+                    'db_latency_ms': 1.0, 'message': 'HTTP 503'}
+
+        with patch('odoo.addons.saas_manager.models.saas_instance._probe_instance', probe):
+            self.env['saas.instance'].cron_monitor_instances()
+
+        self.assertEqual(self.instance.health_state, 'unhealthy')
+        self.assertEqual(self.instance.health_http_status, 503)
+        self.assertTrue(self.instance.health_check_date)
+        self.assertIn('HTTP 503', self.instance.message_ids[0].body)
+
+    def _monitor_with_response(self, status_code, landed_url):
+        """Run the monitoring cron with a stubbed HTTP response and database"""
+        response = MagicMock(status_code=status_code, url=landed_url)
+        with patch('odoo.addons.saas_manager.models.saas_instance.requests.get', return_value=response) as get, \
+                patch('odoo.addons.saas_manager.models.saas_instance.psycopg2.connect'):
+            self.env['saas.instance'].cron_monitor_instances()
+        return get
+
+    def test_monitor_probes_tenant_hostname(self):
+        """Test that the probe requests the tenant hostname and accepts the ensure_db redirect"""
+        self.instance.write({'state': 'active', 'protocol': 'https'})
+        url = f"https://{self.instance.domain}"
+
+        get = self._monitor_with_response(200, f"{url}/web/login?db=prov_instance")
+
+        get.assert_called_once()
+        self.assertEqual(get.call_args.args[0], f"{url}/web/login")
+        self.assertTrue(get.call_args.kwargs['allow_redirects'])
+        self.assertEqual(self.instance.health_state, 'healthy')
+        self.assertEqual(self.instance.health_http_status, 200)
+
+    def test_monitor_rejects_database_selector(self):
+        """Test that a tenant redirected to another database or the selector is unhealthy"""
+        self.instance.write({'state': 'active', 'protocol': 'https'})
+        url = f"https://{self.instance.domain}"
+
+        self._monitor_with_response(200, f"{url}/web/database/selector")
+        self.assertEqual(self.instance.health_state, 'unhealthy')
+        self.assertIn('database manager', self.instance.health_message)
+
+        self._monitor_with_response(200, f"{url}/web/login?db=other_db")
+        self.assertEqual(self.instance.health_state, 'unhealthy')
+        self.assertIn('Redirected', self.instance.health_message)
+
+    def test_monitor_bounded_per_server(self):
+        """Test that concurrent probes on a server never exceed the per-server limit"""
+        self.env['ir.config_parameter'].sudo().set_param('saas.monitor_workers_per_server', 2)
+        instances = self.instance
+        for index in range(5):
+            instances |= self.env['saas.instance'].create({
+                'name': f'Monitored Instance {index}',
+                'database_name': f'prov_monitored_{index}',
+                'subdomain': f'prov-monitored-{index}',
+                'template_id': self.template.id,
+                'plan_id': self.plan.id,
+                'server_id': self.server.id,
+                'partner_id': self.partner.id,
+            })
+        instances.write({'state': 'active'})
+        lock = threading.Lock()
+        running = []
+        peak = []
+
+        def probe(url, database_name, pg_params, verify=True, timeout=10):
+            with lock:
+                running.append(database_name)
+                peak.append(len(running))
+            time.sleep(0.05)
+            with lock:
+                running.remove(database_name)
+            return {'healthy': True, 'http_status': 200, 'message': ''}
+
+        with patch('odoo.addons.saas_manager.models.saas_instance._probe_instance', probe):
+            self.env['saas.instance'].cron_monitor_instances()
+
+        self.assertEqual(len(peak), 6)
+        self.assertLessEqual(max(peak), 2)
+        self.assertEqual(set(instances.mapped('health_state')), {'healthy'})
+
+    def test_domain_exact_lookup(self):
+        """Test that domains are stored lowercase and resolved by exact match"""
+        base_domain = self.env['ir.config_parameter'].sudo().get_param('saas.base_domain', 'example.com')
+        other = self.env['saas.instance'].create({
+            'name': 'Prefixed Instance',
+            'database_name': 'prov_corp',
+            'subdomain': 'Prov-Corp',
+            'template_id': self.template.id,
+            'plan_id': self.plan.id,
+            'server_id': self.server.id,
+            'partner_id': self.partner.id,
+        })
+
+        self.assertEqual(other.domain, f"prov-corp.{base_domain}".lower())
+        Instance = self.env['saas.instance']
+        self.assertEqual(Instance.search([('domain', '=', f"prov.{base_domain}".lower())]), self.instance)
+
+        # Subdomains are stored lowercase, so case variants cannot share a hostname
+        self.assertEqual(other.subdomain, 'prov-corp')
+        other.subdomain = 'Prov-Other'
+        self.assertEqual(other.subdomain, 'prov-other')
+        with self.assertRaises(Exception):
+            Instance.create({
+                'name': 'Case Variant',
+                'database_name': 'prov_case',
+                'subdomain': 'PROV',
+                'template_id': self.template.id,
+                'plan_id': self.plan.id,
+                'server_id': self.server.id,
+                'partner_id': self.partner.id,
+            })
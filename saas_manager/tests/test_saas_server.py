@@ -5,9 +5,20 @@
 Tests for SaaS Server Model
 """
 
+import os
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+from psycopg2 import errors as pg_errors, sql
+
 from odoo.tests.common import TransactionCase
 from odoo.exceptions import UserError, ValidationError
 
+from odoo.addons.saas_manager.models.saas_server import NEUTRALIZE_QUERIES, _directory_size
+from odoo.addons.saas_manager.tools.rpc_client import RpcError
+
 
 class TestSaaSServer(TransactionCase):
     """Test cases for saas.server model"""
@@ -79,6 +90,39 @@ class TestSaaSServer(TransactionCase):
                 'max_instances': 0,
             })
 
+    def test_native_clone_requires_data_dir(self):
+        """Test that native cloning requires the server data directory"""
+        with self.assertRaises(ValidationError):
+            self.server.clone_method = 'native'
+
+        self.server.write({'clone_method': 'native', 'data_dir': '/var/lib/odoo'})
+        self.assertEqual(
+            self.server._get_filestore_path('client_db'),
+            '/var/lib/odoo/filestore/client_db'
+        )
+
+    def test_rpc_client_shares_session(self):
+        """Test that RPC clients of a server reuse the same pooled session"""
+        client = self.server.get_rpc_client()
+        self.assertIs(client.session, self.server.get_rpc_client().session)
+        self.assertEqual(client.timeout, self.server.rpc_timeout)
+
+        # A configuration change gets its own session
+        self.server.rpc_verify_ssl = not self.server.rpc_verify_ssl
+        self.assertIsNot(client.session, self.server.get_rpc_client().session)
+
+    def test_rpc_client_error(self):
+        """Test that JSON-RPC errors are raised as RpcError"""
+        client = self.server.get_rpc_client()
+        response = MagicMock()
+        response.json.return_value = {'error': {'data': {'message': 'Access Denied'}}}
+
+        with patch.object(client.session, 'post', return_value=response):
+            with self.assertRaises(RpcError) as error:
+                client.db_call('drop', 'client_db')
+
+        self.assertEqual(str(error.exception), 'Access Denied')
+
     def test_instance_count_compute(self):
         """Test that instance count is computed correctly"""
         # Create instances
@@ -123,6 +167,12 @@ class TestSaaSServer(TransactionCase):
 
         # Check instance count
         self.assertEqual(self.server.instance_count, 2)
+        self.assertEqual(self.server.available_capacity, 98.0)
+
+        # Terminated instances free their slot
+        instance2.state = 'terminated'
+        self.assertEqual(self.server.instance_count, 1)
+        self.assertEqual(self.server.available_capacity, 99.0)
 
     def test_available_capacity_compute(self):
         """Test that available capacity is computed correctly"""
@@ -256,3 +306,502 @@ class TestSaaSServer(TransactionCase):
         with self.assertRaises(UserError):
             self.env['saas.server'].get_available_server(min_capacity_percent=20)
 
+
+    def test_health_cron_probes_in_parallel(self):
+        """Test that the health cron probes servers concurrently and stores results"""
+        self.server.state = 'active'
+        other = self.env['saas.server'].create({
+            'name': 'Unreachable Server',
+            'code': 'unreachable-server',
+            'server_url': 'http://unreachable.localhost:8069',
+            'state': 'active',
+        })
+
+        def probe(client, server_name, timeout=10):
+            return server_name == 'Test Server'
+
+        with patch('odoo.addons.saas_manager.models.saas_server._probe_health', probe):
+            self.env['saas.server'].cron_check_all_servers_health()
+
+        self.assertEqual(self.server.state, 'active')
+        self.assertEqual(self.server.health_status, 'healthy')
+        # A single failure only degrades the server
+        self.assertEqual(other.state, 'degraded')
+        self.assertEqual(other.health_status, 'warning')
+        self.assertEqual(other.consecutive_failures, 1)
+        self.assertTrue(other.last_check_date)
+
+    def test_health_cron_deadline(self):
+        """Test that probes exceeding the global deadline count as failed"""
+        self.server.state = 'active'
+        self.env['ir.config_parameter'].sudo().set_param('saas.health_check_deadline', 0.1)
+        release = threading.Event()
+
+        def probe(client, server_name, timeout=10):
+            release.wait(5)
+            return True
+
+        try:
+            with patch('odoo.addons.saas_manager.models.saas_server._probe_health', probe):
+                self.env['saas.server'].cron_check_all_servers_health()
+        finally:
+            release.set()
+
+        self.assertEqual(self.server.state, 'degraded')
+
+    def test_health_cron_slow_resources(self):
+        """Test that slow resource probes do not mark an answering server offline"""
+        self.server.state = 'active'
+        params = self.env['ir.config_parameter'].sudo()
+        params.set_param('saas.health_check_deadline', 5)
+        params.set_param('saas.resource_probe_deadline', 0.1)
+        release = threading.Event()
+
+        def probe_resources(server_name, pg_params, data_dir):
+            release.wait(5)
+            return {'db_connections': 12}
+
+        try:
+            with patch('odoo.addons.saas_manager.models.saas_server._probe_health', lambda client, name: True), \
+                    patch('odoo.addons.saas_manager.models.saas_server._probe_resources', probe_resources):
+                self.env['saas.server'].cron_check_all_servers_health()
+        finally:
+            release.set()
+
+        self.assertEqual(self.server.state, 'active')
+        self.assertEqual(self.server.consecutive_successes, 1)
+        self.assertEqual(self.server.metric_ids.availability, 100.0)
+        self.assertFalse(self.server.metric_ids.db_connections)
+
+    def test_health_check_records_metrics(self):
+        """Test that each health probe is stored in the metrics history"""
+        def probe(client, server_name, pg_params, data_dir):
+            return {'online': True, 'latency_ms': 42.0, 'db_connections': 12, 'disk_used_percent': 61.5}
+
+        with patch('odoo.addons.saas_manager.models.saas_server._probe_server', probe):
+            self.server.action_check_health()
+
+        metric = self.server.metric_ids
+        self.assertEqual(len(metric), 1)
+        self.assertEqual(metric.resolution, 'raw')
+        self.assertEqual(metric.availability, 100.0)
+        self.assertEqual(self.server.last_latency_ms, 42.0)
+        self.assertEqual(self.server.last_db_connections, 12)
+        self.assertEqual(self.server.last_disk_used_percent, 61.5)
+
+    def test_metrics_downsampling(self):
+        """Test that old raw metrics are aggregated into hourly rows"""
+        Metric = self.env['saas.server.metric']
+        old = datetime.now().replace(minute=0, second=0, microsecond=0) - timedelta(days=10)
+        Metric.create([
+            {'server_id': self.server.id, 'date': old + timedelta(minutes=5),
+             'availability': 100.0, 'latency_ms': 100.0, 'db_connections': 10},
+            {'server_id': self.server.id, 'date': old + timedelta(minutes=20),
+             'availability': 0.0, 'latency_ms': 0.0, 'db_connections': 0},
+            {'server_id': self.server.id, 'date': old + timedelta(minutes=35),
+             'availability': 100.0, 'latency_ms': 200.0, 'db_connections': 30},
+        ])
+        recent = Metric.create({'server_id': self.server.id, 'availability': 100.0})
+
+        Metric.cron_downsample_metrics()
+
+        hourly = self.server.metric_ids.filtered(lambda m: m.resolution == 'hour')
+        self.assertEqual(len(hourly), 1)
+        self.assertEqual(hourly.date, old)
+        self.assertEqual(hourly.sample_count, 3)
+        self.assertAlmostEqual(hourly.availability, 200.0 / 3)
+        self.assertEqual(hourly.latency_ms, 150.0)
+        self.assertEqual(hourly.db_connections, 30)
+        self.assertEqual(self.server.metric_ids.filtered(lambda m: m.resolution == 'raw'), recent)
+
+    def test_health_hysteresis(self):
+        """Test failure and recovery thresholds of server state transitions"""
+        self.server.write({'state': 'active', 'failure_threshold': 3, 'recovery_threshold': 2})
+
+        def check(online):
+            self.server._apply_health_results({self.server.id: {'online': online}})
+
+        check(False)
+        self.assertEqual(self.server.state, 'degraded')
+        self.assertTrue(self.server.is_online)
+        check(True)
+        check(False)
+        check(False)
+        self.assertEqual(self.server.state, 'degraded')
+        check(False)
+        self.assertEqual(self.server.state, 'offline')
+        self.assertEqual(self.server.health_status, 'critical')
+
+        check(True)
+        self.assertEqual(self.server.state, 'offline')
+        check(True)
+        self.assertEqual(self.server.state, 'active')
+        self.assertEqual(self.server.health_status, 'healthy')
+
+    def test_health_check_keeps_maintenance(self):
+        """Test that health probes do not change the state of a server in maintenance"""
+        self.server.state = 'maintenance'
+        self.server._apply_health_results({self.server.id: {'online': True}})
+        self.assertEqual(self.server.state, 'maintenance')
+        self.server._apply_health_results({self.server.id: {'online': False}})
+        self.assertEqual(self.server.state, 'maintenance')
+        self.assertEqual(self.server.health_status, 'critical')
+
+    def test_degraded_server_stays_available(self):
+        """Test that a degraded server is still used for placement"""
+        self.server.state = 'degraded'
+        available = self.env['saas.server'].get_available_server(min_capacity_percent=20)
+        self.assertEqual(available, self.server)
+
+    def _create_placement_servers(self):
+        """Create a small busy server and a large empty one"""
+        self.server.write({'state': 'active', 'cpu_cores': 4, 'memory_gb': 8, 'disk_gb': 100})
+        plan = self.env['saas.plan'].create({
+            'name': 'Placement Plan',
+            'code': 'placement-plan',
+            'user_limit': 10,
+            'storage_limit': 40.0,
+        })
+        template = self.env['saas.template'].create({
+            'name': 'Placement Template',
+            'code': 'placement-template',
+            'template_db': 'placement_template_db',
+            'server_id': self.server.id,
+        })
+        partner = self.env['res.partner'].create({'name': 'Placement Partner'})
+        self.env['saas.instance'].create({
+            'name': 'Placed Instance',
+            'database_name': 'placed_instance',
+            'subdomain': 'placed',
+            'template_id': template.id,
+            'plan_id': plan.id,
+            'server_id': self.server.id,
+            'partner_id': partner.id,
+        })
+        large = self.env['saas.server'].create({
+            'name': 'Large Server',
+            'code': 'large-server',
+            'server_url': 'http://large.localhost:8069',
+            'state': 'active',
+            'cpu_cores': 32,
+            'memory_gb': 128,
+            'disk_gb': 2000,
+        })
+        return plan, template, large
+
+    def test_placement_spread(self):
+        """Test that the spread strategy picks the server with most headroom"""
+        plan, template, large = self._create_placement_servers()
+        server = self.env['saas.server'].get_available_server(plan=plan, strategy='spread')
+        self.assertEqual(server, large)
+
+    def test_placement_binpack(self):
+        """Test that bin-packing fills the busiest server that still fits"""
+        plan, template, large = self._create_placement_servers()
+        server = self.env['saas.server'].get_available_server(plan=plan, strategy='binpack')
+        self.assertEqual(server, self.server)
+
+        # A plan that no longer fits the small server goes to the large one
+        # once the small server enforces its resource capacity
+        plan.storage_limit = 80.0
+        server = self.env['saas.server'].get_available_server(plan=plan, strategy='binpack')
+        self.assertEqual(server, self.server)
+        self.server.enforce_resource_capacity = True
+        server = self.env['saas.server'].get_available_server(plan=plan, strategy='binpack')
+        self.assertEqual(server, large)
+
+    def test_placement_affinity(self):
+        """Test that the affinity strategy prefers the template server"""
+        plan, template, large = self._create_placement_servers()
+        server = self.env['saas.server'].get_available_server(
+            plan=plan, template=template, strategy='affinity'
+        )
+        self.assertEqual(server, self.server)
+
+    def test_placement_template_server(self):
+        """Test that instances of a template are placed on the template server"""
+        plan, template, large = self._create_placement_servers()
+        Server = self.env['saas.server']
+        for strategy in ('spread', 'binpack'):
+            server = Server.get_available_server(plan=plan, template=template, strategy=strategy)
+            self.assertEqual(server, self.server)
+
+        # The larger server cannot clone the template: no fallback on it
+        self.server.max_instances = 1
+        with self.assertRaisesRegex(UserError, 'Placement Template'):
+            Server.get_available_server(plan=plan, template=template, strategy='spread')
+
+    def test_placement_seeded_data(self):
+        """Test that the seeded server hosts the seeded plans beyond its projected resources"""
+        seeded = self.env.ref('saas_manager.saas_server_default')
+        seeded.state = 'active'
+        starter = self.env.ref('saas_manager.plan_starter')
+        enterprise = self.env.ref('saas_manager.plan_enterprise')
+        Server = self.env['saas.server']
+
+        # 50 users project 5 cores on a 4-core server
+        self.assertEqual(Server.get_available_server(plan=enterprise), seeded)
+
+        template = self.env['saas.template'].create({
+            'name': 'Seeded Template',
+            'code': 'seeded-template',
+            'template_db': 'seeded_template_db',
+            'server_id': seeded.id,
+        })
+        partner = self.env['res.partner'].create({'name': 'Seeded Partner'})
+        self.env['saas.instance'].create([{
+            'name': f'Starter {index}',
+            'database_name': f'starter_{index}',
+            'subdomain': f'starter-{index}',
+            'template_id': template.id,
+            'plan_id': starter.id,
+            'server_id': seeded.id,
+            'partner_id': partner.id,
+        } for index in range(20)])
+        self.assertEqual(Server.get_available_server(plan=starter), seeded)
+
+        # Resource projections become hard limits once enforced
+        seeded.enforce_resource_capacity = True
+        with self.assertRaises(UserError):
+            Server.get_available_server(plan=enterprise)
+
+    def test_placement_unknown_strategy(self):
+        """Test that an unknown placement strategy is rejected"""
+        self.server.state = 'active'
+        with self.assertRaises(UserError):
+            self.env['saas.server'].get_available_server(strategy='random')
+
+    def test_capacity_reserved_on_create(self):
+        """Test that instances cannot be created beyond max_instances"""
+        self.server.write({'state': 'active', 'max_instances': 1})
+        template = self.env['saas.template'].create({
+            'name': 'Reservation Template',
+            'code': 'reservation-template',
+            'template_db': 'reservation_template_db',
+        })
+        plan = self.env['saas.plan'].create({
+            'name': 'Reservation Plan',
+            'code': 'reservation-plan',
+        })
+        partner = self.env['res.partner'].create({'name': 'Reservation Partner'})
+        values = {
+            'template_id': template.id,
+            'plan_id': plan.id,
+            'server_id': self.server.id,
+            'partner_id': partner.id,
+        }
+        first = self.env['saas.instance'].create(dict(values, name='First', database_name='first', subdomain='first'))
+
+        with self.assertRaises(UserError):
+            self.env['saas.instance'].create(dict(values, name='Second', database_name='second', subdomain='second'))
+
+        # A terminated instance frees its slot
+        first.state = 'terminated'
+        self.env['saas.instance'].create(dict(values, name='Third', database_name='third', subdomain='third'))
+
+    def test_filestore_directory_size(self):
+        """Test the filestore scan used for storage metering"""
+        with tempfile.TemporaryDirectory() as data_dir:
+            filestore = os.path.join(data_dir, 'filestore', 'client_db', 'ab')
+            os.makedirs(filestore)
+            for name, size in (('one', 100), ('two', 250)):
+                with open(os.path.join(filestore, name), 'wb') as attachment:
+                    attachment.write(b'x' * size)
+
+            self.server.data_dir = data_dir
+            self.assertEqual(_directory_size(self.server._get_filestore_path('client_db')), 350)
+            self.assertEqual(_directory_size(self.server._get_filestore_path('missing_db')), 0)
+
+            # A hardlinked file is counted once
+            os.link(os.path.join(filestore, 'one'), os.path.join(filestore, 'one_link'))
+            self.assertEqual(_directory_size(self.server._get_filestore_path('client_db')), 350)
+
+            # An unreadable directory is skipped, the rest is still counted
+            other = os.path.join(data_dir, 'filestore', 'client_db', 'cd')
+            os.makedirs(other)
+            scandir = os.scandir
+
+            def unreadable(path):
+                if path == other:
+                    raise PermissionError(13, 'Permission denied', path)
+                return scandir(path)
+
+            with patch('odoo.addons.saas_manager.models.saas_server.os.scandir', side_effect=unreadable):
+                self.assertEqual(_directory_size(self.server._get_filestore_path('client_db')), 350)
+
+    def test_collect_instance_storage(self):
+        """Test storage metering: database sizes, filestores and the batched UPDATE"""
+        template = self.env['saas.template'].create({
+            'name': 'Storage Template',
+            'code': 'storage-template',
+            'template_db': 'storage_template_db',
+            'server_id': self.server.id,
+        })
+        plan = self.env['saas.plan'].create({'name': 'Storage Plan', 'code': 'storage-plan'})
+        partner = self.env['res.partner'].create({'name': 'Storage Partner'})
+        instances = self.env['saas.instance'].create([{
+            'name': f'Storage {name}',
+            'database_name': name,
+            'subdomain': name.replace('_', '-'),
+            'template_id': template.id,
+            'plan_id': plan.id,
+            'server_id': self.server.id,
+            'partner_id': partner.id,
+            'state': 'active',
+        } for name in ('storage_one', 'storage_two', 'storage_missing')])
+        gb = 1024 ** 3
+
+        with tempfile.TemporaryDirectory() as data_dir:
+            self.server.data_dir = data_dir
+
+            def write(db_name, name, size):
+                directory = os.path.join(self.server._get_filestore_path(db_name), 'ab')
+                os.makedirs(directory, exist_ok=True)
+                with open(os.path.join(directory, name), 'wb') as attachment:
+                    attachment.write(b'x' * size)
+                return os.path.join(directory, name)
+
+            # Files hardlinked from the template are not billed to the instances
+            shared = write('storage_template_db', 'shared', 1000)
+            os.makedirs(os.path.join(self.server._get_filestore_path('storage_one'), 'ab'))
+            os.link(shared, os.path.join(self.server._get_filestore_path('storage_one'), 'ab', 'shared'))
+            write('storage_one', 'own', 100)
+            write('storage_two', 'own', 300)
+
+            connection = MagicMock()
+            cr = connection.cursor.return_value.__enter__.return_value
+            cr.fetchall.return_value = [('storage_one', gb), ('storage_two', 2 * gb)]
+            with patch.object(type(self.server), '_pg_connect', return_value=connection):
+                storage = self.server._collect_instance_storage()
+
+        one, two, missing = instances
+        self.assertEqual(set(storage), {one.id, two.id})
+        self.assertEqual(sorted(cr.execute.call_args.args[1][0]), sorted(instances.mapped('database_name')))
+        self.assertAlmostEqual(one.storage_used, (gb + 100) / gb)
+        self.assertAlmostEqual(two.storage_used, (2 * gb + 300) / gb)
+        self.assertTrue(one.storage_used_date)
+        self.assertFalse(missing.storage_used_date)
+
+    def test_neutralize_database(self):
+        """Test that a clone is neutralized in one transaction"""
+        connection = MagicMock()
+        cr = connection.cursor.return_value.__enter__.return_value
+
+        with patch.object(type(self.server), '_pg_connect', return_value=connection) as pg_connect:
+            self.server._pg_neutralize_database('client_db')
+
+        pg_connect.assert_called_once_with('client_db')
+        self.assertFalse(connection.autocommit)
+        self.assertEqual([call.args[0] for call in cr.execute.call_args_list], NEUTRALIZE_QUERIES)
+        connection.__exit__.assert_called_once_with(None, None, None)
+        connection.close.assert_called_once()
+
+    def _mock_pg_connections(self, count):
+        """Patch _pg_connect with `count` mocked connections, returning their cursors"""
+        connections = [MagicMock() for _index in range(count)]
+        cursors = [connection.cursor.return_value.__enter__.return_value for connection in connections]
+        return patch.object(type(self.server), '_pg_connect', side_effect=connections), cursors
+
+    def test_native_clone_sql(self):
+        """Test the SQL of a native clone: terminate, CREATE DATABASE, reset identity"""
+        pg_connect, (cr, clone_cr) = self._mock_pg_connections(2)
+
+        with pg_connect as connect, \
+                patch.object(type(self.server), '_copy_filestore') as copy_filestore:
+            self.server._pg_clone_database('template_db', 'client_db')
+
+        self.assertEqual([call.args for call in connect.call_args_list], [(), ('client_db',)])
+        terminate, create = cr.execute.call_args_list
+        self.assertIn('pg_terminate_backend', terminate.args[0])
+        self.assertEqual(terminate.args[1], ['template_db'])
+        self.assertEqual(create.args[0], sql.SQL("CREATE DATABASE {} ENCODING 'unicode' TEMPLATE {}").format(
+            sql.Identifier('client_db'), sql.Identifier('template_db')
+        ))
+        identity = clone_cr.execute.call_args.args[0]
+        for key in ('database.uuid', 'database.secret', 'database.create_date'):
+            self.assertIn(key, identity)
+        copy_filestore.assert_called_once_with('template_db', 'client_db')
+
+    def test_native_clone_retries_template_in_use(self):
+        """Test that connections are terminated again when the template is in use"""
+        pg_connect, (cr, _clone_cr) = self._mock_pg_connections(2)
+        in_use = [pg_errors.ObjectInUse('source database "template_db" is being accessed by other users')]
+
+        def execute(query, params=None):
+            if isinstance(query, sql.Composed) and in_use:
+                raise in_use.pop()
+
+        cr.execute.side_effect = execute
+        with pg_connect, patch.object(type(self.server), '_copy_filestore'), \
+                patch('odoo.addons.saas_manager.models.saas_server.time.sleep') as sleep:
+            self.server._pg_clone_database('template_db', 'client_db')
+
+        queries = [call.args[0] for call in cr.execute.call_args_list]
+        self.assertEqual(len(queries), 4)
+        self.assertIn('pg_terminate_backend', queries[2])
+        sleep.assert_called_once_with(1)
+
+    def test_native_clone_gives_up(self):
+        """Test that the clone fails once every attempt found the template in use"""
+        pg_connect, (cr, _clone_cr) = self._mock_pg_connections(1)
+
+        def execute(query, params=None):
+            if isinstance(query, sql.Composed):
+                raise pg_errors.ObjectInUse('in use')
+
+        cr.execute.side_effect = execute
+        with pg_connect, patch('odoo.addons.saas_manager.models.saas_server.time.sleep'):
+            with self.assertRaises(pg_errors.ObjectInUse):
+                self.server._pg_clone_database('template_db', 'client_db', attempts=2)
+
+    def test_native_clone_cleanup_and_retry(self):
+        """Test that a clone failing after CREATE DATABASE is dropped, so a retry succeeds"""
+        with tempfile.TemporaryDirectory() as data_dir:
+            self.server.data_dir = data_dir
+            source = os.path.join(self.server._get_filestore_path('template_db'), 'ab')
+            os.makedirs(source)
+            with open(os.path.join(source, 'attachment'), 'wb') as attachment:
+                attachment.write(b'content')
+            target = self.server._get_filestore_path('client_db')
+
+            # The filestore copy fails after the database was created
+            pg_connect, (_cr, _clone_cr, drop_cr) = self._mock_pg_connections(3)
+            with pg_connect, \
+                    patch('odoo.addons.saas_manager.models.saas_server.os.link', side_effect=OSError('EXDEV')), \
+                    patch('odoo.addons.saas_manager.models.saas_server.shutil.copy2', side_effect=OSError('ENOSPC')):
+                with self.assertRaises(OSError):
+                    self.server._pg_clone_database('template_db', 'client_db')
+
+            terminate, drop = drop_cr.execute.call_args_list
+            self.assertEqual(terminate.args[1], ['client_db'])
+            self.assertEqual(drop.args[0], sql.SQL("DROP DATABASE IF EXISTS {}").format(sql.Identifier('client_db')))
+            self.assertFalse(os.path.exists(target))
+
+            # A filestore left by a killed worker does not block the retry either
+            os.makedirs(os.path.join(target, 'ab'))
+            pg_connect, _cursors = self._mock_pg_connections(2)
+            with pg_connect:
+                self.server._pg_clone_database('template_db', 'client_db')
+            self.assertTrue(os.path.samefile(
+                os.path.join(target, 'ab', 'attachment'), os.path.join(source, 'attachment')
+            ))
+
+    def test_copy_filestore_hardlinks(self):
+        """Test that the filestore copy hardlinks files, or copies them across filesystems"""
+        with tempfile.TemporaryDirectory() as data_dir:
+            self.server.data_dir = data_dir
+            source = os.path.join(self.server._get_filestore_path('template_db'), 'ab')
+            os.makedirs(source)
+            with open(os.path.join(source, 'attachment'), 'wb') as attachment:
+                attachment.write(b'content')
+
+            self.server._copy_filestore('template_db', 'linked_db')
+            linked = os.path.join(self.server._get_filestore_path('linked_db'), 'ab', 'attachment')
+            self.assertTrue(os.path.samefile(linked, os.path.join(source, 'attachment')))
+
+            with patch('odoo.addons.saas_manager.models.saas_server.os.link', side_effect=OSError('EXDEV')):
+                self.server._copy_filestore('template_db', 'copied_db')
+            copied = os.path.join(self.server._get_filestore_path('copied_db'), 'ab', 'attachment')
+            self.assertFalse(os.path.samefile(copied, os.path.join(source, 'attachment')))
+            with open(copied, 'rb') as attachment:
+                self.assertEqual(attachment.read(), b'content')
@@ -6,9 +6,13 @@ Test file for SaaS Template creation and cloning
 """
 
 import logging
+from unittest.mock import patch
+
 from odoo.tests.common import TransactionCase
 from odoo.exceptions import UserError
 
+from odoo.addons.saas_manager.tools.rpc_client import OdooRpcClient
+
 _logger = logging.getLogger(__name__)
 
 
@@ -96,6 +100,45 @@ class TestSaaSTemplateCreation(TransactionCase):
         with self.assertRaises(UserError):
             template.clone_template_db('new_instance_db')
 
+    def test_install_modules_batched(self):
+        """Test: Les modules sont installés en un seul appel"""
+        server = self.env['saas.server'].create({
+            'name': 'Module Server',
+            'code': 'module-server',
+            'server_url': 'http://modules.localhost:8069',
+        })
+        template = self.template_model.create({
+            'name': 'Modules',
+            'code': 'modules',
+            'template_db': 'template_modules',
+            'server_id': server.id,
+        })
+        states = {1: 'installed', 2: 'uninstalled', 3: 'uninstalled'}
+        names = {1: 'base', 2: 'mail', 3: 'portal'}
+        calls = []
+
+        def execute_kw(client, db_name, uid, password, model, method, args, kwargs=None, timeout=None):
+            calls.append(method)
+            if method == 'search_read':
+                return [{'id': i, 'name': names[i], 'state': states[i]} for i in names]
+            if method == 'button_immediate_install':
+                for module_id in args[0]:
+                    states[module_id] = 'installed'
+                return True
+            return [{'id': i, 'name': names[i], 'state': states[i]} for i in args[0]]
+
+        with patch.object(OdooRpcClient, 'login', lambda *args, **kwargs: 2), \
+                patch.object(OdooRpcClient, 'execute_kw', execute_kw):
+            report = template._install_modules_via_rpc(
+                server.server_url, template.template_db, ['base', 'mail', 'portal', 'missing']
+            )
+
+        self.assertEqual(calls.count('button_immediate_install'), 1)
+        self.assertEqual(report['status'], 'success')
+        self.assertEqual(report['already_installed'], ['base'])
+        self.assertEqual(sorted(report['installed']), ['mail', 'portal'])
+        self.assertEqual(report['not_found'], ['missing'])
+
 
 class TestSaaSInstanceProvisioning(TransactionCase):
     """Test cases for SaaS Instance provisioning"""
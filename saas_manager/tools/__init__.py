@@ -0,0 +1,5 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+from .misc import auto_commit_allowed
+from .rpc_client import OdooRpcClient, RpcError
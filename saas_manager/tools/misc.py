@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+"""
+Helpers shared by the SaaS crons and background jobs.
+"""
+
+import threading
+
+from odoo.modules import module
+
+
+def auto_commit_allowed():
+    """
+    Indique si un traitement long peut committer (désactivé pendant les tests).
+    Whether a long-running job may commit (disabled while running tests).
+
+    Tests run in one transaction rolled back at the end: committing would
+    leak their data, and a separate cursor would not see it.
+    """
+    return not (module.current_test or getattr(threading.current_thread(), 'testing', False))
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+"""
+Odoo RPC Client
+===============
+Client JSON-RPC partagé vers les serveurs gérés.
+Shared JSON-RPC client for the managed servers.
+
+HTTP sessions are cached per server configuration so that consecutive
+calls (and concurrent worker threads) reuse pooled keep-alive connections
+instead of opening a new TCP+TLS connection for every request.
+"""
+
+import logging
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+_logger = logging.getLogger(__name__)
+
+# Connections kept open per host
+POOL_MAXSIZE = 16
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+class RpcError(Exception):
+    """Error returned by the remote server in a JSON-RPC response"""
+
+    def __init__(self, message, error=None):
+        super().__init__(message)
+        self.error = error or {}
+
+
+def _get_session(base_url, verify, retries, backoff):
+    """
+    Return the cached session for a server configuration.
+
+    Connection failures are retried with exponential backoff for every
+    method; 502/503/504 answers are only retried for idempotent methods,
+    since a JSON-RPC POST may already have been executed by the server.
+    """
+    key = (base_url, verify, retries, backoff)
+    session = _sessions.get(key)
+    if session is not None:
+        return session
+
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            retry = Retry(
+                total=retries,
+                connect=retries,
+                read=0,
+                status=retries,
+                backoff_factor=backoff,
+                status_forcelist=(502, 503, 504),
+                allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=POOL_MAXSIZE,
+                max_retries=retry,
+            )
+            session = requests.Session()
+            session.verify = verify
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _sessions[key] = session
+            _logger.debug(f"Created RPC session for {base_url}")
+    return session
+
+
+def clear_sessions():
+    """Close and forget every cached session"""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+class OdooRpcClient:
+    """
+    JSON-RPC client for one managed Odoo server.
+
+    Instances are cheap: the underlying pooled session is shared between
+    all clients targeting the same server configuration.
+    """
+
+    def __init__(self, base_url, master_password=None, timeout=30, verify=True, retries=3, backoff=0.5):
+        self.base_url = base_url.rstrip('/')
+        self.master_password = master_password
+        self.timeout = timeout
+        self.session = _get_session(self.base_url, verify, retries, backoff)
+
+    def get(self, path, timeout=None, **kwargs):
+        """Plain GET request on the server (e.g. health endpoints)"""
+        return self.session.get(
+            f"{self.base_url}{path}",
+            timeout=timeout or self.timeout,
+            **kwargs
+        )
+
+    def call(self, service, method, *args, timeout=None):
+        """
+        Call a JSON-RPC service method.
+
+        Args:
+            service (str): 'db', 'common' or 'object'
+            method (str): Service method
+            *args: Method arguments
+            timeout (int): Per-call timeout in seconds (client default if None)
+
+        Returns:
+            Result of the call
+
+        Raises:
+            RpcError: If the server returned an error
+            requests.exceptions.RequestException: On transport errors
+        """
+        payload = {
+            'jsonrpc': '2.0',
+            'method': 'call',
+            'params': {
+                'service': service,
+                'method': method,
+                'args': list(args),
+            },
+            'id': 1
+        }
+        response = self.session.post(
+            f"{self.base_url}/jsonrpc",
+            json=payload,
+            timeout=timeout or self.timeout,
+        )
+        response.raise_for_status()
+        result = response.json()
+
+        if 'error' in result and result['error']:
+            error = result['error']
+            message = error.get('data', {}).get('message', str(error))
+            raise RpcError(message, error)
+        return result.get('result')
+
+    def db_call(self, method, *args, timeout=None):
+        """Call a 'db' service method, prefixed with the master password"""
+        return self.call('db', method, self.master_password, *args, timeout=timeout)
+
+    def login(self, db_name, login, password, timeout=None):
+        """Authenticate and return the user id (False if refused)"""
+        return self.call('common', 'login', db_name, login, password, timeout=timeout)
+
+    def execute_kw(self, db_name, uid, password, model, method, args, kwargs=None, timeout=None):
+        """Call a model method through the 'object' service"""
+        call_args = [db_name, uid, password, model, method, args]
+        if kwargs:
+            call_args.append(kwargs)
+        return self.call('object', 'execute_kw', *call_args, timeout=timeout)